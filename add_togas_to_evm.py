@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script adds TOGA projections to EVM gene models in one pass; replaces the chain
+getOverlappingTranscripts.py | cat | getUniqTranscripts.py | remove_duplicated_names.py:
+1) takes TOGA transcripts (identical structure) present in at least N TOGA annotations;
+2) adds them to EVM transcripts skipping structures that are already there (score/color ignored);
+3) for duplicated names outputs only the longest transcript.
+
+e.g usage: add_togas_to_evm.py -e db.evm.join.bed -t ref1/query_annotation.bed ref2/query_annotation.bed -n 2 > out.bed
+"""
+
+import argparse
+from bed12 import read_bed12, write_bed12
+from bed12_dedup import count_structures
+from io_utils import add_output_arguments, setup_stdout
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+def get_consensus_togas(toga_beds, shared):
+    ## Yields (fingerprint, transcript) of TOGA structures present in at least shared files
+
+    toga_table = count_structures(toga_beds)
+    for fingerprint, transcr in toga_table.records(min_files=shared):
+        yield fingerprint, transcr
+
+
+def select_uniq_longest(evm_bed, consensus_togas):
+    ## Goes through EVM and consensus TOGA transcripts; skips already seen structures;
+    ## keeps the longest transcript for each name: {name: (exons_cov, transcript)}
+
+    seen_structures = set()
+    longest_dict = {}
+
+    def add_transcript(fingerprint, transcr):
+        if fingerprint in seen_structures:
+            return
+        seen_structures.add(fingerprint)
+        exons_cov = transcr.spliced_length()
+        if (transcr.name not in longest_dict) or (exons_cov > longest_dict[transcr.name][0]):
+            longest_dict[transcr.name] = (exons_cov, transcr)
+
+    for transcr in read_bed12(evm_bed):
+        add_transcript(transcr.structure_digest(), transcr)
+    for fingerprint, transcr in consensus_togas:
+        add_transcript(fingerprint, transcr)
+    return longest_dict
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-e', '--evm', type=str, help='EVM gene models in bed12 format')
+    parser.add_argument('-t', '--togas', nargs='+', type=str, help='list of TOGA query_annotation.bed files')
+    parser.add_argument('-n', '--number', type=int, help='TOGA transcript is present in AT LEAST this number of files')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
+
+    ## Find TOGA transcripts shared by at least n references
+    consensus_togas = get_consensus_togas(args.togas, args.number)
+
+    ## Add them to EVM transcripts: unique structures, the longest per name
+    longest_dict = select_uniq_longest(args.evm, consensus_togas)
+
+    ## Output combined annotation
+    for name in longest_dict:
+        write_bed12(longest_dict[name][1])
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,6 @@ OUTBED=$ANNODIR/$db/$db.evm.added_togas.bed
 
 TOGAS=""
 TOGABED="query_annotation.bed"
-REFS=$(echo $REFLIST | sed 's/,/\./g')
 
 for ref in $(echo $REFLIST | sed 's/,/ /g');
 do
@@ -21,11 +20,8 @@ do
 	TOGAS=$TOGAS" $TOGASDIR/$TOGABED"
 done
 
-getOverlappingTranscripts.py -n $SHARED -f $TOGAS > $ANNODIR/$db/uniq.overlap.$REFS.bed
-
-
-remove_duplicated_names.py -f <(getUniqTranscripts.py -f <(cat $EVMBED $ANNODIR/$db/uniq.overlap.$REFS.bed ) 2> /dev/null) > $OUTBED
-rm $ANNODIR/$db/uniq.overlap.$REFS.bed
+## shared TOGA transcripts -> unique structures with EVM -> longest per name; all in one pass
+add_togas_to_evm.py -e $EVMBED -t $TOGAS -n $SHARED > $OUTBED
 
 echo "All Done! Added TOGAs to gene models. See results in $OUTBED"
 
@@ -9,45 +9,44 @@ import argparse
 from collections import defaultdict
 from collections import Counter
 import sys
+from bed12 import read_bed12, iter_bed12
+from chrom_pool import map_by_chrom
+from io_utils import add_output_arguments, setup_stdout
 
 __author__ = "Ekaterina Osipova, 2020."
 
 
 def get_all_intron_coords(transcript):
-    ## Takes bed12 transcript line and returns a list with intron intervals: [(chrom, x1, x2), (chrom, x3, x4), ..]
+    ## Takes bed12 transcript record and returns a list with intron intervals: [(chrom, x1, x2), (chrom, x3, x4), ..]
 
-    chrom = transcript.split()[0]
-    start = int(transcript.split()[1])
-    exon_number = int(transcript.split()[9])
-    intron_coord_list = []
-    block_starts = [start + i for i in map(int, transcript.split()[11].rstrip(',').split(','))]
-    block_sizes = map(int, transcript.split()[10].rstrip(',').split(','))
-    for i in range(exon_number - 1):
-        intron_coord_list.append((chrom, block_starts[i] + block_sizes[i], block_starts[i + 1]))
-    return intron_coord_list
+    return transcript.intron_coords()
 
 
 def read_rnaseq_bed(rnaseq_file):
     ## Reads RNAseq annotation file (no CDS regions) and adds all introns to rnaseq_coord_dict:
     ## {(chrom, x1, x2): [transcript1, transcript2, ..], }
 
+    return index_rnaseq_records(read_bed12(rnaseq_file))
+
+
+def index_rnaseq_records(rnaseq_records):
+    ## Adds all introns of given RNAseq transcripts to rnaseq_coord_dict
+
     rnaseq_coord_dict = defaultdict(list)
-    with open(rnaseq_file, 'r') as inf:
-        for bed_line in inf.readlines():
-            intron_coord_list = get_all_intron_coords(bed_line)
-            for intron in intron_coord_list:
-                rnaseq_coord_dict[intron].append(bed_line)
+    for bed_record in rnaseq_records:
+        intron_coord_list = get_all_intron_coords(bed_record)
+        for intron in intron_coord_list:
+            rnaseq_coord_dict[intron].append(bed_record)
     return rnaseq_coord_dict
 
 
 def prepare_5prime_blocks(transcript, cut_coord):
-    ## Takes bed12 transcript line and one coord where to cut it;
+    ## Takes bed12 transcript record and one coord where to cut it;
     ## returns list of starts and sizes of non-coding blocks; works with 5'-UTR
 
     noncoding_blocks = []
-    start = int(transcript.split()[1])
-    abs_block_starts_list = [start + int(i) for i in transcript.split()[11].rstrip(',').split(',')]
-    block_sizes_list = [int(i) for i in transcript.split()[10].rstrip(',').split(',')]
+    abs_block_starts_list = transcript.abs_block_starts()
+    block_sizes_list = list(transcript.block_sizes)
 
     i = 0
     while abs_block_starts_list[i] + block_sizes_list[i] < cut_coord:
@@ -59,13 +58,12 @@ def prepare_5prime_blocks(transcript, cut_coord):
 
 
 def prepare_3prime_blocks(transcript, cut_coord):
-    ## Takes bed12 transcript line and one coord where to cut it;
+    ## Takes bed12 transcript record and one coord where to cut it;
     ## returns list of starts and sizes of non-coding blocks; works with 3'-UTR
 
     noncoding_blocks = []
-    start = int(transcript.split()[1])
-    abs_block_starts_list = [start + int(i) for i in transcript.split()[11].rstrip(',').split(',')]
-    block_sizes_list = [int(i) for i in transcript.split()[10].rstrip(',').split(',')]
+    abs_block_starts_list = transcript.abs_block_starts()
+    block_sizes_list = list(transcript.block_sizes)
 
     abs_block_starts_list.reverse()
     block_sizes_list.reverse()
@@ -83,33 +81,44 @@ def prepare_3prime_blocks(transcript, cut_coord):
 def read_anno_bed(anno_file, rnaseq_coord_dict):
     ## Reads annotation file without UTRs and finds if first/last intron matches perfectly anything in rnaseq_coord_dict
 
+    return index_anno_records(read_bed12(anno_file), rnaseq_coord_dict)
+
+
+def index_anno_records(anno_records, rnaseq_coord_dict):
+    ## Groups annotated transcripts by name together with RNAseq transcripts matching their first/last intron
+
     transcript_dict = defaultdict(list)
-    with open(anno_file, 'r') as inf:
-        for bed_line in inf.readlines():
-            name = bed_line.split()[3]
-            start = int(bed_line.split()[1])
-            end = int(bed_line.split()[2])
-            exon_number = int(bed_line.split()[9])
-            transcript_info = bed_line
-
-            ## Initiate and update UTR lists in the transcript_dict (3'UTRs and 5'UTRs separately)
-            utrs5_list = []
-            utrs3_list = []
-
-            if exon_number > 1:
-                intron_coord_list = get_all_intron_coords(bed_line)
-                first_intron_coords = intron_coord_list[0]
-                last_intron_coords = intron_coord_list[-1]
-
-                if (first_intron_coords in rnaseq_coord_dict):
-                    utrs5_list = [i for i in rnaseq_coord_dict[first_intron_coords] if int(i.split()[1]) < start]
-                if (last_intron_coords in rnaseq_coord_dict):
-                    utrs3_list = [i for i in rnaseq_coord_dict[last_intron_coords] if int(i.split()[2]) > end]
-
-            transcript_dict[name].append((transcript_info, utrs5_list, utrs3_list))
+    for bed_record in anno_records:
+        transcript_dict[bed_record.name].append(find_utr_transcripts(bed_record, rnaseq_coord_dict))
     return transcript_dict
 
 
+def find_utr_transcripts(bed_record, rnaseq_coord_dict):
+    ## Finds RNAseq transcripts sharing first/last intron with the annotated transcript;
+    ## returns (transcript_info, utrs5_list, utrs3_list)
+
+    start = bed_record.start
+    end = bed_record.end
+    exon_number = bed_record.block_count
+    transcript_info = bed_record
+
+    ## Initiate and update UTR lists (3'UTRs and 5'UTRs separately)
+    utrs5_list = []
+    utrs3_list = []
+
+    if exon_number > 1:
+        intron_coord_list = get_all_intron_coords(bed_record)
+        first_intron_coords = intron_coord_list[0]
+        last_intron_coords = intron_coord_list[-1]
+
+        if (first_intron_coords in rnaseq_coord_dict):
+            utrs5_list = [i for i in rnaseq_coord_dict[first_intron_coords] if i.start < start]
+        if (last_intron_coords in rnaseq_coord_dict):
+            utrs3_list = [i for i in rnaseq_coord_dict[last_intron_coords] if i.end > end]
+
+    return transcript_info, utrs5_list, utrs3_list
+
+
 def get_max_most_common(list, utr_type):
     ## Finds most common element in the list; if there're multiple, returns max of those
 
@@ -124,14 +133,11 @@ def get_max_most_common(list, utr_type):
 
 
 def add_utr_blocks(transcript_info, utr5_blocks, utr3_blocks):
-    ## Given transcript annotation line updates it with utrs
+    ## Given transcript annotation record updates it with utrs
 
-    start = int(transcript_info.split()[1])
-    chrom = transcript_info.split()[0]
-    exon_number = int(transcript_info.split()[9])
-    name = transcript_info.split()[3]
-    trans_starts = [i + start for i in map(int, transcript_info.split()[11].rstrip(',').split(','))]
-    trans_sizes = map(int, transcript_info.split()[10].rstrip(',').split(','))
+    exon_number = transcript_info.block_count
+    trans_starts = transcript_info.abs_block_starts()
+    trans_sizes = list(transcript_info.block_sizes)
 
     utr5_starts = [i[0] for i in utr5_blocks]
     utr5_sizes = [i[1] for i in utr5_blocks]
@@ -144,7 +150,6 @@ def add_utr_blocks(transcript_info, utr5_blocks, utr3_blocks):
 
     ## update starts and block sizes
     new_trans_starts = [i - utr5_starts[0] for i in utr5_starts + trans_starts[1:] + utr3_starts[1:]]
-    block_starts_update = ','.join(map(str, new_trans_starts)) + ','
 
     # make updates of block sizes if it's a single exon gene
     if exon_number == 1:
@@ -153,13 +158,11 @@ def add_utr_blocks(transcript_info, utr5_blocks, utr3_blocks):
     else:
         new_trans_sizes = utr5_sizes[:-1] + [utr5_sizes[-1] + trans_sizes[0]] + trans_sizes[1:-1] + \
                             [trans_sizes[-1] + utr3_sizes[0]] + utr3_sizes[1:]
-    block_sizes_update = ','.join(map(str, new_trans_sizes)) + ','
 
-    ## combine all info in a new annotation line
+    ## combine all info in a new annotation record
     exon_number_update = len(new_trans_starts)
-    bed_line_list_update = [chrom, str(start_update), str(end_update), name] + transcript_info.split()[4:9] + \
-                           [str(exon_number_update), block_sizes_update, block_starts_update]
-    bed_line_update = '\t'.join(bed_line_list_update)
+    bed_line_update = transcript_info.replace(start=start_update, end=end_update, block_count=exon_number_update,
+                                              block_sizes=new_trans_sizes, block_starts=new_trans_starts)
 
     return bed_line_update
 
@@ -168,38 +171,58 @@ def update_annotation(transcript_dict):
     ## Adds 5'- and 3'-UTRs for each transcript in given transcript_dict
     ## Runs add_utrs() function that work with an individual transcript
 
+    for bed_line_update in get_updated_lines(transcript_dict):
+        print(bed_line_update)
+    return
+
+
+def get_updated_lines(transcript_dict):
+    ## Yields bed12 lines of all transcripts in transcript_dict with UTRs added
+
     for name in transcript_dict:
         for transcript in transcript_dict[name]:
-            transcript_info = transcript[0]
-            cut_utr5 = int(transcript_info.split()[1])
-            cut_utr3 = int(transcript_info.split()[2])
-            utr5_transcript_list = transcript[1]
-            utr3_transcript_list = transcript[2]
-
-            # check if all non-coding starts > start !!! not yet done
-            # print('utr5 list: ', utr5_transcript_list)
-            # print('utr3 list: ', utr3_transcript_list)
-
-            # if there are updates for this transcript, get the most common coordinate
-            if utr5_transcript_list != []:
-                utr5_start_list = [int(i.split()[1]) for i in utr5_transcript_list]
-                utr5 = get_max_most_common(utr5_start_list, utr_type=5)
-                maxcount_transcript_index = [int(i.split()[1]) for i in utr5_transcript_list].index(utr5)
-                utr5_blocks = prepare_5prime_blocks(utr5_transcript_list[maxcount_transcript_index], cut_utr5)
-            else:
-                utr5_blocks = [(int(transcript_info.split()[1]), 0)]
-
-            if utr3_transcript_list != []:
-                utr3_end_list = [int(i.split()[2]) for i in utr3_transcript_list]
-                utr3 = get_max_most_common(utr3_end_list, utr_type=3)
-                maxcount_transcript_index = [int(i.split()[2]) for i in utr3_transcript_list].index(utr3)
-                utr3_blocks = prepare_3prime_blocks(utr3_transcript_list[maxcount_transcript_index], cut_utr3)
-            else:
-                utr3_blocks = [(int(transcript_info.split()[2]), 0)]
-
-            bed_line_update  = add_utr_blocks(transcript_info, utr5_blocks, utr3_blocks)
-            print(bed_line_update)
-    return
+            yield update_transcript(transcript).to_line()
+
+
+def update_transcript(transcript):
+    ## Adds 5'- and 3'-UTRs to one transcript: (transcript_info, utrs5_list, utrs3_list)
+
+    transcript_info = transcript[0]
+    cut_utr5 = transcript_info.start
+    cut_utr3 = transcript_info.end
+    utr5_transcript_list = transcript[1]
+    utr3_transcript_list = transcript[2]
+
+    # check if all non-coding starts > start !!! not yet done
+    # print('utr5 list: ', utr5_transcript_list)
+    # print('utr3 list: ', utr3_transcript_list)
+
+    # if there are updates for this transcript, get the most common coordinate
+    if utr5_transcript_list != []:
+        utr5_start_list = [i.start for i in utr5_transcript_list]
+        utr5 = get_max_most_common(utr5_start_list, utr_type=5)
+        maxcount_transcript_index = utr5_start_list.index(utr5)
+        utr5_blocks = prepare_5prime_blocks(utr5_transcript_list[maxcount_transcript_index], cut_utr5)
+    else:
+        utr5_blocks = [(transcript_info.start, 0)]
+
+    if utr3_transcript_list != []:
+        utr3_end_list = [i.end for i in utr3_transcript_list]
+        utr3 = get_max_most_common(utr3_end_list, utr_type=3)
+        maxcount_transcript_index = utr3_end_list.index(utr3)
+        utr3_blocks = prepare_3prime_blocks(utr3_transcript_list[maxcount_transcript_index], cut_utr3)
+    else:
+        utr3_blocks = [(transcript_info.end, 0)]
+
+    return add_utr_blocks(transcript_info, utr5_blocks, utr3_blocks)
+
+
+def update_chrom_annotation(anno_lines, rnaseq_lines):
+    ## Worker of --threads mode: adds UTRs to annotated transcripts of one chromosome; returns list of bed12 lines
+
+    rnaseq_coord_dict = index_rnaseq_records(iter_bed12(rnaseq_lines))
+    transcript_dict = index_anno_records(iter_bed12(anno_lines), rnaseq_coord_dict)
+    return list(get_updated_lines(transcript_dict))
 
 
 def main():
@@ -207,12 +230,23 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-r', '--rnaseq', type=str, help='transcripts assembled from RNAseq, e.g. stringtie in bed12 format')
     parser.add_argument('-a', '--anno', type=str, help='bed12 annotation file to add UTRs to')
+    parser.add_argument('-t', '--threads', type=int, default=1,
+                        help='number of processes; >1 runs chromosomes in parallel; default=1')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
     ## bed12 format:
     ## chrom[0] start[1] end[2] name[3] score[4] strand[5] cds_start[6] cds_end[7] rgb[8] count[9]\
     ##  block_sizes[10] block_starts[11]
 
+    ## Multiple threads: process chromosomes in parallel; output them in the annotation order
+    if args.threads > 1:
+        for chrom_lines in map_by_chrom(update_chrom_annotation, args.anno, args.rnaseq, args.threads):
+            for bed_line_update in chrom_lines:
+                print(bed_line_update)
+        return
+
     ## Read stringtie assembly into a dictionary
     rnaseq_coord_dict = read_rnaseq_bed(args.rnaseq)
 
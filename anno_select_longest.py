@@ -4,6 +4,9 @@ import sys
 import argparse
 from collections import defaultdict
 from operator import itemgetter
+from bed12 import BED12_FIELDS, read_bed12, write_bed12
+from io_utils import add_output_arguments, open_input, setup_stdout
+from profiling import add_profile_arguments, setup_profiler
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -13,8 +16,8 @@ def read_into_dict(file):
     ## Read isoformes into dict
 
     iso_dict = defaultdict(list)
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(file) as inf:
+        for line in inf:
            gene = line.rstrip().split()[0]
            trans = line.rstrip().split()[1]
            iso_dict[gene].append(trans)
@@ -24,40 +27,66 @@ def read_into_dict(file):
 def read_anno_into_dict(anno, field):
     ## Reads bed12 annotation file into a dictionary ID : (LEN, trancs_info)
 
+    if field > len(BED12_FIELDS):
+        print('There is no field {} in the annotation! Abort'.format(field))
+        sys.exit(1)
+    id_field = BED12_FIELDS[field - 1]
+
     anno_dict = {}
-    with open(anno, 'r') as inf:
-        for line in inf.readlines():
-            if len(line.split()) < field - 1:
-                print('There is no field {} in the annotation! Abort'.format(field))
-                sys.exit(1)
-            else:
-                id = line.split()[field - 1]
-                exon_lens = line.split()[10].rstrip(',').split(',')
-                transc_len = sum([int(i) for i in exon_lens])
-                transc_info = line.rstrip()
-                anno_dict[id] = (transc_len, transc_info)
+    for transc_info in read_bed12(anno):
+        id = getattr(transc_info, id_field)
+        transc_len = transc_info.spliced_length()
+        anno_dict[id] = (transc_len, transc_info)
     return anno_dict
 
 
+def read_anno_into_dict_columnar(anno, field):
+    ## Same as read_anno_into_dict, lengths of all transcripts are computed at once (bed12_blocks.py);
+    ## values are (LEN, bed12 line)
+
+    from bed12_blocks import read_block_table
+    if field > len(BED12_FIELDS):
+        print('There is no field {} in the annotation! Abort'.format(field))
+        sys.exit(1)
+
+    table = read_block_table(anno)
+    return dict(zip(table.column(BED12_FIELDS[field - 1]), zip(table.spliced_lengths().tolist(), table.get_lines())))
+
+
 def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
     parser.add_argument('-i', '--iso', type=str, help='isoformes file : gene \t transcript')
-    parser.add_argument('-a', '--anno', type=str, help='annotationin bed12 format') 
+    parser.add_argument('-a', '--anno', type=str, help='annotation in bed12 format or its store from bed12_store.py')
+    parser.add_argument('--columnar', action='store_true',
+                        help='compute transcript lengths on columnar arrays (bed12_blocks.py, needs numpy)')
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    profiler = setup_profiler(args.profile, args.progress, args.cprofile)
+    setup_stdout(args.output, args.output_threads)
 
     ## Read isoforms into a dict
-    iso_dict = read_into_dict(args.iso)
-    
+    with profiler.phase('read_isoforms'):
+        iso_dict = read_into_dict(args.iso)
+        profiler.set_size('iso_dict', len(iso_dict))
+
     ## Read annotation into a dict
     field = 4
-    anno_dict = read_anno_into_dict(args.anno, field)
-    
+    with profiler.phase('read_anno_into_dict'):
+        if args.columnar:
+            anno_dict = read_anno_into_dict_columnar(args.anno, field)
+        else:
+            anno_dict = read_anno_into_dict(args.anno, field)
+        profiler.set_size('anno_dict', len(anno_dict))
+
     ## Output the longest isoform
-    for gene in iso_dict:
-        iso_info_list = [anno_dict[iso] for iso in iso_dict[gene]]
-        longest_iso = max(iso_info_list, key=itemgetter(0))[1]
-        print(longest_iso)
+    with profiler.phase('output_longest_isoforms'):
+        for gene in iso_dict:
+            iso_info_list = [anno_dict[iso] for iso in iso_dict[gene]]
+            longest_iso = max(iso_info_list, key=itemgetter(0))[1]
+            write_bed12(longest_iso)
+        profiler.add_records(len(iso_dict))
 
 
 if __name__ == "__main__":
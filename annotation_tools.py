@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#
+
+"""
+One entry point for the annotation scripts: every script is a subcommand run inside this process,
+so a pipeline of many small steps starts python (and imports its modules) only once.
+Commands can be chained with '::'; a chained command reads the bed12 records of the previous one
+from '@' as objects, without writing and parsing text in between.
+--batch runs many command lines (e.g. one per species) from a file, one after another in the same process.
+
+e.g usage:
+annotation_tools.py getUniqTranscripts -f anno.bed --output uniq.bed
+annotation_tools.py getUniqTranscripts -f anno.bed :: filter_anno_by_ref_anno -r ref.bed -a @ -e native \
+    :: anno_select_longest -i isoforms.tsv -a @ --output longest.bed
+annotation_tools.py --batch species_commands.txt
+"""
+
+import argparse
+from collections import OrderedDict
+import runpy
+import shlex
+import sys
+from bed12 import PIPE, record_pipe
+from io_utils import open_input, reset_stdout
+from profiling import reset_profiler
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+CHAIN_SEPARATOR = '::'
+
+## subcommands: {command: description}; command is the script name without .py
+COMMANDS = OrderedDict([
+    ('add_togas_to_evm', 'add shared TOGA projections to EVM gene models'),
+    ('add_utrs_from_stringtie', 'add UTRs to annotation from a transcriptome assembly'),
+    ('anno_select_longest', 'select the longest isoform of every gene'),
+    ('assign_genes_to_hits', 'replace uniprot IDs in blast hits with gene names'),
+    ('bed12_index', 'build/query a binary interval index of a bed12 annotation'),
+    ('bed12_store', 'convert a bed12 annotation into a memory-mapped columnar store'),
+    ('bed12_tabix', 'write/query a bgzipped, tabix-indexed bed'),
+    ('blast_store', 'convert blast hits (outfmt 6) into a columnar store'),
+    ('cds_add_utrs_from_stringtie', 'add UTRs to a CDS-only annotation from a transcriptome assembly'),
+    ('check_isoformes_equivalence', 'check if isoforms of two annotations are equivalent'),
+    ('compare_values_two_anno', 'compare values of the same IDs in two annotations'),
+    ('fasta_index', 'build .fai index of a fasta'),
+    ('filter_anno_by_ref_anno', 'keep transcripts with a similar-sized equivalent in a reference annotation'),
+    ('filter_annotation_with_list', 'keep/drop annotation entries by a list of IDs'),
+    ('filter_bed_with_fasta', 'keep gene models present in a fasta'),
+    ('filter_blast_hits', 'filter blast hits by species, output N best hits'),
+    ('filter_fasta_with_blast', 'keep proteins with good blast hits'),
+    ('getDifferentTranscripts', 'output transcripts present in only one of two annotations'),
+    ('getOverlappingTranscripts', 'output unique transcripts shared by several annotations'),
+    ('getUniqTranscripts', 'output unique transcript structures'),
+    ('get_gene_stats_from_anno', 'per-gene statistics of isoform values'),
+    ('give_labels_annotation', 'add labels to annotation entries from a list'),
+    ('id_stream', 'filter, label and rename annotation entries'),
+    ('left_CDS_only', 'remove UTRs from a bed12 annotation'),
+    ('parse_busco_output', 'parse BUSCO summary'),
+    ('parse_gff_for_geneids', 'transcript - gene ID - gene name table from gff3'),
+    ('remove_duplicated_names', 'remove transcripts with duplicated names'),
+    ('remove_gene_name', 'remove gene name prefix from isoform names'),
+    ('rename_duplicated_id_annotation', 'make duplicated annotation IDs unique'),
+    ('rename_fasta_from_dict', 'rename fasta headers from a table'),
+    ('replace_names_from_dict', 'replace/add names of annotation entries from a table'),
+    ('uniprot_index', 'build gene name index of a uniprot fasta'),
+])
+
+## commands writing their bed12 output with bed12.write_bed12(): they can pass records to the next chained command
+CHAINABLE = ('add_togas_to_evm', 'anno_select_longest', 'cds_add_utrs_from_stringtie', 'filter_anno_by_ref_anno',
+             'getUniqTranscripts', 'remove_duplicated_names')
+
+
+def split_chain(arguments):
+    ## Splits command line into chained commands: [(command, [arg1, arg2, ..]), ..]
+
+    chain = []
+    command_args = []
+    for arg in arguments + [CHAIN_SEPARATOR]:
+        if arg != CHAIN_SEPARATOR:
+            command_args.append(arg)
+            continue
+        if not command_args:
+            sys.exit('Error! Empty command in the chain')
+        chain.append((command_args[0], command_args[1:]))
+        command_args = []
+    return chain
+
+
+def check_chain(chain):
+    ## Exits with error if a command is unknown or can not pass its records to the next one
+
+    for i, (command, arguments) in enumerate(chain):
+        if command not in COMMANDS:
+            sys.exit('Error! Unknown command: {}; run annotation_tools.py -h to see all commands'.format(command))
+        if (i < len(chain) - 1) and (command not in CHAINABLE):
+            sys.exit('Error! {} can not pass records to the next command; chainable commands: {}'.format(
+                command, ', '.join(CHAINABLE)))
+
+
+def run_command(command, arguments):
+    ## Runs a script as if it was started as: command.py arguments; its modules stay imported for the next commands;
+    ## output and profiler set up by the command are closed (profile report written) when it ends
+
+    stdout = sys.stdout
+    sys.argv = [command + '.py'] + arguments
+    reset_profiler()
+    try:
+        runpy.run_module(command, run_name='__main__', alter_sys=True)
+    except SystemExit as error:
+        # -h, or a script ending with sys.exit(0)
+        if error.code not in (None, 0):
+            raise
+    finally:
+        reset_stdout(stdout)
+        sys.stdout.flush()
+        reset_profiler()
+
+
+def run_chain(chain):
+    ## Runs chained commands: records written by a command are read by the next one from PIPE
+
+    check_chain(chain)
+    try:
+        for i, (command, arguments) in enumerate(chain):
+            record_pipe.output = [] if i < len(chain) - 1 else None
+            run_command(command, arguments)
+            record_pipe.input = record_pipe.output
+    finally:
+        record_pipe.input = None
+        record_pipe.output = None
+
+
+def run_batch(batch_file):
+    ## Runs command lines of batch_file (one command or chain per line, # for comments) one after another
+
+    with open_input(batch_file) as inf:
+        command_lines = [line for line in inf if line.strip() and not line.lstrip().startswith('#')]
+    for command_line in command_lines:
+        run_chain(split_chain(shlex.split(command_line)))
+
+
+def format_commands():
+    ## Text with all commands for the help message
+
+    lines = ['commands (* can pass records on with {}):'.format(CHAIN_SEPARATOR)]
+    for command, description in COMMANDS.items():
+        lines.append('  {:<32}{}'.format(command + (' *' if command in CHAINABLE else ''), description))
+    return '\n'.join(lines)
+
+
+def main():
+    ## Parse arguments: everything after the command belongs to the command
+    parser = argparse.ArgumentParser(
+        usage='annotation_tools.py [-b BATCH] COMMAND [ARGS ..] [{} COMMAND [ARGS ..] ..]'.format(CHAIN_SEPARATOR),
+        description='Runs annotation scripts as subcommands in one process; in a chain, the next command reads '
+                    'records of the previous one from {}'.format(PIPE),
+        epilog=format_commands(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-b', '--batch', type=str,
+                        help='file with command lines to run one by one (one command or chain per line); - for stdin')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='command and its arguments; COMMAND -h for its help')
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch)
+    elif args.command:
+        run_chain(split_chain(args.command))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,41 +7,80 @@ example output: ENSGALT00000098364.1,BCL9L
 """
 
 import argparse
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+import sys
+from filter_blast_hits import TopHits
+from uniprot_index import NO_GENE, UniprotIndex
+from io_utils import add_output_arguments, open_input, setup_stdout
 
 
 __author__ = "Ekaterina Osipova, 2020."
 
 
-def read_uniprot_db(uniprot):
-    ## Reads uniprot db into a dictionary
+def get_hit_accession(subject_id):
+    ## Gets uniprot accession from blast subject ID: sp|Q9H2S6|TNMD_HUMAN -> Q9H2S6
 
-    uniprot_db_dict = {}
-    with open(uniprot, 'r') as inf:
-        for line in inf.readlines():
-            if line.startswith('>'):
-                uniprot_ids = [i for i in line.rstrip().split() if i.startswith('>sp')]
-                uniprot_id = uniprot_ids[0].split('|')[1]
-                gene_names = [i for i in line.rstrip().split() if i.startswith('GN=')]
-                if len(gene_names) > 0:
-                    gene_name = gene_names[0].lstrip('GN=')
-                    uniprot_db_dict[uniprot_id] = gene_name
-                else:
-                    uniprot_db_dict[uniprot_id] = 'NO_UNIREF_GENE'
-    return uniprot_db_dict
+    elements = subject_id.split('|')
+    return elements[1] if len(elements) > 1 else subject_id
 
 
-def assign_genes_to_hits(hits_file, uniprot_db_dict, suffix):
+def read_named_hits(hits_file, uniprot_index):
+    ## Reads blast hits; yields (transcript, gene_name, bitscore) for hits to uniprot entries with a gene name
+
+    missing = set()
+    with open_input(hits_file) as inf:
+        for line in inf:
+            elements = line.split()
+            if len(elements) < 2:
+                continue
+            uniprot_id = get_hit_accession(elements[1])
+            gene_name = uniprot_index.get_gene(uniprot_id)
+            if gene_name is None:
+                missing.add(uniprot_id)
+            elif gene_name != NO_GENE:
+                yield elements[0], gene_name, float(elements[-1])
+    if missing:
+        sys.stderr.write('Warning! {} uniprot IDs were not found in the db, e.g: {}\n'.format(
+            len(missing), next(iter(missing))))
+
+
+def choose_gene(gene_hits, topk):
+    ## Chooses gene name of a transcript from its (gene_name, bitscore) hits: best-scoring hit (topk=1)
+    ## or gene with the highest sum of bit-scores over topk best hits; ties go to the gene of the better hit
+
+    top_hits = TopHits(topk)
+    for gene_name, bitscore in gene_hits:
+        top_hits.add(bitscore, gene_name)
+    best_genes = top_hits.best()
+
+    gene_scores = defaultdict(float)
+    for bitscore, _, gene_name in top_hits.heap:
+        gene_scores[gene_name] += bitscore
+    return max(best_genes, key=lambda gene_name: (gene_scores[gene_name], -best_genes.index(gene_name)))
+
+
+def assign_genes_to_hits(hits_file, uniprot_index, suffix):
     ## Reads blast hits and assigns gene names of corresponding uniprot IDs to transcripts
 
-    with open(hits_file, 'r') as inf:
-        for line in inf.readlines():
-            transcript = line.split()[0]
-            # old version of blastp output
-            #uniprot_id = line.split()[1].split('|')[1]
-            # new version of blastp output
-            uniprot_id = line.split()[1].split('|')[1]
-            if uniprot_db_dict[uniprot_id] != 'NO_UNIREF_GENE':
-                print('{},{}-{}_{}'.format(transcript, uniprot_db_dict[uniprot_id], suffix, transcript))
+    for transcript, gene_name, bitscore in read_named_hits(hits_file, uniprot_index):
+        print('{},{}-{}_{}'.format(transcript, gene_name, suffix, transcript))
+    return
+
+
+def assign_best_genes(hits_file, uniprot_index, suffix, topk):
+    ## Same as assign_genes_to_hits, but outputs one gene name per transcript (see choose_gene);
+    ## hits have to be grouped by transcript (as blast outputs them)
+
+    seen_transcripts = set()
+    for transcript, hits in groupby(read_named_hits(hits_file, uniprot_index), key=itemgetter(0)):
+        if transcript in seen_transcripts:
+            sys.exit('Error! Blast hits are not grouped by query: {} shows up again'.format(transcript))
+        seen_transcripts.add(transcript)
+
+        gene_name = choose_gene(((hit[1], hit[2]) for hit in hits), topk)
+        print('{},{}-{}_{}'.format(transcript, gene_name, suffix, transcript))
     return
 
 
@@ -49,15 +88,26 @@ def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
     parser.add_argument('-u', '--uniprotdb', type=str, help='file with uniprot/swissprot database')
+    parser.add_argument('-i', '--index', type=str,
+                        help='uniprot index (uniprot_index.py); default: UNIPROTDB.gn.sqlite, built/rebuilt if needed')
     parser.add_argument('-b', '--blasthits', type=str, help='file with blast hits in outfmt 6')
     parser.add_argument('-s', '--suffix', type=str, default='', help='suffix for gene names you can add, e.g: FGL1-like')
+    parser.add_argument('-k', '--topk', type=int, default=0,
+                        help='one gene name per transcript: of the best hit (=1) or the gene with the highest '
+                             'total bit-score among k best hits; default: one line per hit (=0)')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
-    ## Read uniprot/swissprot database into a dictionary {ID: gene_name}
-    uniprot_db_dict = read_uniprot_db(args.uniprotdb)
+    ## Open (build if missing or outdated) index of uniprot/swissprot database {ID: gene_name}
+    uniprot_index = UniprotIndex(args.uniprotdb, args.index)
 
     ## Make csv table of transcripts and corresponding gene names; stdout
-    assign_genes_to_hits(args.blasthits, uniprot_db_dict, args.suffix)
+    if args.topk > 0:
+        assign_best_genes(args.blasthits, uniprot_index, args.suffix, args.topk)
+    else:
+        assign_genes_to_hits(args.blasthits, uniprot_index, args.suffix)
+    uniprot_index.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+#
+
+"""
+Shared bed12 parsing for the annotation scripts.
+Each annotation line is split ONCE into a compact Bed12Record; blocks are kept as int arrays
+and the text line is only (re)built when a record was changed.
+
+bed12 format:
+chrom[0] start[1] end[2] name[3] score[4] strand[5] cds_start[6] cds_end[7] rgb[8] count[9]\
+ block_sizes[10] block_starts[11]
+"""
+
+from array import array
+from hashlib import blake2b
+from itertools import groupby
+from operator import attrgetter
+import sys
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+BED12_FIELDS = ('chrom', 'start', 'end', 'name', 'score', 'strand', 'cds_start', 'cds_end', 'rgb',
+                'block_count', 'block_sizes', 'block_starts')
+## bed12 'file' name of the in-process pipe between chained commands (annotation_tools.py)
+PIPE = '@'
+
+
+def parse_blocks(blocks_str):
+    ## Converts bed12 comma-separated block field '12,34,' into an int array
+
+    return array('l', map(int, blocks_str.rstrip(',').split(',')))
+
+
+def format_blocks(blocks):
+    ## Converts list/array of ints into bed12 comma-separated block field '12,34,'
+
+    return ','.join(map(str, blocks)) + ','
+
+
+class Bed12Record(object):
+    ## One bed12 transcript; score, strand and rgb are kept as text, coordinates as ints;
+    ## block_starts are relative to start (as in the file).
+    ## Records are treated as read-only: use replace() to get a changed copy
+
+    __slots__ = BED12_FIELDS + ('_line',)
+
+    def __init__(self, chrom, start, end, name, score, strand, cds_start, cds_end, rgb,
+                 block_count, block_sizes, block_starts, line=None):
+        self.chrom = chrom
+        self.start = start
+        self.end = end
+        self.name = name
+        self.score = score
+        self.strand = strand
+        self.cds_start = cds_start
+        self.cds_end = cds_end
+        self.rgb = rgb
+        self.block_count = block_count
+        self.block_sizes = block_sizes
+        self.block_starts = block_starts
+        self._line = line
+
+    @classmethod
+    def from_fields(cls, fields, line=None):
+        ## Makes a record from an already split bed12 line (first 12 fields are used)
+
+        return cls(fields[0], int(fields[1]), int(fields[2]), fields[3], fields[4], fields[5],
+                   int(fields[6]), int(fields[7]), fields[8], int(fields[9]),
+                   parse_blocks(fields[10]), parse_blocks(fields[11]), line)
+
+    @classmethod
+    def from_line(cls, line):
+        ## Makes a record from a bed12 text line; the line itself is kept to output the record unchanged
+
+        line = line.rstrip()
+        return cls.from_fields(line.split('\t') if '\t' in line else line.split(), line)
+
+    def replace(self, **changes):
+        ## Returns a copy of the record with given fields changed, e.g: rec.replace(name='ABC1_t1')
+
+        values = {field: getattr(self, field) for field in BED12_FIELDS}
+        values.update(changes)
+        for field in ('block_sizes', 'block_starts'):
+            if not isinstance(values[field], array):
+                values[field] = array('l', values[field])
+        return Bed12Record(**values)
+
+    def fields(self):
+        ## Returns list of 12 text fields
+
+        return [self.chrom, str(self.start), str(self.end), self.name, self.score, self.strand,
+                str(self.cds_start), str(self.cds_end), self.rgb, str(self.block_count),
+                format_blocks(self.block_sizes), format_blocks(self.block_starts)]
+
+    def to_line(self):
+        ## Returns bed12 line (without newline); formats it only if the record was changed
+
+        if self._line is None:
+            self._line = '\t'.join(self.fields())
+        return self._line
+
+    def __str__(self):
+        return self.to_line()
+
+    def __repr__(self):
+        return 'Bed12Record({})'.format(self.to_line().replace('\t', ' '))
+
+    def abs_block_starts(self):
+        ## Returns list of block starts in chromosome coordinates
+
+        start = self.start
+        return [start + i for i in self.block_starts]
+
+    def exon_coords(self):
+        ## Returns list of exon intervals in chromosome coordinates: [(x1, x2), (x3, x4), ..]
+
+        start = self.start
+        return [(start + s, start + s + l) for s, l in zip(self.block_starts, self.block_sizes)]
+
+    def intron_coords(self):
+        ## Returns list of intron intervals: [(chrom, x1, x2), (chrom, x3, x4), ..]
+
+        chrom = self.chrom
+        start = self.start
+        starts = self.block_starts
+        sizes = self.block_sizes
+        return [(chrom, start + starts[i] + sizes[i], start + starts[i + 1]) for i in range(self.block_count - 1)]
+
+    def structure(self, score=False, color=False):
+        ## Returns hashable transcript structure: everything but name (score and color only if requested)
+
+        key = (self.chrom, self.start, self.end, self.strand, self.cds_start, self.cds_end, self.block_count,
+               self.block_sizes.tobytes(), self.block_starts.tobytes())
+        if score:
+            key += (self.score,)
+        if color:
+            key += (self.rgb,)
+        return key
+
+    def structure_digest(self, score=False, color=False):
+        ## Returns the same transcript structure as structure(), but as a fixed-width 16-byte fingerprint
+
+        digest = blake2b(digest_size=16)
+        digest.update('{}\t{}\t{}\t{}\t{}\t{}\t{}\t'.format(self.chrom, self.start, self.end, self.strand, self.cds_start,
+                                                           self.cds_end, self.block_count).encode())
+        digest.update(self.block_sizes.tobytes())
+        digest.update(self.block_starts.tobytes())
+        if score:
+            digest.update('\ts:{}'.format(self.score).encode())
+        if color:
+            digest.update('\tc:{}'.format(self.rgb).encode())
+        return digest.digest()
+
+    def spliced_length(self):
+        ## Returns sum of all block (exon) sizes
+
+        return sum(self.block_sizes)
+
+
+def is_data_line(line):
+    ## Checks if it's an annotation line and not an empty/comment/track line
+
+    return line.strip() != '' and not line.startswith(('#', 'track', 'browser'))
+
+
+def iter_bed12(lines):
+    ## Parses iterable of bed12 lines into records
+
+    for line in lines:
+        if is_data_line(line):
+            yield Bed12Record.from_line(line)
+
+
+class RecordPipe(object):
+    ## Records passed between commands chained in one process (annotation_tools.py):
+    ## output collects records written by write_bed12() of a command; input is what read_bed12(PIPE) yields to the next
+
+    def __init__(self):
+        self.input = None
+        self.output = None
+
+
+record_pipe = RecordPipe()
+
+
+def read_bed12(file):
+    ## Reads bed12 file record by record; file PIPE ('@') takes the records of the previous chained command;
+    ## file can also be a binary store of the bed (bed12_store.py)
+
+    if file == PIPE:
+        if record_pipe.input is None:
+            sys.exit('Error! No records piped in: {} is the input of a chained command only '
+                     '(annotation_tools.py CMD1 .. :: CMD2 -a {} ..)'.format(PIPE, PIPE))
+        for record in record_pipe.input:
+            yield record
+        return
+
+    from bed12_store import is_bed12_store, read_store
+    if is_bed12_store(file):
+        for record in read_store(file):
+            yield record
+        return
+
+    with open_input(file) as inf:
+        for record in iter_bed12(inf):
+            yield record
+
+
+def write_bed12(record):
+    ## Outputs bed12 record (or line): printed to stdout, or passed on as an object if the next chained command reads it
+
+    if record_pipe.output is None:
+        print(record if isinstance(record, str) else record.to_line())
+    else:
+        record_pipe.output.append(Bed12Record.from_line(record) if isinstance(record, str) else record)
+
+
+def group_by_chrom(records):
+    ## Groups records of a file sorted by chromosome (LC_ALL=C sort -k1,1 -k2,2n): yields (chrom, records_iterator);
+    ## aborts if chromosomes are not in sorted order, so two files can be swept together
+
+    prev_chrom = None
+    for chrom, chrom_records in groupby(records, key=attrgetter('chrom')):
+        if (prev_chrom is not None) and (chrom <= prev_chrom):
+            sys.exit('Error! Input is not sorted by chromosome: {} comes after {}. '
+                     'Sort it with: LC_ALL=C sort -k1,1 -k2,2n'.format(chrom, prev_chrom))
+        prev_chrom = chrom
+        yield chrom, chrom_records
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+#
+
+"""
+Columnar (ragged-array) representation of a whole bed12 annotation with vectorized block kernels.
+One row per transcript: dictionary-encoded chrom, int coordinates, strand codes; blocks of all transcripts
+are two flat arrays (starts in chromosome coordinates, sizes) and blocks of row i are [offsets[i]:offsets[i + 1]].
+Exons/introns, CDS/UTR clipping, spliced lengths and first/last blocks are computed for all transcripts at once.
+Ragged block sets are returned as (offsets, starts, sizes).
+"""
+
+from array import array
+import sys
+import numpy as np
+from bed12 import BED12_FIELDS, PIPE, Bed12Record, format_blocks, is_data_line, read_bed12
+from bed12_store import Bed12Store, is_bed12_store
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+STRAND_CODES = {'+': 1, '-': -1}
+STRAND_CHARS = {1: '+', -1: '-', 0: '.'}
+
+
+def parse_int_lists(fields):
+    ## Parses bed12 comma-separated block fields ['12,34,', '5,'] into one flat int64 array
+
+    text = ','.join(field.rstrip(',') for field in fields)
+    return np.fromstring(text, dtype=np.int64, sep=',') if text else np.zeros(0, dtype=np.int64)
+
+
+def get_offsets(counts):
+    ## Offsets of ragged rows from their lengths: [0, c0, c0 + c1, ..]
+
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def get_block_rows(offsets):
+    ## Row number of every block of a ragged block set
+
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def clip_blocks(offsets, starts, sizes, lows, highs):
+    ## Clips blocks of every row i to [lows[i], highs[i]); blocks outside are dropped; returns (offsets, starts, sizes)
+
+    rows = get_block_rows(offsets)
+    row_lows, row_highs = lows[rows], highs[rows]
+    ends = starts + sizes
+    new_starts = np.maximum(starts, row_lows)
+    new_ends = np.minimum(ends, row_highs)
+    # (zero-size blocks inside the interval are kept, like left_CDS_only.py does)
+    keep = (ends > row_lows) & (starts < row_highs)
+    counts = np.bincount(rows[keep], minlength=len(offsets) - 1)
+    return get_offsets(counts), new_starts[keep], (new_ends - new_starts)[keep]
+
+
+def block_lengths(offsets, sizes):
+    ## Sum of block sizes of every row
+
+    return np.bincount(get_block_rows(offsets), weights=sizes, minlength=len(offsets) - 1).astype(np.int64)
+
+
+def terminal_blocks(offsets, starts, sizes):
+    ## First and last block of every row: (first_starts, first_ends, last_starts, last_ends); -1 for rows without blocks
+
+    counts = np.diff(offsets)
+    has_blocks = counts > 0
+    first = np.where(has_blocks, offsets[:-1], 0)
+    last = np.where(has_blocks, offsets[1:] - 1, 0)
+    ends = starts + sizes
+    return tuple(np.where(has_blocks, column[index], -1) if len(column) else np.full(len(counts), -1)
+                 for column, index in ((starts, first), (ends, first), (starts, last), (ends, last)))
+
+
+class BlockTable(object):
+    ## Whole bed12 annotation as columns; text columns (name, score, rgb) are lists, chroms are codes into chroms
+
+    def __init__(self, chroms, chrom_codes, starts, ends, names, scores, strand_codes, cds_starts, cds_ends, rgbs,
+                 offsets, block_starts, block_sizes, lines=None):
+        self.chroms = chroms
+        self.chrom_codes = chrom_codes
+        self.starts = starts
+        self.ends = ends
+        self.names = names
+        self.scores = scores
+        self.strand_codes = strand_codes
+        self.cds_starts = cds_starts
+        self.cds_ends = cds_ends
+        self.rgbs = rgbs
+        self.offsets = offsets
+        self.block_starts = block_starts
+        self.block_sizes = block_sizes
+        self.lines = lines
+
+    def __len__(self):
+        return len(self.starts)
+
+    @classmethod
+    def from_lines(cls, lines, keep_lines=True):
+        ## Parses bed12 lines column-wise: every line is split once, block fields are parsed by numpy in one go;
+        ## extra columns are ignored; keep_lines keeps the text lines to output rows unchanged
+
+        columns = [[] for i in range(12)]
+        kept_lines = [] if keep_lines else None
+        for line in lines:
+            if not is_data_line(line):
+                continue
+            line = line.rstrip()
+            fields = line.split('\t') if '\t' in line else line.split()
+            if len(fields) < 12:
+                sys.exit('Error! Bed12 file is required! Got a line with {} fields: {}'.format(len(fields), line))
+            for column, field in zip(columns, fields):
+                column.append(field)
+            if keep_lines:
+                kept_lines.append(line)
+
+        chroms, chrom_codes = [], []
+        chrom_dict = {}
+        for chrom in columns[0]:
+            code = chrom_dict.get(chrom)
+            if code is None:
+                code = chrom_dict[chrom] = len(chroms)
+                chroms.append(chrom)
+            chrom_codes.append(code)
+
+        starts = np.array(columns[1], dtype=np.int64)
+        counts = np.array(columns[9], dtype=np.int64)
+        offsets = get_offsets(counts)
+        block_sizes = parse_int_lists(columns[10])
+        block_starts = parse_int_lists(columns[11])
+        if not (len(block_sizes) == len(block_starts) == offsets[-1]):
+            sys.exit('Error! Number of blocks does not match blockCount in the bed12 input')
+        block_starts += np.repeat(starts, counts)
+
+        return cls(chroms, np.array(chrom_codes, dtype=np.int32), starts, np.array(columns[2], dtype=np.int64),
+                   columns[3], columns[4], np.array([STRAND_CODES.get(s, 0) for s in columns[5]], dtype=np.int8),
+                   np.array(columns[6], dtype=np.int64), np.array(columns[7], dtype=np.int64), columns[8],
+                   offsets, block_starts, block_sizes, kept_lines)
+
+    @classmethod
+    def from_records(cls, records):
+        ## Makes table of Bed12Records (e.g. piped in from a chained command)
+
+        return cls.from_lines((record.to_line() for record in records))
+
+    def record(self, i):
+        ## Bed12Record of row i
+
+        first, last = self.offsets[i], self.offsets[i + 1]
+        start = int(self.starts[i])
+        return Bed12Record(self.chroms[self.chrom_codes[i]], start, int(self.ends[i]), self.names[i], self.scores[i],
+                           STRAND_CHARS[int(self.strand_codes[i])], int(self.cds_starts[i]), int(self.cds_ends[i]),
+                           self.rgbs[i], int(last - first), array('l', self.block_sizes[first: last].tolist()),
+                           array('l', (self.block_starts[first: last] - start).tolist()),
+                           self.lines[i] if self.lines is not None else None)
+
+    def line(self, i):
+        ## bed12 line of row i
+
+        return self.lines[i] if self.lines is not None else self.record(i).to_line()
+
+    def get_lines(self):
+        ## bed12 lines of all rows: the text lines if they were kept, otherwise formatted from the columns
+
+        if self.lines is None:
+            counts = np.diff(self.offsets)
+            offsets = self.offsets.tolist()
+            block_sizes = self.block_sizes.tolist()
+            block_starts = (self.block_starts - np.repeat(self.starts, counts)).tolist()
+            columns = zip(self.column('chrom'), self.starts.tolist(), self.ends.tolist(), self.names, self.scores,
+                          self.column('strand'), self.cds_starts.tolist(), self.cds_ends.tolist(), self.rgbs,
+                          counts.tolist())
+            self.lines = ['\t'.join(map(str, values)) + '\t' + format_blocks(block_sizes[offsets[i]: offsets[i + 1]]) +
+                          '\t' + format_blocks(block_starts[offsets[i]: offsets[i + 1]])
+                          for i, values in enumerate(columns)]
+        return self.lines
+
+    def column(self, field):
+        ## Values of a one-value bed12 field (BED12_FIELDS) for all rows as a list
+
+        if field == 'chrom':
+            return [self.chroms[code] for code in self.chrom_codes.tolist()]
+        if field == 'strand':
+            return [STRAND_CHARS[code] for code in self.strand_codes.tolist()]
+        if field == 'block_count':
+            return np.diff(self.offsets).tolist()
+        values = {'start': self.starts, 'end': self.ends, 'name': self.names, 'score': self.scores,
+                  'cds_start': self.cds_starts, 'cds_end': self.cds_ends, 'rgb': self.rgbs}.get(field)
+        if values is None:
+            sys.exit('Error! {} is not a one-value bed12 field; fields: {}'.format(field, ', '.join(BED12_FIELDS)))
+        return values if isinstance(values, list) else values.tolist()
+
+    def block_rows(self):
+        ## Row number of every block
+
+        return get_block_rows(self.offsets)
+
+    def exons(self):
+        ## All exons: (offsets, starts, sizes)
+
+        return self.offsets, self.block_starts, self.block_sizes
+
+    def introns(self):
+        ## All introns (gaps between consecutive blocks of a row): (offsets, starts, sizes)
+
+        counts = np.diff(self.offsets)
+        not_last = np.ones(len(self.block_starts), dtype=bool)
+        not_last[self.offsets[1:][counts > 0] - 1] = False
+        index = np.flatnonzero(not_last)
+        intron_starts = self.block_starts[index] + self.block_sizes[index]
+        return get_offsets(np.maximum(counts - 1, 0)), intron_starts, self.block_starts[index + 1] - intron_starts
+
+    def spliced_lengths(self):
+        ## Sum of exon sizes of every transcript
+
+        return block_lengths(self.offsets, self.block_sizes)
+
+    def cds(self):
+        ## Exons clipped to [cds_start, cds_end): (offsets, starts, sizes); non-coding transcripts get no blocks
+
+        return clip_blocks(self.offsets, self.block_starts, self.block_sizes, self.cds_starts, self.cds_ends)
+
+    def utrs(self):
+        ## 5'- and 3'-UTR blocks by strand (+ and unknown strand as +): ((offsets, starts, sizes), (..))
+
+        minus = self.strand_codes == -1
+        utr5 = clip_blocks(self.offsets, self.block_starts, self.block_sizes, np.where(minus, self.cds_ends, self.starts),
+                           np.where(minus, self.ends, self.cds_starts))
+        utr3 = clip_blocks(self.offsets, self.block_starts, self.block_sizes, np.where(minus, self.starts, self.cds_ends),
+                           np.where(minus, self.cds_starts, self.ends))
+        return utr5, utr3
+
+    def terminal_exons(self):
+        ## First and last exon of every transcript (in chromosome order): (first_starts, first_ends, last_starts, last_ends)
+
+        return terminal_blocks(self.offsets, self.block_starts, self.block_sizes)
+
+
+def read_block_table(file, keep_lines=True):
+    ## Reads bed12 file (or records piped in from a chained command, or a bed12_store.py store) into a BlockTable
+
+    if file == PIPE:
+        return BlockTable.from_records(read_bed12(PIPE))
+    if is_bed12_store(file):
+        return Bed12Store(file).block_table()
+    with open_input(file) as inf:
+        return BlockTable.from_lines(inf, keep_lines)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+#
+
+"""
+Exact-structure dedup of bed12 transcripts: every transcript is reduced to a 16-byte fingerprint of
+its coordinates and blocks (name, and optionally score/color, are ignored).
+One compact entry is kept per unique structure: the first record seen plus the number of files it was found in.
+"""
+
+from bed12 import read_bed12
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+class StructureTable(object):
+    ## Unique transcript structures: {fingerprint: [first_record, n_files, last_file]}; keeps the order they were first seen
+
+    __slots__ = ('score', 'color', 'structures')
+
+    def __init__(self, score=False, color=False):
+        self.score = score
+        self.color = color
+        self.structures = {}
+
+    def __len__(self):
+        return len(self.structures)
+
+    def add(self, record, file_id=0):
+        ## Adds transcript found in file file_id; returns False if this structure was already seen
+
+        fingerprint = record.structure_digest(score=self.score, color=self.color)
+        entry = self.structures.get(fingerprint)
+        if entry is None:
+            self.structures[fingerprint] = [record, 1, file_id]
+            return True
+        if entry[2] != file_id:
+            entry[1] += 1
+            entry[2] = file_id
+        return False
+
+    def add_file(self, bed_file, file_id=0, on_duplicate=None):
+        ## Adds all transcripts of a bed12 file; calls on_duplicate(record) for already seen structures
+
+        for record in read_bed12(bed_file):
+            if (not self.add(record, file_id)) and (on_duplicate is not None):
+                on_duplicate(record)
+
+    def records(self, min_files=1):
+        ## Yields (fingerprint, first seen record) of every structure present in at least min_files files
+
+        for fingerprint, (record, n_files, last_file) in self.structures.items():
+            if n_files >= min_files:
+                yield fingerprint, record
+
+    def lines(self, min_files=1):
+        ## Yields first seen bed12 line of every structure present in at least min_files files
+
+        for fingerprint, record in self.records(min_files):
+            yield record.to_line()
+
+
+def count_structures(bed_files, score=False, color=False):
+    ## Reads any number of bed12 files in one pass; returns StructureTable with N-way presence counts
+
+    table = StructureTable(score=score, color=color)
+    for file_id, bed_file in enumerate(bed_files):
+        table.add_file(bed_file, file_id)
+    return table
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script builds a binary interval index of a bed12 annotation (e.g. TOGA query_annotation.bed),
+which overlap-based scripts (filter_anno_by_ref_anno.py) can take instead of the bed itself.
+The index is memory-mapped, so loading it costs nothing no matter how big the annotation is.
+
+Index layout: magic, json header {chrom: [first_row, n_rows]}, then per-row int64 arrays sorted by (chrom, start):
+starts, ends, running max of ends (within chrom), offsets of bed12 lines in the text block; then the text block.
+
+e.g usage:
+bed12_index.py -b query_annotation.bed -o query_annotation.bed.idx
+bed12_index.py -i query_annotation.bed.idx -r chr1:100000-200000
+"""
+
+import argparse
+from bisect import bisect_left, bisect_right
+import json
+import mmap
+import os
+import struct
+import sys
+from bed12 import Bed12Record, read_bed12
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+MAGIC = b'BED12IDX'
+VERSION = 1
+HEADER_FORMAT = '<II'
+
+
+def is_index_file(file):
+    ## Checks if file is a bed12 index (and not a text bed); only regular files are read, so a pipe is not drained
+
+    if not os.path.isfile(file):
+        return False
+    try:
+        with open(file, 'rb') as inf:
+            return inf.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def build_index(bed_file, index_file):
+    ## Reads bed12 file, sorts it by chrom and start and writes it as an index file
+
+    rows = sorted((rec.chrom, rec.start, rec.end, rec.to_line().encode()) for rec in read_bed12(bed_file))
+
+    chroms = {}
+    starts, ends, max_ends, offsets = [], [], [], [0]
+    for i, (chrom, start, end, line) in enumerate(rows):
+        if chrom not in chroms:
+            chroms[chrom] = [i, 0]
+            max_end = end
+        chroms[chrom][1] += 1
+        max_end = max(max_end, end)
+        starts.append(start)
+        ends.append(end)
+        max_ends.append(max_end)
+        offsets.append(offsets[-1] + len(line) + 1)
+
+    header = json.dumps({'byteorder': sys.byteorder, 'n_rows': len(rows), 'chroms': chroms}).encode()
+    # keep int64 arrays 8-byte aligned
+    header += b' ' * (-(len(MAGIC) + struct.calcsize(HEADER_FORMAT) + len(header)) % 8)
+
+    with open(index_file, 'wb') as outf:
+        outf.write(MAGIC)
+        outf.write(struct.pack(HEADER_FORMAT, VERSION, len(header)))
+        outf.write(header)
+        for column in (starts, ends, max_ends, offsets):
+            outf.write(struct.pack('{}q'.format(len(column)), *column))
+        for row in rows:
+            outf.write(row[3] + b'\n')
+    return len(rows)
+
+
+class BedIndex(object):
+    ## Memory-mapped bed12 index: query(chrom, start, end) returns overlapping transcripts as Bed12Records
+
+    def __init__(self, index_file):
+        self.file = open(index_file, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            sys.exit('Error! {} is not a bed12 index file'.format(index_file))
+
+        pos = len(MAGIC)
+        version, header_len = struct.unpack_from(HEADER_FORMAT, self.mm, pos)
+        pos += struct.calcsize(HEADER_FORMAT)
+        header = json.loads(self.mm[pos: pos + header_len].decode())
+        pos += header_len
+        if (version != VERSION) or (header['byteorder'] != sys.byteorder):
+            sys.exit('Error! Index {} was built by another version/platform; rebuild it'.format(index_file))
+
+        n_rows = header['n_rows']
+        self.chroms = {chrom: tuple(rows) for chrom, rows in header['chroms'].items()}
+        view = memoryview(self.mm)
+        columns = []
+        for length in (n_rows, n_rows, n_rows, n_rows + 1):
+            columns.append(view[pos: pos + 8 * length].cast('q'))
+            pos += 8 * length
+        self.starts, self.ends, self.max_ends, self.offsets = columns
+        self.text_start = pos
+
+    def __len__(self):
+        return len(self.starts)
+
+    def get_record(self, row):
+        ## Parses one row of the index into a Bed12Record
+
+        line_start = self.text_start + self.offsets[row]
+        line_end = self.text_start + self.offsets[row + 1] - 1
+        return Bed12Record.from_line(self.mm[line_start: line_end].decode())
+
+    def query_rows(self, chrom, start, end):
+        ## Returns row numbers of transcripts overlapping [start, end) on chrom
+
+        if chrom not in self.chroms:
+            return []
+        first, n_rows = self.chroms[chrom]
+        # rows starting before the end of the region ..
+        last = bisect_left(self.starts, end, first, first + n_rows)
+        # .. minus rows that end (together with all rows before) before the start of the region
+        first = bisect_right(self.max_ends, start, first, last)
+        return [row for row in range(first, last) if self.ends[row] > start]
+
+    def query(self, chrom, start, end):
+        ## Returns transcripts overlapping [start, end) on chrom
+
+        return [self.get_record(row) for row in self.query_rows(chrom, start, end)]
+
+    def records(self):
+        ## Yields all transcripts of the index sorted by chrom and start
+
+        for row in range(len(self)):
+            yield self.get_record(row)
+
+    def close(self):
+        for column in (self.starts, self.ends, self.max_ends, self.offsets):
+            column.release()
+        self.mm.close()
+        self.file.close()
+
+
+def parse_region(region):
+    ## Parses region string chr:start-end into (chrom, start, end)
+
+    chrom, coords = region.rsplit(':', 1)
+    start, end = coords.replace(',', '').split('-')
+    return chrom, int(start), int(end)
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--bed', type=str, help='bed12 annotation to build the index from')
+    parser.add_argument('-o', '--out', type=str, help='index file to write; default: BED.idx')
+    parser.add_argument('-i', '--index', type=str, help='index file to query')
+    parser.add_argument('-r', '--region', type=str, help='region to query: chrom:start-end; outputs overlapping bed12')
+    args = parser.parse_args()
+
+    ## Build index
+    if args.bed:
+        index_file = args.out if args.out else args.bed + '.idx'
+        n_rows = build_index(args.bed, index_file)
+        sys.stderr.write('Indexed {} transcripts in {}\n'.format(n_rows, index_file))
+
+    ## Query index
+    elif args.index and args.region:
+        bed_index = BedIndex(args.index)
+        for rec in bed_index.query(*parse_region(args.region)):
+            print(rec.to_line())
+        bed_index.close()
+
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+
+"""
+In-process replacement of 'bedtools intersect -split -wo -f FRACTION' for bed12 records:
+finds pairs of transcripts sharing exon (block) bases by sweeping chromosome-sorted starts.
+"""
+
+from collections import defaultdict
+from operator import attrgetter
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+def get_blocks_overlap(a_blocks, b_blocks):
+    ## Counts bases shared by two sorted lists of intervals; walks both lists at once like a merge
+
+    overlap = 0
+    i, j = 0, 0
+    while (i < len(a_blocks)) and (j < len(b_blocks)):
+        a_start, a_end = a_blocks[i]
+        b_start, b_end = b_blocks[j]
+        if min(a_end, b_end) > max(a_start, b_start):
+            overlap += min(a_end, b_end) - max(a_start, b_start)
+        # move on with the interval that ends first
+        if a_end < b_end:
+            i += 1
+        else:
+            j += 1
+    return overlap
+
+
+def group_records_by_chrom(records):
+    ## Makes a dictionary of records sorted by start: {chrom: [rec1, rec2, ..]}
+
+    records_by_chrom = defaultdict(list)
+    for rec in records:
+        records_by_chrom[rec.chrom].append(rec)
+    for chrom in records_by_chrom:
+        records_by_chrom[chrom].sort(key=attrgetter('start'))
+    return records_by_chrom
+
+
+def intersect_chrom(a_records, b_records, fraction):
+    ## Sweeps two start-sorted lists of records of one chromosome; yields (a, b, overlap) pairs that share
+    ## at least fraction of a's exon bases (like bedtools -split -f)
+
+    active = []
+    j = 0
+    for a in a_records:
+        # b transcripts that start before a ends become candidates; drop the ones ending before a starts
+        while (j < len(b_records)) and (b_records[j].start < a.end):
+            active.append(b_records[j])
+            j += 1
+        active = [b for b in active if b.end > a.start]
+
+        a_blocks = a.exon_coords()
+        min_overlap = fraction * a.spliced_length()
+        for b in active:
+            if b.start >= a.end:
+                continue
+            overlap = get_blocks_overlap(a_blocks, b.exon_coords())
+            if (overlap > 0) and (overlap >= min_overlap):
+                yield a, b, overlap
+
+
+def intersect_bed12(a_records, b_records, fraction):
+    ## Yields all (a, b, overlap) pairs of overlapping transcripts of two bed12 record collections; strand is ignored
+
+    a_by_chrom = group_records_by_chrom(a_records)
+    b_by_chrom = group_records_by_chrom(b_records)
+    for chrom in a_by_chrom:
+        if chrom in b_by_chrom:
+            for pair in intersect_chrom(a_by_chrom[chrom], b_by_chrom[chrom], fraction):
+                yield pair
+
+
+def intersect_index(a_index, b_records, fraction):
+    ## Same as intersect_bed12, but a transcripts are looked up in a bed12 index (bed12_index.BedIndex)
+    ## for every b transcript, so the a annotation is never read as a whole
+
+    for b in b_records:
+        b_blocks = b.exon_coords()
+        for a in a_index.query(b.chrom, b.start, b.end):
+            overlap = get_blocks_overlap(a.exon_coords(), b_blocks)
+            if (overlap > 0) and (overlap >= fraction * a.spliced_length()):
+                yield a, b, overlap
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script converts a bed12 annotation into a compact binary columnar store that the bed12 readers
+(bed12.read_bed12, bed12_blocks.read_block_table) take instead of the text: nothing is split or parsed on load.
+The store is memory-mapped: opening it costs the same for any size and concurrent processes reading
+the same store share its pages.
+
+Store layout: magic, json header {n_rows, n_blocks, columns: {name: [typecode, offset, length]}}, then 8-byte aligned
+columns: int32 coordinates (start, end, cds_start, cds_end), dictionary-encoded chrom/score/strand/rgb
+(int32 codes into a string table of values), name string table (int64 offsets into utf-8 text),
+ragged blocks: int64 block offsets of rows, int32 block sizes and starts (relative to start, as in bed12).
+
+e.g usage:
+bed12_store.py -b query_annotation.bed -o query_annotation.bed.col
+filter_anno_by_ref_anno.py -r ref.bed.col -a query_annotation.bed.col
+"""
+
+import argparse
+from array import array
+import json
+import mmap
+import os
+import struct
+import sys
+from bed12 import Bed12Record, read_bed12
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+MAGIC = b'BED12COL'
+VERSION = 1
+HEADER_FORMAT = '<II'
+## text fields kept as codes into a table of their distinct values
+DICT_FIELDS = ('chrom', 'score', 'strand', 'rgb')
+INT_FIELDS = ('start', 'end', 'cds_start', 'cds_end')
+
+
+def is_bed12_store(file):
+    ## Checks if file is a bed12 store (and not a text bed); only regular files are read, so a pipe is not drained
+
+    if (file is None) or not os.path.isfile(file):
+        return False
+    try:
+        with open(file, 'rb') as inf:
+            return inf.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+class StringTableBuilder(object):
+    ## Collects strings into utf-8 text and int64 offsets; with codes=True equal strings are stored once
+    ## and codes keeps the string number of every row
+
+    def __init__(self, codes=False):
+        self.offsets = array('q', [0])
+        self.text = bytearray()
+        self.index = {} if codes else None
+        self.codes = array('i')
+
+    def add(self, value):
+        if self.index is not None:
+            code = self.index.get(value)
+            if code is not None:
+                self.codes.append(code)
+                return
+            code = self.index[value] = len(self.offsets) - 1
+            self.codes.append(code)
+        self.text += value.encode()
+        self.offsets.append(len(self.text))
+
+
+def write_store(records, store_file):
+    ## Writes bed12 records into a store file column by column; returns number of records
+
+    ints = {field: array('i') for field in INT_FIELDS}
+    dicts = {field: StringTableBuilder(codes=True) for field in DICT_FIELDS}
+    names = StringTableBuilder()
+    block_offsets = array('q', [0])
+    block_sizes, block_starts = array('i'), array('i')
+    for rec in records:
+        try:
+            for field in INT_FIELDS:
+                ints[field].append(getattr(rec, field))
+            block_sizes.fromlist(rec.block_sizes.tolist())
+            block_starts.fromlist(rec.block_starts.tolist())
+        except OverflowError:
+            sys.exit('Error! Coordinates of {} do not fit into int32; the store can not keep them'.format(rec.name))
+        for field in DICT_FIELDS:
+            dicts[field].add(getattr(rec, field))
+        names.add(rec.name)
+        block_offsets.append(len(block_sizes))
+
+    columns = [(field + 's', ints[field]) for field in INT_FIELDS]
+    for field in DICT_FIELDS:
+        columns += [(field + '_codes', dicts[field].codes), (field + '_values_offsets', dicts[field].offsets),
+                    (field + '_values_text', dicts[field].text)]
+    columns += [('name_offsets', names.offsets), ('name_text', names.text), ('block_offsets', block_offsets),
+                ('block_sizes', block_sizes), ('block_starts', block_starts)]
+
+    layout = {}
+    offset = 0
+    for name, column in columns:
+        typecode = column.typecode if isinstance(column, array) else 'B'
+        layout[name] = [typecode, offset, len(column)]
+        offset += len(column) * struct.calcsize(typecode)
+        offset += -offset % 8
+    n_rows = len(block_offsets) - 1
+    header = json.dumps({'byteorder': sys.byteorder, 'n_rows': n_rows, 'n_blocks': len(block_sizes),
+                         'columns': layout}).encode()
+    # keep columns 8-byte aligned
+    header += b' ' * (-(len(MAGIC) + struct.calcsize(HEADER_FORMAT) + len(header)) % 8)
+
+    with open(store_file, 'wb') as outf:
+        outf.write(MAGIC)
+        outf.write(struct.pack(HEADER_FORMAT, VERSION, len(header)))
+        outf.write(header)
+        for name, column in columns:
+            data = column.tobytes() if isinstance(column, array) else bytes(column)
+            outf.write(data + b'\0' * (-len(data) % 8))
+    return n_rows
+
+
+def convert_bed12(bed_file, store_file):
+    ## Converts bed12 file into a store file; returns number of records
+
+    return write_store(read_bed12(bed_file), store_file)
+
+
+class StringTable(object):
+    ## Strings of a memory-mapped store column: utf-8 text and offsets of its strings
+
+    def __init__(self, mm, text_pos, offsets):
+        self.mm = mm
+        self.text_pos = text_pos
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.mm[self.text_pos + self.offsets[i]: self.text_pos + self.offsets[i + 1]].decode()
+
+    def tolist(self):
+        ## All strings at once
+
+        offsets = self.offsets.tolist()
+        text = self.mm[self.text_pos: self.text_pos + offsets[-1]]
+        return [text[offsets[i]: offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+
+
+class Bed12Store(object):
+    ## Memory-mapped bed12 store: columns are views of the file, records are made on demand
+
+    def __init__(self, store_file):
+        self.file = open(store_file, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            sys.exit('Error! {} is not a bed12 store file'.format(store_file))
+
+        pos = len(MAGIC)
+        version, header_len = struct.unpack_from(HEADER_FORMAT, self.mm, pos)
+        pos += struct.calcsize(HEADER_FORMAT)
+        header = json.loads(self.mm[pos: pos + header_len].decode())
+        pos += header_len
+        if (version != VERSION) or (header['byteorder'] != sys.byteorder):
+            sys.exit('Error! Store {} was written by another version/platform; convert the bed again'.format(store_file))
+
+        self.n_rows = header['n_rows']
+        self.n_blocks = header['n_blocks']
+        view = memoryview(self.mm)
+        self.columns = {}
+        for name, (typecode, offset, length) in header['columns'].items():
+            start = pos + offset
+            if typecode == 'B':
+                # text of a string table: read through the map by its position
+                self.columns[name] = start
+            else:
+                self.columns[name] = view[start: start + length * struct.calcsize(typecode)].cast(typecode)
+        self.names = self.string_table('name')
+        self.values = {field: self.string_table(field + '_values') for field in DICT_FIELDS}
+
+    def string_table(self, name):
+        return StringTable(self.mm, self.columns[name + '_text'], self.columns[name + '_offsets'])
+
+    def __len__(self):
+        return self.n_rows
+
+    def record(self, i):
+        ## Bed12Record of row i
+
+        columns = self.columns
+        first, last = self.block_offsets[i], self.block_offsets[i + 1]
+        chrom, score, strand, rgb = (self.values[field][columns[field + '_codes'][i]] for field in DICT_FIELDS)
+        return Bed12Record(chrom, columns['starts'][i], columns['ends'][i], self.names[i], score, strand,
+                           columns['cds_starts'][i], columns['cds_ends'][i], rgb, last - first,
+                           array('l', columns['block_sizes'][first: last]),
+                           array('l', columns['block_starts'][first: last]))
+
+    @property
+    def block_offsets(self):
+        return self.columns['block_offsets']
+
+    def records(self):
+        ## Yields all records in the order of the bed; columns are converted to python values in one go
+
+        columns = self.columns
+        values = {field: self.values[field].tolist() for field in DICT_FIELDS}
+        chroms, scores, strands, rgbs = ([values[field][code] for code in columns[field + '_codes'].tolist()]
+                                         for field in DICT_FIELDS)
+        starts, ends, cds_starts, cds_ends = (columns[field + 's'].tolist() for field in INT_FIELDS)
+        names = self.names.tolist()
+        offsets = self.block_offsets.tolist()
+        block_sizes, block_starts = columns['block_sizes'].tolist(), columns['block_starts'].tolist()
+        for i in range(self.n_rows):
+            first, last = offsets[i], offsets[i + 1]
+            yield Bed12Record(chroms[i], starts[i], ends[i], names[i], scores[i], strands[i], cds_starts[i],
+                              cds_ends[i], rgbs[i], last - first, array('l', block_sizes[first: last]),
+                              array('l', block_starts[first: last]))
+
+    def lines(self):
+        ## Yields bed12 lines of all records
+
+        for record in self.records():
+            yield record.to_line()
+
+    def block_table(self):
+        ## BlockTable (bed12_blocks.py) of the store; coordinates and block sizes are numpy views of the map (no copy)
+
+        import numpy as np
+        from bed12_blocks import STRAND_CODES, BlockTable
+        columns = self.columns
+        view = lambda name, dtype: np.frombuffer(columns[name], dtype=dtype)
+
+        offsets = view('block_offsets', np.int64)
+        starts = view('starts', np.int32)
+        strand_codes = np.array([STRAND_CODES.get(strand, 0) for strand in self.values['strand'].tolist()],
+                                dtype=np.int8)[view('strand_codes', np.int32)]
+        scores, rgbs = ([values[code] for code in columns[field + '_codes'].tolist()]
+                        for field, values in (('score', self.values['score'].tolist()),
+                                              ('rgb', self.values['rgb'].tolist())))
+        block_starts = view('block_starts', np.int32) + np.repeat(starts.astype(np.int64), np.diff(offsets))
+        return BlockTable(self.values['chrom'].tolist(), view('chrom_codes', np.int32), starts, view('ends', np.int32),
+                          self.names.tolist(), scores, strand_codes, view('cds_starts', np.int32),
+                          view('cds_ends', np.int32), rgbs, offsets, block_starts, view('block_sizes', np.int32))
+
+    def close(self):
+        ## Closes the map; numpy arrays of block_table() must be gone by then
+
+        for column in self.columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self.mm.close()
+        self.file.close()
+
+
+def read_store(store_file):
+    ## Yields records of a store file (bed12.read_bed12 does it for any store given instead of a bed)
+
+    store = Bed12Store(store_file)
+    try:
+        for record in store.records():
+            yield record
+    finally:
+        store.close()
+
+
+def read_lines(file):
+    ## Yields bed12 lines of a store file, or lines of a text annotation as they are
+
+    if is_bed12_store(file):
+        for record in read_store(file):
+            yield record.to_line()
+        return
+    with open_input(file) as inf:
+        for line in inf:
+            yield line
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--bed', type=str, help='bed12 annotation to convert; - for stdin')
+    parser.add_argument('-o', '--output', type=str, help='store file to write; default: BED.col')
+    args = parser.parse_args()
+
+    if not args.bed:
+        parser.print_help()
+        sys.exit(1)
+    if (not args.output) and (args.bed == '-'):
+        sys.exit('Error! Give the store file name with -o when reading bed from stdin')
+    store_file = args.output or args.bed + '.col'
+    n_rows = convert_bed12(args.bed, store_file)
+    sys.stderr.write('Wrote {} transcripts into {}\n'.format(n_rows, store_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script writes a bed (bed12) annotation as a coordinate-sorted, block-compressed (bgzip) file
+with a tabix index (.tbi), readable by tabix/htslib/pysam; and queries such a file by region,
+seeking only to the blocks that hold overlapping records.
+
+e.g usage:
+bed12_tabix.py -b annotation.bed -o annotation.bed.bgz
+bed12_tabix.py -i annotation.bed.bgz -r chr1:100000-200000
+"""
+
+import argparse
+import io
+import struct
+import sys
+import zlib
+from bed12_index import parse_region
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+BGZF_BLOCK_SIZE = 0xff00
+BGZF_HEADER = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+BGZF_EOF = BGZF_HEADER + b'\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+TBI_MAGIC = b'TBI\x01'
+## tabix preset for bed: 0-based coordinates (UCSC), chrom/start/end in columns 1/2/3, '#' comments
+TBI_BED_PRESET = (0x10000, 1, 2, 3, ord('#'), 0)
+LINEAR_SHIFT = 14
+
+
+def reg2bin(beg, end):
+    ## Smallest bin (UCSC/htslib binning scheme) containing the region [beg, end)
+
+    end -= 1
+    for shift, first_bin in ((14, 4681), (17, 585), (20, 73), (23, 9), (26, 1)):
+        if beg >> shift == end >> shift:
+            return first_bin + (beg >> shift)
+    return 0
+
+
+def reg2bins(beg, end):
+    ## All bins that can hold records overlapping the region [beg, end)
+
+    end -= 1
+    bins = [0]
+    for shift, first_bin in ((26, 1), (23, 9), (20, 73), (17, 585), (14, 4681)):
+        bins.extend(range(first_bin + (beg >> shift), first_bin + (end >> shift) + 1))
+    return bins
+
+
+class BgzfWriter(object):
+    ## Writes data as bgzip blocks; tell() gives the virtual offset (block_offset << 16 | offset_in_block)
+
+    def __init__(self, file):
+        self.outf = open(file, 'wb')
+        self.block = bytearray()
+        self.block_offset = 0
+
+    def tell(self):
+        return (self.block_offset << 16) | len(self.block)
+
+    def write_block(self, data):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        block = BGZF_HEADER + struct.pack('<H', len(BGZF_HEADER) + 2 + len(compressed) + 8 - 1) + compressed + \
+            struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data))
+        self.outf.write(block)
+        self.block_offset += len(block)
+
+    def write(self, data):
+        self.block += data
+        while len(self.block) >= BGZF_BLOCK_SIZE:
+            self.write_block(bytes(self.block[:BGZF_BLOCK_SIZE]))
+            del self.block[:BGZF_BLOCK_SIZE]
+
+    def close(self):
+        if self.block:
+            self.write_block(bytes(self.block))
+            self.block = bytearray()
+        self.outf.write(BGZF_EOF)
+        self.outf.close()
+
+
+class BgzfReader(object):
+    ## Reads lines of a bgzip file starting from any virtual offset
+
+    def __init__(self, file):
+        self.inf = open(file, 'rb')
+
+    def read_block(self, block_offset):
+        ## Returns (uncompressed data, compressed block size) of the block at block_offset; (b'', 0) at the end
+
+        self.inf.seek(block_offset)
+        header = self.inf.read(len(BGZF_HEADER) + 2)
+        if len(header) < len(BGZF_HEADER) + 2:
+            return b'', 0
+        block_size = struct.unpack_from('<H', header, len(BGZF_HEADER))[0] + 1
+        compressed = self.inf.read(block_size - len(header))
+        return zlib.decompress(compressed[:-8], -15), block_size
+
+    def iter_lines(self, voffset):
+        ## Yields (virtual offset, line) from voffset to the end of the file
+
+        block_offset, pos = voffset >> 16, voffset & 0xffff
+        pending, pending_voffset = b'', None
+        while True:
+            data, block_size = self.read_block(block_offset)
+            if not block_size:
+                break
+            while True:
+                line_end = data.find(b'\n', pos)
+                if line_end == -1:
+                    if (pending_voffset is None) and (pos < len(data)):
+                        pending_voffset = (block_offset << 16) | pos
+                    pending += data[pos:]
+                    break
+                line_voffset = pending_voffset if pending_voffset is not None else (block_offset << 16) | pos
+                yield line_voffset, pending + data[pos: line_end]
+                pending, pending_voffset = b'', None
+                pos = line_end + 1
+            block_offset += block_size
+            pos = 0
+        if pending:
+            yield pending_voffset, pending
+
+    def close(self):
+        self.inf.close()
+
+
+def get_bed_coords(line):
+    ## Returns (chrom, start, end) of a bed line; zero-length features count as 1 base (like tabix)
+
+    elements = line.split(b'\t', 3)
+    start, end = int(elements[1]), int(elements[2])
+    return elements[0].decode(), start, max(end, start + 1)
+
+
+def write_tabix(lines, file):
+    ## Sorts bed lines by chrom and start, writes them bgzipped to file and the tabix index to file.tbi;
+    ## returns number of records
+
+    records = []
+    for line in lines:
+        line = line.rstrip(b'\r\n') if isinstance(line, bytes) else line.rstrip('\r\n').encode()
+        if line and not line.startswith((b'#', b'track', b'browser')):
+            chrom, start, end = get_bed_coords(line)
+            records.append((chrom, start, end, line))
+    records.sort(key=lambda rec: (rec[0], rec[1], rec[2]))
+
+    writer = BgzfWriter(file)
+    chrom_names, chrom_bins, chrom_linear = [], [], []
+    for chrom, start, end, line in records:
+        if not chrom_names or chrom_names[-1] != chrom:
+            chrom_names.append(chrom)
+            chrom_bins.append({})
+            chrom_linear.append({})
+        voffset_start = writer.tell()
+        writer.write(line + b'\n')
+        voffset_end = writer.tell()
+
+        # chunks of consecutive records of one bin are merged
+        chunks = chrom_bins[-1].setdefault(reg2bin(start, end), [])
+        if chunks and (chunks[-1][1] == voffset_start):
+            chunks[-1][1] = voffset_end
+        else:
+            chunks.append([voffset_start, voffset_end])
+        # linear index: first record overlapping every 16kb window
+        linear = chrom_linear[-1]
+        for window in range(start >> LINEAR_SHIFT, ((end - 1) >> LINEAR_SHIFT) + 1):
+            linear.setdefault(window, voffset_start)
+    writer.close()
+
+    names = b''.join(name.encode() + b'\x00' for name in chrom_names)
+    index = [TBI_MAGIC, struct.pack('<i', len(chrom_names)), struct.pack('<6i', *TBI_BED_PRESET),
+             struct.pack('<i', len(names)), names]
+    for bins, linear in zip(chrom_bins, chrom_linear):
+        index.append(struct.pack('<i', len(bins)))
+        for bin_number in sorted(bins):
+            index.append(struct.pack('<Ii', bin_number, len(bins[bin_number])))
+            for chunk in bins[bin_number]:
+                index.append(struct.pack('<QQ', *chunk))
+        n_windows = max(linear) + 1
+        offsets = []
+        for window in range(n_windows):
+            offsets.append(linear.get(window, offsets[-1] if offsets else 0))
+        index.append(struct.pack('<i', n_windows))
+        index.append(struct.pack('<{}Q'.format(n_windows), *offsets))
+
+    index_writer = BgzfWriter(file + '.tbi')
+    index_writer.write(b''.join(index))
+    index_writer.close()
+    return len(records)
+
+
+class TabixBedWriter(io.RawIOBase):
+    ## Binary writer for io_utils.open_output: collects bed lines, sorts, bgzips and indexes them on close
+
+    def __init__(self, file):
+        self.file = file
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            write_tabix(bytes(self.data).splitlines(), self.file)
+            self.data = bytearray()
+        super(TabixBedWriter, self).close()
+
+
+class TabixBed(object):
+    ## Bgzipped bed with tabix index: query(chrom, start, end) yields overlapping bed lines
+
+    def __init__(self, file):
+        self.reader = BgzfReader(file)
+        index_reader = BgzfReader(file + '.tbi')
+        index = b''
+        block_offset = 0
+        while True:
+            data, block_size = index_reader.read_block(block_offset)
+            if not block_size:
+                break
+            index += data
+            block_offset += block_size
+        index_reader.close()
+        if index[:4] != TBI_MAGIC:
+            sys.exit('Error! {}.tbi is not a tabix index'.format(file))
+
+        n_chroms = struct.unpack_from('<i', index, 4)[0]
+        names_length = struct.unpack_from('<i', index, 32)[0]
+        names = index[36: 36 + names_length].split(b'\x00')[:n_chroms]
+        pos = 36 + names_length
+        self.chroms = {}
+        for name in names:
+            bins = {}
+            n_bins = struct.unpack_from('<i', index, pos)[0]
+            pos += 4
+            for i in range(n_bins):
+                bin_number, n_chunks = struct.unpack_from('<Ii', index, pos)
+                pos += 8
+                bins[bin_number] = [struct.unpack_from('<QQ', index, pos + 16 * j) for j in range(n_chunks)]
+                pos += 16 * n_chunks
+            n_windows = struct.unpack_from('<i', index, pos)[0]
+            linear = struct.unpack_from('<{}Q'.format(n_windows), index, pos + 4)
+            pos += 4 + 8 * n_windows
+            self.chroms[name.decode()] = (bins, linear)
+
+    def query(self, chrom, start, end):
+        ## Yields bed lines (str) of records overlapping [start, end) on chrom
+
+        if (chrom not in self.chroms) or (end <= start):
+            return
+        bins, linear = self.chroms[chrom]
+        window = start >> LINEAR_SHIFT
+        min_voffset = linear[window] if window < len(linear) else (linear[-1] if linear else 0)
+        chunks = sorted(chunk for bin_number in reg2bins(start, end) for chunk in bins.get(bin_number, [])
+                        if chunk[1] > min_voffset)
+        merged = []
+        for chunk_start, chunk_end in chunks:
+            if merged and (chunk_start <= merged[-1][1]):
+                merged[-1][1] = max(merged[-1][1], chunk_end)
+            else:
+                merged.append([max(chunk_start, min_voffset), chunk_end])
+
+        for chunk_start, chunk_end in merged:
+            for voffset, line in self.reader.iter_lines(chunk_start):
+                if voffset >= chunk_end:
+                    break
+                line_chrom, line_start, line_end = get_bed_coords(line)
+                if (line_chrom != chrom) or (line_start >= end):
+                    break
+                if line_end > start:
+                    yield line.decode()
+
+    def close(self):
+        self.reader.close()
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--bed', type=str, help='bed (bed12) file to compress and index; - for stdin')
+    parser.add_argument('-o', '--out', type=str, help='bgzipped bed to write (+ .tbi); default: BED.bgz')
+    parser.add_argument('-i', '--indexed', type=str, help='bgzipped bed with .tbi index to query')
+    parser.add_argument('-r', '--region', type=str, help='region to query: chrom:start-end; outputs overlapping bed')
+    args = parser.parse_args()
+
+    ## Compress and index
+    if args.bed:
+        out_file = args.out if args.out else args.bed + '.bgz'
+        with open_input(args.bed, 'rb') as inf:
+            n_records = write_tabix(inf, out_file)
+        sys.stderr.write('Wrote {} records to {} (+ .tbi)\n'.format(n_records, out_file))
+
+    ## Query
+    elif args.indexed and args.region:
+        tabix_bed = TabixBed(args.indexed)
+        for line in tabix_bed.query(*parse_region(args.region)):
+            print(line)
+        tabix_bed.close()
+
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script generates a seeded synthetic data set for the benchmarks: n transcripts in genes with isoforms
+(multi-exon, CDS and UTRs), the same transcripts as CDS-only models, StringTie-like evidence, a reference annotation,
+isoform table, outfmt6 blast hits, proteins, uniprot-like db and a NCBI-like gff3.
+The same n and seed always give the same files.
+
+e.g usage: generate_data.py -n 100000 -s 1 -o data/100000_1
+"""
+
+import argparse
+import os
+import random
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+TRANSCRIPTS_PER_CHROM = 20000
+SPECIES = ['HUMAN', 'MOUSE', 'CHICK', 'DANRE', 'XENTR']
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+## files of a data set: {key: file name}
+DATA_FILES = {'anno': 'anno.bed', 'anno_sorted': 'anno.sorted.bed', 'anno_cds': 'anno_cds.bed',
+              'anno_cds_sorted': 'anno_cds.sorted.bed', 'evidence': 'evidence.bed',
+              'evidence_sorted': 'evidence.sorted.bed', 'ref': 'ref.bed', 'isoforms': 'isoforms.tsv',
+              'ids': 'ids.txt', 'names': 'names.csv', 'hits': 'hits.tsv', 'species': 'species.txt',
+              'proteins': 'proteins.fa', 'uniprot': 'uniprot.fa', 'gff': 'anno.gff3'}
+
+
+def bed_line(chrom, exons, name, strand, cds_start, cds_end):
+    ## Makes bed12 line of a transcript from its exons [(start, end), ..]
+
+    start, end = exons[0][0], exons[-1][1]
+    return '\t'.join(map(str, [chrom, start, end, name, 0, strand, cds_start, cds_end, '0,0,0', len(exons),
+                               ','.join(str(e - s) for s, e in exons) + ',',
+                               ','.join(str(s - start) for s, e in exons) + ',']))
+
+
+def clip_exons(exons, start, end):
+    ## Clips exons to [start, end)
+
+    return [(max(s, start), min(e, end)) for s, e in exons if (e > start) and (s < end)]
+
+
+def make_gene(rng, chrom, pos, gene_id, n_isoforms):
+    ## Makes isoforms of one gene starting around pos: [(name, strand, exons, cds_start, cds_end)]
+
+    strand = rng.choice('+-')
+    n_exons = rng.randint(1, 12)
+    exons = []
+    for i in range(n_exons):
+        size = rng.randint(60, 400)
+        exons.append((pos, pos + size))
+        pos += size + rng.randint(80, 5000)
+
+    isoforms = []
+    for j in range(n_isoforms):
+        # isoforms skip inner exons
+        iso_exons = [exons[0]] + [e for e in exons[1:-1] if rng.random() > 0.15] + exons[1:][-1:]
+        spliced = [base for s, e in iso_exons for base in (s, e)]
+        # cds starts in the first and ends in the last two exons, if possible
+        first, last = iso_exons[0], iso_exons[-1]
+        cds_start = rng.randint(first[0], max(first[0], first[1] - 30))
+        cds_end = rng.randint(min(last[1], max(cds_start + 30, last[0])), last[1])
+        if cds_end <= cds_start:
+            cds_start, cds_end = spliced[0], spliced[-1]
+        isoforms.append(('g{}.t{}'.format(gene_id, j + 1), strand, iso_exons, cds_start, cds_end))
+    return isoforms, pos
+
+
+def generate(n, seed, out_dir):
+    ## Writes all files of a data set with about n transcripts to out_dir
+
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    files = {key: open(os.path.join(out_dir, name), 'w') for key, name in DATA_FILES.items()
+             if not key.endswith('_sorted')}
+    for code in SPECIES[:3]:
+        files['species'].write('{}\tspecies\n'.format(code))
+    files['gff'].write('##gff-version 3\n')
+
+    n_chroms = max(3, n // TRANSCRIPTS_PER_CHROM)
+    anno, anno_cds, evidence = [], [], []
+    n_transcripts, gene_id, subject_id = 0, 0, 0
+    chrom_pos = [1000] * n_chroms
+    while n_transcripts < n:
+        gene_id += 1
+        chrom_number = rng.randrange(n_chroms)
+        chrom = 'chr{}'.format(chrom_number + 1)
+        isoforms, chrom_pos[chrom_number] = make_gene(rng, chrom, chrom_pos[chrom_number], gene_id,
+                                                      min(rng.randint(1, 4), n - n_transcripts))
+        gene = 'g{}'.format(gene_id)
+        gene_start = min(iso[2][0][0] for iso in isoforms)
+        gene_end = max(iso[2][-1][1] for iso in isoforms)
+        files['gff'].write('{}\tGnomon\tgene\t{}\t{}\t.\t{}\t.\tID=gene-{};Dbxref=GeneID:{};Name={};gene={}\n'.format(
+            chrom, gene_start + 1, gene_end, isoforms[0][1], gene, gene_id, gene, gene))
+
+        for name, strand, exons, cds_start, cds_end in isoforms:
+            n_transcripts += 1
+            line = bed_line(chrom, exons, name, strand, cds_start, cds_end)
+            anno.append(line)
+            # a few exact duplicates, like merged annotations have
+            if rng.random() < 0.05:
+                anno.append(line)
+            anno_cds.append(bed_line(chrom, clip_exons(exons, cds_start, cds_end), name, strand, cds_start, cds_end))
+            # stringtie: same intron chain, ends moved, no cds; 1-2 per transcript
+            for k in range(rng.randint(1, 2)):
+                shift_start, shift_end = rng.choice([0, 0, 15, 40]), rng.choice([0, 0, 20, 55])
+                stringtie_exons = [(exons[0][0] - shift_start, exons[0][1])] + exons[1:]
+                stringtie_exons[-1] = (stringtie_exons[-1][0], stringtie_exons[-1][1] + shift_end)
+                evidence.append(bed_line(chrom, stringtie_exons, 'STRG.{}.{}'.format(n_transcripts, k + 1), strand,
+                                         stringtie_exons[0][0], stringtie_exons[0][0]))
+            # reference annotation: most transcripts, with cds ends moved a bit
+            if rng.random() < 0.8:
+                shift = rng.choice([0, 0, 3, 30])
+                files['ref'].write(bed_line(chrom, exons, 'ref_' + name, strand, cds_start + shift,
+                                            max(cds_start + shift + 1, cds_end - shift)) + '\n')
+
+            files['isoforms'].write('{}\t{}\n'.format(gene, name))
+            if rng.random() < 0.3:
+                files['ids'].write(name + '\n')
+            if rng.random() < 0.5:
+                files['names'].write('{},GENE{}\n'.format(name, gene_id))
+
+            protein_length = max(10, sum(e - s for s, e in clip_exons(exons, cds_start, cds_end)) // 3)
+            protein = ''.join(rng.choice(AMINO_ACIDS) for i in range(protein_length))
+            files['proteins'].write('>{}\n'.format(name))
+            for i in range(0, len(protein), 60):
+                files['proteins'].write(protein[i: i + 60] + '\n')
+
+            files['gff'].write('{}\tGnomon\tmRNA\t{}\t{}\t.\t{}\t.\tID=rna-{};Parent=gene-{};'
+                               'Dbxref=GeneID:{},Genbank:{};gbkey=mRNA;gene={};transcript_id={}\n'.format(
+                                   chrom, exons[0][0] + 1, exons[-1][1], strand, name, gene, gene_id, name, gene, name))
+            for i, (s, e) in enumerate(exons):
+                files['gff'].write('{}\tGnomon\texon\t{}\t{}\t.\t{}\t.\tID=exon-{}-{};Parent=rna-{};gene={}\n'.format(
+                    chrom, s + 1, e, strand, name, i + 1, name, gene))
+
+            # blast hits: a few subjects per query, best first (as blast outputs them), 1-3 HSPs per subject
+            bitscore = rng.uniform(100, 2000)
+            for h in range(rng.randint(1, 10)):
+                subject_id += 1
+                subject = 'sp|P{:06d}|G{}_{}'.format(subject_id, gene_id, rng.choice(SPECIES))
+                subject_length = int(protein_length * rng.uniform(0.8, 1.3))
+                files['uniprot'].write('>{} Protein OS=Some species OX=1{} PE=1 SV=1\nM{}\n'.format(
+                    subject, ' GN=G{}'.format(gene_id) if rng.random() < 0.9 else '', 'A' * (subject_length - 1)))
+                position = 1
+                for k in range(rng.randint(1, 3)):
+                    if position > protein_length:
+                        break
+                    length = max(5, protein_length // rng.randint(1, 3))
+                    q_end = min(protein_length, position + length - 1)
+                    files['hits'].write('{}\t{}\t{:.3f}\t{}\t{}\t0\t{}\t{}\t{}\t{}\t{:.2e}\t{:.1f}\n'.format(
+                        name, subject, rng.uniform(25, 100), length, rng.randint(0, length // 5), position, q_end,
+                        position, min(subject_length, q_end), 10 ** -rng.uniform(5, 150), bitscore))
+                    position = q_end + 1
+                    bitscore *= rng.uniform(0.7, 1.0)
+
+    rng.shuffle(anno)
+    rng.shuffle(anno_cds)
+    rng.shuffle(evidence)
+    for key, lines in (('anno', anno), ('anno_cds', anno_cds), ('evidence', evidence)):
+        files[key].write('\n'.join(lines) + '\n')
+        with open(os.path.join(out_dir, DATA_FILES[key + '_sorted']), 'w') as outf:
+            outf.write('\n'.join(sorted(lines, key=lambda l: (l.split('\t', 1)[0], int(l.split('\t', 2)[1])))) + '\n')
+    for outf in files.values():
+        outf.close()
+    return n_transcripts
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--ntranscripts', type=int, default=10000, help='number of transcripts; default: 10000')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='random seed; default: 1')
+    parser.add_argument('-o', '--outdir', type=str, help='directory to write the data set to')
+    args = parser.parse_args()
+
+    generate(args.ntranscripts, args.seed, args.outdir)
+
+
+if __name__ == '__main__':
+    main()
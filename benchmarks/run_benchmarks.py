@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script benchmarks the annotation scripts on synthetic data sets (generate_data.py) of several sizes:
+for every script and size it records wall time, throughput (records/s) and peak memory (RSS) of the script process.
+Results can be saved as a baseline (--save) and later runs compared to it (--baseline):
+a script is reported as a regression if it got slower or bigger than the baseline by more than --tolerance,
+or if its time grows faster with the input size than it did in the baseline (scaling regression).
+
+e.g usage:
+run_benchmarks.py -n 10000,100000 --save baseline.json
+run_benchmarks.py -n 10000,100000 --baseline baseline.json --fail
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from generate_data import DATA_FILES, generate
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+## benchmark cases: {name: (script, arguments, data file with the counted records)};
+## {key} in arguments is replaced with the data file of that key, {tmp} with a scratch directory
+CASES = {
+    'cds_add_utrs': ('cds_add_utrs_from_stringtie.py', ['-r', '{evidence}', '-a', '{anno_cds}'], 'anno_cds'),
+    'cds_add_utrs_sorted': ('cds_add_utrs_from_stringtie.py',
+                            ['-r', '{evidence_sorted}', '-a', '{anno_cds_sorted}', '-sorted'], 'anno_cds'),
+    'filter_anno_by_ref_anno': ('filter_anno_by_ref_anno.py', ['-r', '{ref}', '-a', '{anno}', '-e', 'native'],
+                                'anno'),
+    'getUniqTranscripts': ('getUniqTranscripts.py', ['-f', '{anno}'], 'anno'),
+    'filter_blast_hits': ('filter_blast_hits.py', ['-b', '{hits}', '-s', '{species}', '-n', '5'], 'hits'),
+    'filter_blast_hits_grouped': ('filter_blast_hits.py', ['-b', '{hits}', '-n', '5', '-g'], 'hits'),
+    'left_CDS_only': ('left_CDS_only.py', ['{anno}', 'stdout'], 'anno'),
+    'parse_gff_for_geneids': ('parse_gff_for_geneids.py', ['-a', '{gff}'], 'isoforms'),
+}
+
+
+def count_lines(file):
+    ## Number of lines in file
+
+    with open(file, 'rb') as inf:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: inf.read(1 << 20), b''))
+
+
+def get_data(data_dir, n, seed):
+    ## Returns {key: file} of the data set of size n; generates it if it is not there yet
+
+    set_dir = os.path.join(data_dir, '{}_{}'.format(n, seed))
+    done_file = os.path.join(set_dir, '.done')
+    if not os.path.isfile(done_file):
+        sys.stderr.write('Generating data set: {} transcripts, seed {}\n'.format(n, seed))
+        generate(n, seed, set_dir)
+        open(done_file, 'w').close()
+    return {key: os.path.join(set_dir, name) for key, name in DATA_FILES.items()}
+
+
+def run_case(script, arguments, data, tmp_dir):
+    ## Runs script on data once; returns (wall time in s, peak RSS in MB) or None if the script failed
+
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, script)] + \
+        [arg.format(tmp=tmp_dir, **data) for arg in arguments]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, cwd=tmp_dir)
+    # stderr is read in full before waiting, so a chatty script can not block on a full pipe
+    stderr = process.stderr.read()
+    pid, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        sys.stderr.write('Error! {} failed:\n{}\n'.format(' '.join(command), stderr.decode(errors='replace')[-2000:]))
+        return None
+    # ru_maxrss is in kilobytes on linux, in bytes on macOS
+    rss = usage.ru_maxrss / (1 << 20) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return wall_time, rss
+
+
+def run_benchmarks(cases, sizes, seed, repeats, data_dir):
+    ## Runs every case at every size, best of repeats; returns {case: {size: {'time', 'records_per_s', 'rss_mb'}}}
+
+    results = {}
+    for n in sizes:
+        data = get_data(data_dir, n, seed)
+        tmp_dir = os.path.join(data_dir, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        for case in cases:
+            script, arguments, records_key = CASES[case]
+            n_records = count_lines(data[records_key])
+            runs = [run_case(script, arguments, data, tmp_dir) for i in range(repeats)]
+            if None in runs:
+                continue
+            wall_time = min(run[0] for run in runs)
+            rss = max(run[1] for run in runs)
+            results.setdefault(case, {})[str(n)] = {'time': round(wall_time, 4), 'records': n_records,
+                                                    'records_per_s': round(n_records / wall_time, 1),
+                                                    'rss_mb': round(rss, 1)}
+            sys.stderr.write('{}\t{}\t{:.3f} s\t{:.0f} records/s\t{:.1f} MB\n'.format(
+                case, n, wall_time, n_records / wall_time, rss))
+    return results
+
+
+def get_scaling(case_results):
+    ## Time ratios between consecutive sizes, normalized by the size ratio: {'small-big': ratio};
+    ## ~1 for linear scaling, >1 if time grows faster than input
+
+    sizes = sorted(case_results, key=int)
+    scaling = {}
+    for small, big in zip(sizes, sizes[1:]):
+        time_ratio = case_results[big]['time'] / case_results[small]['time']
+        scaling['{}-{}'.format(small, big)] = round(time_ratio / (int(big) / int(small)), 3)
+    return scaling
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    ## Compares results to baseline results; returns list of regression messages
+
+    regressions = []
+    for case in sorted(results):
+        if case not in baseline:
+            continue
+        for n in sorted(results[case], key=int):
+            if n not in baseline[case]:
+                continue
+            new, old = results[case][n], baseline[case][n]
+            for measure in ('time', 'rss_mb'):
+                if new[measure] > old[measure] * (1 + tolerance):
+                    regressions.append('{} {}: {} {} -> {} (+{:.0%})'.format(
+                        case, n, measure, old[measure], new[measure], new[measure] / old[measure] - 1))
+        old_scaling = get_scaling({n: baseline[case][n] for n in baseline[case] if n in results[case]})
+        for sizes, ratio in get_scaling({n: results[case][n] for n in results[case] if n in baseline[case]}).items():
+            if ratio > old_scaling[sizes] * (1 + tolerance):
+                regressions.append('{} {}: scaling {} -> {}'.format(case, sizes, old_scaling[sizes], ratio))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    ## Prints results table; with baseline, also the change of time and memory
+
+    header = ['case', 'transcripts', 'records', 'time_s', 'records_per_s', 'rss_mb']
+    if baseline:
+        header += ['time_change', 'rss_change']
+    print('\t'.join(header))
+    for case in sorted(results):
+        for n in sorted(results[case], key=int):
+            result = results[case][n]
+            line = [case, n, result['records'], result['time'], result['records_per_s'], result['rss_mb']]
+            if baseline:
+                old = baseline.get(case, {}).get(n)
+                line += ['{:+.0%}'.format(result['time'] / old['time'] - 1) if old else 'NA',
+                         '{:+.0%}'.format(result['rss_mb'] / old['rss_mb'] - 1) if old else 'NA']
+            print('\t'.join(map(str, line)))
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--sizes', type=str, default='10000,100000,1000000',
+                        help='comma-separated data set sizes (transcripts); default: 10000,100000,1000000')
+    parser.add_argument('-c', '--cases', type=str,
+                        help='comma-separated cases to run; default: all ({})'.format(','.join(CASES)))
+    parser.add_argument('-s', '--seed', type=int, default=1, help='random seed of the data sets; default: 1')
+    parser.add_argument('-r', '--repeats', type=int, default=1, help='runs per case, best time is kept; default: 1')
+    parser.add_argument('-d', '--datadir', type=str, default=DEFAULT_DATA_DIR,
+                        help='directory with (cached) data sets; default: benchmarks/data')
+    parser.add_argument('--save', type=str, help='save results to this json file (e.g. to use as a baseline)')
+    parser.add_argument('--baseline', type=str, help='json file with baseline results to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown/memory growth vs baseline as a fraction; default: 0.25')
+    parser.add_argument('--fail', action='store_true', help='exit with error status if there are regressions')
+    args = parser.parse_args()
+
+    cases = args.cases.split(',') if args.cases else list(CASES)
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        sys.exit('Error! Unknown cases: {}'.format(', '.join(unknown)))
+    sizes = [int(n) for n in args.sizes.split(',')]
+
+    ## Run benchmarks
+    results = run_benchmarks(cases, sizes, args.seed, args.repeats, args.datadir)
+
+    ## Save results
+    if args.save:
+        with open(args.save, 'w') as outf:
+            json.dump({'python': platform.python_version(), 'machine': platform.platform(), 'seed': args.seed,
+                       'results': results}, outf, indent=1, sort_keys=True)
+
+    ## Compare to baseline
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as inf:
+            baseline = json.load(inf)['results']
+    print_results(results, baseline)
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            sys.stderr.write('Regression! {}\n'.format(regression))
+        if regressions and args.fail:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script converts blast hits (outfmt 6) into a typed columnar store, so that the same hits
+can be re-filtered many times (filter_blast_hits.py, filter_fasta_with_blast.py) without parsing text again.
+
+Store is a directory: query/subject IDs are dictionary-encoded (*_names.npy + *_codes.npy),
+numeric columns are .npy arrays, original lines are kept in lines.bin to output hits unchanged.
+All arrays are memory-mapped on loading, filters are numpy masks.
+
+e.g usage: blast_store.py -b blast.out6 -o blast.out6.store
+"""
+
+import argparse
+from array import array
+import json
+import os
+import sys
+import numpy as np
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+## qseqid, sseqid, pid, alilen, mism, gapop, qst, qend, sst, send, eval, bitscore
+NUMERIC_COLUMNS = [('pident', 'd', 2), ('length', 'l', 3), ('mismatch', 'l', 4), ('gapopen', 'l', 5),
+                   ('qstart', 'l', 6), ('qend', 'l', 7), ('sstart', 'l', 8), ('send', 'l', 9),
+                   ('evalue', 'd', 10), ('bitscore', 'd', 11)]
+META_FILE = 'meta.json'
+
+
+def is_blast_store(path):
+    ## Checks if path is a blast hits store directory (and not outfmt6 text)
+
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, META_FILE))
+
+
+def encode_name(name, codes_dict, names_list):
+    ## Dictionary-encodes a name: returns its code, adds new names to names_list
+
+    code = codes_dict.get(name)
+    if code is None:
+        code = len(names_list)
+        codes_dict[name] = code
+        names_list.append(name)
+    return code
+
+
+def convert_blast_hits(blast_file, store_dir):
+    ## Parses outfmt6 file once and writes it as a columnar store; returns number of hits
+
+    os.makedirs(store_dir, exist_ok=True)
+    query_dict, query_names, query_codes = {}, [], array('l')
+    subject_dict, subject_names, subject_codes = {}, [], array('l')
+    columns = {name: array(typecode) for name, typecode, i in NUMERIC_COLUMNS}
+    line_offsets = array('q', [0])
+
+    with open_input(blast_file, 'rb') as inf, open(os.path.join(store_dir, 'lines.bin'), 'wb') as lines_out:
+        for line in inf:
+            line = line.rstrip()
+            if not line:
+                continue
+            elements = line.split(b'\t')
+            query_codes.append(encode_name(elements[0], query_dict, query_names))
+            subject_codes.append(encode_name(elements[1], subject_dict, subject_names))
+            for name, typecode, i in NUMERIC_COLUMNS:
+                columns[name].append(float(elements[i]) if typecode == 'd' else int(elements[i]))
+            lines_out.write(line + b'\n')
+            line_offsets.append(line_offsets[-1] + len(line) + 1)
+
+    arrays = {'query_codes': np.frombuffer(query_codes, dtype=np.int_).astype(np.int32),
+              'subject_codes': np.frombuffer(subject_codes, dtype=np.int_).astype(np.int32),
+              'query_names': np.array(query_names, dtype=np.bytes_),
+              'subject_names': np.array(subject_names, dtype=np.bytes_),
+              'line_offsets': np.frombuffer(line_offsets, dtype=np.int64)}
+    for name, typecode, i in NUMERIC_COLUMNS:
+        arrays[name] = np.frombuffer(columns[name], dtype=np.float64 if typecode == 'd' else np.int_)
+    for name in ('length', 'mismatch', 'gapopen', 'qstart', 'qend', 'sstart', 'send'):
+        arrays[name] = arrays[name].astype(np.int32)
+
+    for name in arrays:
+        np.save(os.path.join(store_dir, name + '.npy'), arrays[name])
+    with open(os.path.join(store_dir, META_FILE), 'w') as outf:
+        json.dump({'source': os.path.abspath(blast_file), 'n_hits': len(query_codes),
+                   'n_queries': len(query_names), 'n_subjects': len(subject_names)}, outf)
+    return len(query_codes)
+
+
+def union_length(group_ids, starts, ends, n_groups):
+    ## Total length of the union of half-open intervals [start, end) of every group (group_ids: 0..n_groups-1);
+    ## groups are shifted apart by their id, so all of them are merged in one sort and one pass
+
+    shift = group_ids.astype(np.int64) << 32
+    starts = starts.astype(np.int64) + shift
+    ends = ends.astype(np.int64) + shift
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    if not len(starts):
+        return np.zeros(n_groups, dtype=np.int64)
+
+    # an interval opens a new merged segment if it starts after every interval before it has ended
+    max_ends = np.maximum.accumulate(ends)
+    segment_firsts = np.flatnonzero(np.r_[True, starts[1:] > max_ends[:-1]])
+    segment_starts = starts[segment_firsts]
+    segment_ends = np.maximum.reduceat(ends, segment_firsts)
+    return np.bincount(segment_starts >> 32, weights=segment_ends - segment_starts, minlength=n_groups).astype(np.int64)
+
+
+def pair_coverage(query_codes, subject_codes, qstart, qend, sstart, send):
+    ## Tiles HSPs of every query-subject pair: returns (pair query codes, pair subject codes,
+    ## query bases covered, subject bases covered); blast coordinates are 1-based, subject ones can be reversed
+
+    pair_keys = query_codes.astype(np.int64) << 32 | subject_codes.astype(np.int64)
+    pair_keys, pair_ids = np.unique(pair_keys, return_inverse=True)
+    pair_ids = pair_ids.ravel()
+    n_pairs = len(pair_keys)
+    query_covered = union_length(pair_ids, np.minimum(qstart, qend) - 1, np.maximum(qstart, qend), n_pairs)
+    subject_covered = union_length(pair_ids, np.minimum(sstart, send) - 1, np.maximum(sstart, send), n_pairs)
+    return pair_keys >> 32, pair_keys & 0xFFFFFFFF, query_covered, subject_covered
+
+
+class BlastStore(object):
+    ## Memory-mapped columnar blast hits: one array per column, one row per hit (in the original order)
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, META_FILE), 'r') as inf:
+            self.meta = json.load(inf)
+        for name in ['query_codes', 'subject_codes', 'query_names', 'subject_names', 'line_offsets'] + \
+                [column[0] for column in NUMERIC_COLUMNS]:
+            setattr(self, name, np.load(os.path.join(store_dir, name + '.npy'), mmap_mode='r'))
+        self.lines = np.memmap(os.path.join(store_dir, 'lines.bin'), dtype=np.uint8, mode='r') \
+            if self.meta['n_hits'] else np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return self.meta['n_hits']
+
+    def mask_identity(self, idmin):
+        ## Hits with at least idmin % identity
+
+        return self.pident >= idmin
+
+    def mask_coverage(self, qcov, rcov):
+        ## Hits with alignment length >= qcov * query end and >= rcov * target end (same as filter_fasta_with_blast.py)
+
+        return (self.length >= qcov * self.qend) & (self.length >= rcov * self.send)
+
+    def mask_species(self, species_codes):
+        ## Hits to targets of allowed species: target ID suffix after the last '_', e.g: sp|P12345|ABC1_CHICK
+
+        species_codes = set(species_codes)
+        allowed_subjects = np.array([name.decode().split('_')[-1] in species_codes for name in self.subject_names],
+                                    dtype=bool)
+        return allowed_subjects[self.subject_codes]
+
+    def top_n_per_query(self, n, mask=None):
+        ## Returns row numbers of n best (bit-score) hits of every query passing mask:
+        ## queries in order of appearance, hits from the best; equal bit-scores keep file order; n=0 keeps all
+
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        order = np.lexsort((rows, -self.bitscore[rows], self.query_codes[rows]))
+        rows = rows[order]
+        if (n > 0) and len(rows):
+            query_codes = self.query_codes[rows]
+            group_starts = np.flatnonzero(np.r_[True, query_codes[1:] != query_codes[:-1]])
+            rank = np.arange(len(rows)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(rows)]))
+            rows = rows[rank < n]
+        return rows
+
+    def pair_coverage(self, mask=None):
+        ## Tiles HSPs passing mask per query-subject pair (see pair_coverage)
+
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        return pair_coverage(self.query_codes[rows], self.subject_codes[rows], self.qstart[rows], self.qend[rows],
+                             self.sstart[rows], self.send[rows])
+
+    def queries(self, mask=None):
+        ## Returns set of query IDs having hits passing mask
+
+        query_codes = self.query_codes if mask is None else self.query_codes[mask]
+        return set(name.decode() for name in self.query_names[np.unique(query_codes)])
+
+    def get_line(self, row):
+        ## Returns original outfmt6 line of a hit
+
+        return self.lines[self.line_offsets[row]: self.line_offsets[row + 1] - 1].tobytes().decode()
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--blasthits', type=str, help='blast hits output in format 6')
+    parser.add_argument('-o', '--out', type=str, help='store directory to write; default: BLASTHITS.store')
+    args = parser.parse_args()
+
+    store_dir = args.out if args.out else args.blasthits + '.store'
+    n_hits = convert_blast_hits(args.blasthits, store_dir)
+    sys.stderr.write('Converted {} hits into {}\n'.format(n_hits, store_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 #
 import argparse
 from collections import defaultdict
+from io_utils import open_input
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -11,8 +12,8 @@ def read_into_dict(file):
     ## Read isoformes into dict
 
     iso_dict = defaultdict(list)
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(file) as inf:
+        for line in inf:
             elements = line.rstrip().split()
             if len(elements) == 2:
                 gene = line.rstrip().split()[0]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+#
+
+"""
+Per-chromosome process pool for scripts that join an annotation with evidence on chromosome-keyed coordinates
+(e.g. cds_add_utrs_from_stringtie.py, add_utrs_from_stringtie.py).
+Both inputs are split into bed12 lines by chromosome; each chromosome is processed by a worker
+and results are returned in the order chromosomes first appear in the annotation.
+"""
+
+from collections import defaultdict
+from multiprocessing import Pool
+from bed12 import read_bed12
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+def read_lines_by_chrom(file):
+    ## Splits a bed12 file into lists of lines per chromosome: {chrom: [line1, line2, ..]}; keeps chromosome order.
+    ## The file is read by bed12.read_bed12, so records piped in from a chained command (@) and
+    ## bed12_store.py stores work as in one process
+
+    lines_by_chrom = defaultdict(list)
+    for record in read_bed12(file):
+        lines_by_chrom[record.chrom].append(record.to_line())
+    return lines_by_chrom
+
+
+def map_by_chrom(worker, anno_file, evidence_file, threads, *worker_args):
+    ## Runs worker(anno_lines, evidence_lines, *worker_args) for every annotated chromosome in a pool of threads processes;
+    ## yields worker results chromosome by chromosome in a deterministic (annotation) order
+
+    anno_by_chrom = read_lines_by_chrom(anno_file)
+    evidence_by_chrom = read_lines_by_chrom(evidence_file)
+
+    # start the biggest chromosomes first, so small ones fill the gaps in the end
+    chrom_order = list(anno_by_chrom)
+    chrom_by_size = sorted(chrom_order, key=lambda c: len(anno_by_chrom[c]) + len(evidence_by_chrom.get(c, [])),
+                           reverse=True)
+
+    with Pool(processes=threads) as pool:
+        jobs = {}
+        for chrom in chrom_by_size:
+            job_args = (anno_by_chrom[chrom], evidence_by_chrom.pop(chrom, [])) + worker_args
+            jobs[chrom] = pool.apply_async(worker, job_args)
+        anno_by_chrom.clear()
+
+        for chrom in chrom_order:
+            yield jobs.pop(chrom).get()
@@ -7,6 +7,7 @@ and checks if values corresponding to the same ID are similar enough.
 
 import argparse
 import itertools
+from io_utils import open_input
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -16,8 +17,8 @@ def read_into_dict(file):
     ## Read genes and corresponding values into dict
 
     anno_dict = {}
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(file) as inf:
+        for line in inf:
            gene = line.rstrip().split()[0]
            values = line.rstrip().split()[1]
            anno_dict[gene] = [float(v) for v in values.split(',')]
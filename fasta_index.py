@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+#
+
+"""
+Header-only access to fasta files through a .fai index (samtools faidx format:
+name, length, offset of the first base, bases per line, bytes per line).
+An existing .fai is read if it is newer than the fasta and matches it (first and last record are where it says),
+otherwise the index is built in memory (one pass, sequences are not decoded); it is saved next to the fasta
+only by this script (or FastaIndex(save=True)), so shared/read-only fasta directories are left untouched.
+IDs and lengths come from the index; selected records are copied to the output as they are in the file
+(header with description and line wrapping), straight from the mmap.
+
+e.g usage: fasta_index.py -f proteins.fa
+"""
+
+import argparse
+import mmap
+import os
+import sys
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+def is_fasta(file):
+    ## Checks if file starts like a fasta (and not like a table)
+
+    with open(file, 'rb') as inf:
+        for line in inf:
+            if line.strip():
+                return line.startswith(b'>')
+    return False
+
+
+def scan_fasta(fasta):
+    ## Reads fasta once; returns .fai entries [(name, length, offset, line_bases, line_width)] in file order
+
+    entries = []
+    with open(fasta, 'rb') as inf:
+        pos = 0
+        entry = None
+        for line in inf:
+            if line.startswith(b'>'):
+                if entry is not None:
+                    entries.append(tuple(entry))
+                entry = [line[1:].split(None, 1)[0].decode(), 0, pos + len(line), 0, 0]
+            elif entry is not None:
+                bases = len(line.rstrip(b'\r\n'))
+                if entry[3] == 0:
+                    entry[3], entry[4] = bases, len(line)
+                entry[1] += bases
+            pos += len(line)
+        if entry is not None:
+            entries.append(tuple(entry))
+    return entries
+
+
+def write_fai(entries, fai):
+    ## Writes .fai index
+
+    with open(fai, 'w') as outf:
+        for entry in entries:
+            outf.write('\t'.join(map(str, entry)) + '\n')
+
+
+def read_fai(fai):
+    ## Reads .fai index into a list of entries [(name, length, offset, line_bases, line_width)]
+
+    entries = []
+    with open(fai, 'r') as inf:
+        for line in inf:
+            elements = line.rstrip('\n').split('\t')
+            if len(elements) >= 5:
+                entries.append((elements[0],) + tuple(int(i) for i in elements[1:5]))
+    return entries
+
+
+def count_records(fasta):
+    ## Counts fasta headers without splitting the file into lines
+
+    count = 0
+    last = b'\n'
+    with open(fasta, 'rb') as inf:
+        for chunk in iter(lambda: inf.read(1 << 20), b''):
+            count += (last + chunk).count(b'\n>')
+            last = chunk[-1:]
+    return count
+
+
+def fai_matches(entries, fasta):
+    ## Checks a .fai against the fasta: same number of records, headers of the first and last record end
+    ## where their sequences start, and the last sequence ends at the end of the file
+
+    size = os.path.getsize(fasta)
+    if not entries:
+        return size == 0
+    if len(entries) != count_records(fasta):
+        return False
+    with open(fasta, 'rb') as inf:
+        for name, length, offset, line_bases, line_width in (entries[0], entries[-1]):
+            if not (0 < offset <= size):
+                return False
+            inf.seek(max(0, offset - (1 << 16)))
+            before = inf.read(offset - inf.tell())
+            header = before[before.rfind(b'\n', 0, len(before) - 1) + 1:]
+            if not (header.startswith(b'>') and header.endswith(b'\n')) or \
+                    ((header[1:].split(None, 1) or [b''])[0].decode(errors='replace') != name):
+                return False
+    name, length, offset, line_bases, line_width = entries[-1]
+    end = offset + ((length // line_bases) * line_width + length % line_bases if line_bases else 0)
+    # (the last line may miss its newline)
+    return -(line_width - line_bases) <= size - end <= max(line_width, 2)
+
+
+class FastaIndex(object):
+    ## IDs, lengths and byte ranges of fasta records; records are copied from the memory-mapped fasta
+
+    def __init__(self, fasta, fai=None, save=False):
+        ## Reads fasta.fai (or fai) if it is up to date, otherwise builds the index; save writes a built index to fai
+        ## (skipped if its directory is not writable)
+
+        self.fasta = fasta
+        fai = fai if fai else fasta + '.fai'
+        self.entries = None
+        if os.path.isfile(fai) and (os.path.getmtime(fai) >= os.path.getmtime(fasta)):
+            entries = read_fai(fai)
+            if fai_matches(entries, fasta):
+                self.entries = entries
+        if self.entries is None:
+            self.entries = scan_fasta(fasta)
+            if save:
+                try:
+                    write_fai(self.entries, fai)
+                except (IOError, OSError):
+                    pass
+        self.rows = {}
+        duplicates = []
+        for row, entry in enumerate(self.entries):
+            if entry[0] in self.rows:
+                duplicates.append(entry[0])
+            else:
+                self.rows[entry[0]] = row
+        if duplicates:
+            sys.stderr.write('Warning! {} IDs are found more than once in {}, e.g: {}\n'.format(
+                len(duplicates), fasta, duplicates[0]))
+        self.file = None
+        self.mm = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def names(self):
+        ## Returns sequence IDs in file order
+
+        return [entry[0] for entry in self.entries]
+
+    def get_lengths(self):
+        ## Returns dictionary {seq_id: length}
+
+        return {entry[0]: entry[1] for entry in reversed(self.entries)}
+
+    def open(self):
+        ## Memory-maps the fasta (once)
+
+        if self.mm is None:
+            self.file = open(self.fasta, 'rb')
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(self.fasta) \
+                else b''
+        return self.mm
+
+    def get_record_range(self, row):
+        ## Returns (start, end) bytes of a record: from '>' of the header to the next header
+
+        mm = self.open()
+        offset = self.entries[row][2]
+        start = mm.rfind(b'\n', 0, offset - 1) + 1
+        end = mm.find(b'\n>', offset - 1)
+        return start, (end + 1) if end != -1 else len(mm)
+
+    def write_row(self, row, outf):
+        ## Copies record number row to binary output as it is in the fasta
+
+        start, end = self.get_record_range(row)
+        outf.write(memoryview(self.mm)[start: end])
+        if self.mm[end - 1: end] != b'\n':
+            outf.write(b'\n')
+
+    def write_record(self, name, outf):
+        ## Copies record with this ID to binary output as it is in the fasta
+
+        self.write_row(self.rows[name], outf)
+
+    def close(self):
+        if self.file is not None:
+            if isinstance(self.mm, mmap.mmap):
+                self.mm.close()
+            self.file.close()
+            self.file, self.mm = None, None
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', '--fasta', type=str, help='fasta file to index')
+    args = parser.parse_args()
+
+    entries = scan_fasta(args.fasta)
+    write_fai(entries, args.fasta + '.fai')
+    sys.stderr.write('Indexed {} sequences in {}\n'.format(len(entries), args.fasta + '.fai'))
+
+
+if __name__ == '__main__':
+    main()
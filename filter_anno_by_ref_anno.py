@@ -8,9 +8,14 @@ enough (by size) equivalent in the reference annotation
 
 import argparse
 import subprocess
-import numpy as np
 import tempfile
 import sys
+from bed12 import Bed12Record, read_bed12, write_bed12
+from bed12_index import BedIndex, is_index_file
+from bed12_store import is_bed12_store
+from bed12_intersect import get_blocks_overlap, intersect_bed12, intersect_index
+from io_utils import add_output_arguments, setup_stdout
+from profiling import add_profile_arguments, setup_profiler, track
 
 
 __author__ = "Ekaterina Osipova, 2021."
@@ -20,11 +25,8 @@ def read_anno_into_dict(anno):
     ## Reads bed12 annotation file into a dictionary
 
     anno_dict = {}
-    with open(anno, 'r') as inf:
-        for line in inf.readlines():
-            id = line.split()[3]
-            transc_info = line.rstrip()
-            anno_dict[id] = transc_info
+    for transc_info in track(read_bed12(anno)):
+        anno_dict[transc_info.name] = transc_info
     return anno_dict
 
 
@@ -49,47 +51,71 @@ def read_anno_into_dict(anno):
 
 
 def run_bedtools_intersect(file_a, file_b, fraction):
-    ## Runs bedtools intersect for two provided files to get pairs of overlapping transcripts
+    ## Runs bedtools intersect for two provided files; yields pairs of overlapping transcripts (a_bed, b_bed);
+    ## exits with bedtools' error if it fails
 
-    bedtools_cmd = 'bedtools intersect -split -a {} -b {} -wo -f {}'.format(file_a, file_b, fraction)
-    run_cmd = subprocess.Popen(bedtools_cmd, shell=True, stdout=subprocess.PIPE)
-    stdout_cmd, err = run_cmd.communicate()
-    a_b_transcript_pairs = stdout_cmd.decode().rstrip().split('\n')
-    return a_b_transcript_pairs
+    bedtools_cmd = ['bedtools', 'intersect', '-split', '-a', file_a, '-b', file_b, '-wo', '-f', str(fraction)]
+    # stderr goes to a file: a filled stderr pipe would block bedtools while its stdout is read
+    with tempfile.TemporaryFile('w+t') as errf:
+        try:
+            run_cmd = subprocess.Popen(bedtools_cmd, stdout=subprocess.PIPE, stderr=errf, universal_newlines=True)
+        except OSError as error:
+            sys.exit('Error! Can not run bedtools: {}; install it or use -e native'.format(error))
+        for transc_pair in run_cmd.stdout:
+            pair_fields = transc_pair.split()
+            if pair_fields:
+                yield Bed12Record.from_fields(pair_fields[:12]), Bed12Record.from_fields(pair_fields[12:24])
+        run_cmd.stdout.close()
+        if run_cmd.wait() != 0:
+            errf.seek(0)
+            sys.exit('Error! bedtools intersect failed (exit code {}): {}'.format(run_cmd.returncode,
+                                                                                 errf.read().strip()))
 
 
-def get_bases(starts, sizes, abs_start):
-    ## Converts provided intervals into lists of bases
+def run_native_intersect(file_a, b_anno_dict, fraction):
+    ## Same as run_bedtools_intersect, but in-process: b transcripts are taken from already read annotation;
+    ## file_a can be a bed12 index (bed12_index.py), then only transcripts overlapping b are read from it
 
-    list_2d = [list(range(abs_start + starts[i], abs_start + starts[i] + sizes[i])) for i in range(len(starts))]
-    return list(np.concatenate(list_2d))
+    if is_index_file(file_a):
+        a_index = BedIndex(file_a)
+        a_b_overlaps = intersect_index(a_index, b_anno_dict.values(), fraction)
+    else:
+        a_b_overlaps = intersect_bed12(read_bed12(file_a), b_anno_dict.values(), fraction)
+
+    for a_bed, b_bed, overlap in a_b_overlaps:
+        yield a_bed, b_bed
+
+
+def get_blocks(starts, sizes, abs_start):
+    ## Converts provided starts and sizes into a sorted list of intervals: [(x1, x2), (x3, x4), ..]
+
+    return sorted((abs_start + starts[i], abs_start + starts[i] + sizes[i]) for i in range(len(starts)))
 
 
 def check_a_b_overlap(transc_list, minr, maxr):
-    ## Checks a list of pairs of transcripts from bedtools intersect
+    ## Checks pairs of transcripts (a_bed, b_bed) from bedtools/native intersect
 
     good_transcripts = []
     dropped_transcripts = []
-    for transc_pair in transc_list:
-        a_bed = transc_pair.split()[:12]
-        b_bed = transc_pair.split()[12:25]
-        trans_name = b_bed[3]
-
-        a_abs_start = int(a_bed[6])
-        b_abs_start = int(b_bed[6])
-        a_starts = [int(i) for i in a_bed[11].rstrip(',').split(',')]
-        b_starts = [int(i) for i in b_bed[11].rstrip(',').split(',')]
-        a_block_sizes = [int(i) for i in a_bed[10].rstrip(',').split(',')]
-        b_block_sizes = [int(i) for i in b_bed[10].rstrip(',').split(',')]
-
-        a_bases = get_bases(a_starts, a_block_sizes, a_abs_start)
-        b_bases = get_bases(b_starts, b_block_sizes, b_abs_start)
-        bases_overlap = len(list(set(a_bases) & set(b_bases)))
-
-        big_delta = float(len(b_bases)) / float(bases_overlap)
-        small_delta = float(bases_overlap) / float(len(a_bases))
-        # print('a_bases min, max = {}, {}'.format(min(a_bases), max(a_bases)))
-        # print('b_bases min, max = {}, {}'.format(min(b_bases), max(b_bases)))
+    for a_bed, b_bed in track(transc_list):
+        trans_name = b_bed.name
+
+        a_abs_start = a_bed.cds_start
+        b_abs_start = b_bed.cds_start
+        a_starts = a_bed.block_starts
+        b_starts = b_bed.block_starts
+        a_block_sizes = a_bed.block_sizes
+        b_block_sizes = b_bed.block_sizes
+
+        a_blocks = get_blocks(a_starts, a_block_sizes, a_abs_start)
+        b_blocks = get_blocks(b_starts, b_block_sizes, b_abs_start)
+        bases_overlap = get_blocks_overlap(a_blocks, b_blocks)
+        if bases_overlap == 0:
+            dropped_transcripts.append(trans_name)
+            continue
+
+        big_delta = float(sum(b_block_sizes)) / float(bases_overlap)
+        small_delta = float(bases_overlap) / float(sum(a_block_sizes))
         # print('bases_overlap = {}'.format(bases_overlap))
         # print('big_delta = {}'.format(big_delta))
         # print('small_delta = {}'.format(small_delta))
@@ -106,43 +132,64 @@ def output_transcripts(transc_list, anno_dict, stdout=True):
 
     for trans in set(transc_list):
         if stdout:
-            print(anno_dict[trans])
+            write_bed12(anno_dict[trans])
         else:
             # sys.stderr(anno_dict[trans])
-            print(anno_dict[trans], file=sys.stderr)
+            print(anno_dict[trans].to_line(), file=sys.stderr)
 
 
 def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument('-r', '--refanno', type=str, help='reference annotation')
-    parser.add_argument('-a', '--anno', type=str, help='annotation to check with reference')
+    parser.add_argument('-r', '--refanno', type=str,
+                        help='reference annotation; bed12, its index from bed12_index.py or its store from '
+                             'bed12_store.py (index and store use native engine)')
+    parser.add_argument('-a', '--anno', type=str,
+                        help='annotation to check with reference; bed12 or its store from bed12_store.py (native engine)')
     parser.add_argument('-minr', '--minratio', type=float, default=0.3, help='min length of a transcript in fraction-ref to keep; default=0.3')
     parser.add_argument('-maxr', '--maxratio', type=float, default=1.5, help='min length of a transcript in fraction-ref to keep; default=1.5')
     parser.add_argument('-d', '--drop', action='store_true', help='output dropped transcripts into stderr')
+    parser.add_argument('-e', '--engine', type=str, choices=['bedtools', 'native'], default='bedtools',
+                        help='how to find overlapping transcripts: bedtools intersect or native (no bedtools needed); '
+                             'default=bedtools')
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    profiler = setup_profiler(args.profile, args.progress, args.cprofile)
+    setup_stdout(args.output, args.output_threads)
 
     ## bed12 format:
     ## chrom[0] start[1] end[2] name[3] score[4] strand[5] cds_start[6] cds_end[7] rgb[8] count[9]\
     ##  block_sizes[10] block_starts[11]
 
     ## Read annotation into a dictionary: {transc_id : transc_info}
-    query_anno_dict = read_anno_into_dict(args.anno)
-
-    ## Run bedtools intersect
-    a_b_transcript_pairs = run_bedtools_intersect(args.refanno, args.anno, 0.5)
-
-    ## Filter transcripts based on a_b pairs overlap
-    good_transcripts, dropped_transcripts = check_a_b_overlap(a_b_transcript_pairs, args.minratio, args.maxratio)
+    with profiler.phase('read_anno_into_dict'):
+        query_anno_dict = read_anno_into_dict(args.anno)
+        profiler.set_size('query_anno_dict', len(query_anno_dict))
+
+    ## Run bedtools intersect (or its native equivalent)
+    if (args.engine == 'native') or is_index_file(args.refanno) or is_bed12_store(args.refanno) or \
+            is_bed12_store(args.anno):
+        a_b_transcript_pairs = run_native_intersect(args.refanno, query_anno_dict, 0.5)
+    else:
+        a_b_transcript_pairs = run_bedtools_intersect(args.refanno, args.anno, 0.5)
+
+    ## Filter transcripts based on a_b pairs overlap (pairs are found while they are checked: one phase)
+    with profiler.phase('intersect_and_check_overlap'):
+        good_transcripts, dropped_transcripts = check_a_b_overlap(a_b_transcript_pairs, args.minratio, args.maxratio)
+        profiler.set_size('good_transcripts', len(good_transcripts))
+        profiler.set_size('dropped_transcripts', len(dropped_transcripts))
     all_transcripts = [k for k in query_anno_dict]
 
     ## Output filtered annotation
-    good_and_nooverlap_transcripts = list(set(all_transcripts) - set(dropped_transcripts))
-    output_transcripts(good_and_nooverlap_transcripts, query_anno_dict)
-
-    ## If requested, output dropped transcripts to stderr
-    if args.drop:
-        output_transcripts(dropped_transcripts, query_anno_dict, stdout=False)
+    with profiler.phase('output_transcripts'):
+        good_and_nooverlap_transcripts = list(set(all_transcripts) - set(dropped_transcripts))
+        profiler.add_records(len(good_and_nooverlap_transcripts))
+        output_transcripts(good_and_nooverlap_transcripts, query_anno_dict)
+
+        ## If requested, output dropped transcripts to stderr
+        if args.drop:
+            output_transcripts(dropped_transcripts, query_anno_dict, stdout=False)
 
 
 
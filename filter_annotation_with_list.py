@@ -2,7 +2,8 @@
 
 import sys
 import argparse
-from collections import defaultdict
+from id_stream import IdTransformer, read_id_set
+from io_utils import add_output_arguments, setup_stdout
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -16,27 +17,21 @@ def main():
     parser.add_argument('-c', '--column', type=int, default=4, help='column with transcript IDs; default: 4 (bed12)')
     parser.add_argument('-s', '--suffix', action='store_true', help='specify if anno IDs have .version youd like to remove')
     parser.add_argument('-b', '--but', action='store_true', help='ALL-BUT-LIST: specify if you want to filter OUT IDs from the list')
+    add_output_arguments(parser)
     args = parser.parse_args()
-
-    ## Read IDs into a list
-    id_list = [] 
-    with open(args.list, 'r') as inf:
-        for line in inf.readlines():
-           id_list.append(line.rstrip())
-    
-    ## Read annotation, output only IDs present in the list 
-    column = args.column
-    with open(args.annotation, 'r') as inf:
-        for line in inf.readlines():
-            anno_id = line.rstrip().split('\t')[column - 1]
-            if args.suffix:
-                anno_id = anno_id.split('.')[0]
-            if args.but:
-                if anno_id not in id_list:
-                    print(line.rstrip())
-            else:
-                if anno_id in id_list:
-                    print(line.rstrip())
+    setup_stdout(args.output, args.output_threads)
+
+    ## Read IDs into a set
+    id_set = read_id_set(args.list)
+
+    ## Read annotation, output only IDs present in the list (or absent from it)
+    transformer = IdTransformer(field=args.column, strip_version=args.suffix)
+    if args.but:
+        transformer.exclude(id_set)
+    else:
+        transformer.include(id_set)
+    for line in transformer.transform_file(args.annotation):
+        print(line)
 
 
 
@@ -8,36 +8,37 @@ it goes through the bed/genePred file and filters out entries not present in the
 """
 
 import argparse
-from Bio import SeqIO
-from collections import defaultdict
+from fasta_index import FastaIndex
+from id_stream import FORMAT_FIELDS, IdTransformer
+from io_utils import add_output_arguments, setup_stdout
 
 __author__ = "Ekaterina Osipova, 2019."
 
 
-parser = argparse.ArgumentParser()
-parser.add_argument('-a', '--anno', type=str, help='annotation file to filter in bed/gp format')
-parser.add_argument('-f', '--fasta', type=str, help='fasta file with predicted gene models')
-parser.add_argument('-gp', '--gp', action='store_true', help='if specified, expects annotation in genePred format')
-args = parser.parse_args()
+def read_fasta_headers(fasta):
+    ## Makes a set of fasta headers (sequence IDs, up to the first space) from the fasta index
 
+    return set(FastaIndex(fasta).names())
 
-## Go through fasta and make a list of headers
-fastaEntries = []
-sequences = SeqIO.parse(open(args.fasta), 'fasta')
-for entry in sequences:
-    fastaEntries.append(entry.id)
 
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-a', '--anno', type=str, help='annotation file to filter in bed/gp format')
+    parser.add_argument('-f', '--fasta', type=str, help='fasta file with predicted gene models')
+    parser.add_argument('-gp', '--gp', action='store_true', help='if specified, expects annotation in genePred format')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
-## Go through the annotation file, filter out all entries that are not in the fastaEnries list
-with open(args.anno, 'r') as inf:
-    for line in inf.readlines():
-        if args.gp:
-            if line.split('\t')[0] in fastaEntries:
-                print(line.rstrip())
-        else:
-            if line.split('\t')[3] in fastaEntries:
-                print(line.rstrip())
-
+    ## Go through fasta and make a set of headers
+    fasta_entries = read_fasta_headers(args.fasta)
 
+    ## Go through the annotation file, filter out all entries that are not in the fasta_entries
+    field = FORMAT_FIELDS['genepred'] if args.gp else FORMAT_FIELDS['bed12']
+    for line in IdTransformer(field).include(fasta_entries).transform_file(args.anno):
+        print(line)
 
 
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,15 @@
 This script parses blast hits file (outfmt 6), filters hits of only allowed species, outputs N best hits
 """
 
+import os
 import sys
 import argparse
 from collections import defaultdict
+import heapq
+from itertools import groupby
+from operator import itemgetter
+from io_utils import add_output_arguments, open_input, setup_stdout
+from profiling import add_profile_arguments, setup_profiler, track
 
 __author__ = "Ekaterina Osipova, 2020."
 
@@ -17,8 +23,8 @@ def read_species_file(species_file):
     ## Reads species file and makes a list of allowed species codes: [CHICK, URILO, ..]
 
     species_codes = []
-    with open(species_file, 'r') as species_inf:
-        for line in species_inf.readlines():
+    with open_input(species_file) as species_inf:
+        for line in species_inf:
             species_codes.append(line.split('\t')[0])
     return species_codes
 
@@ -40,64 +46,132 @@ def filter_blast_hits(blast_hits, species_codes):
 '''
 
 
-def filter_blast_hits(blast_hits):
-    ## Reads blast outfmt6 file into a dict;
+def filter_blast_hits(blast_hits, species_codes=None):
+    ## Reads blast outfmt6 file line by line; yields (qseqid, bitscore, hit_line); keeps only allowed species if given
 
-    blast_hits_dict = defaultdict(list)
-    with open(blast_hits, 'r') as inf:
-        for line in inf.readlines():
-            qseqid = line.split('\t')[0]
-            entry_info = '\t'.join(line.split('\t')[1:]).rstrip()
-            blast_hits_dict[qseqid].append(entry_info)
-    return blast_hits_dict
+    with open_input(blast_hits) as inf:
+        for line in inf:
+            hit = line.rstrip()
+            if hit:
+                qseqid, rseqid, _ = hit.split('\t', 2)
+                if (species_codes is None) or (rseqid.split('_')[-1] in species_codes):
+                    yield qseqid, float(hit.rsplit(None, 1)[-1]), hit
+
+
+class TopHits(object):
+    ## Keeps n best-scoring (bit-score) hits of one query in a bounded min-heap; n=0 keeps all hits
+
+    __slots__ = ('n', 'heap', 'count')
 
+    def __init__(self, n):
+        self.n = n
+        self.heap = []
+        self.count = 0
 
-def get_best_hits(blast_hits_dict, n):
-    ## Gets best-scoring (considers bit-score) hits for each query entry
+    def add(self, bitscore, hit):
+        ## Adds a hit; of hits with equal bit-score the earlier ones are kept (-count)
+
+        self.count += 1
+        item = (bitscore, -self.count, hit)
+        if (self.n == 0) or (len(self.heap) < self.n):
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def best(self):
+        ## Returns hits sorted from the best to the worst
+
+        return [item[2] for item in sorted(self.heap, reverse=True)]
+
+
+def get_best_hits(blast_hits, n, species_codes=None):
+    ## Gets best-scoring (considers bit-score) hits for each query entry; hits of a query can be anywhere in the file
 
     best_hits_dict = {}
-    for qseqid in blast_hits_dict:
-        hits_list = blast_hits_dict[qseqid]
-        hits_list.sort(key = lambda x: float(x.split()[-1]), reverse = True)
-        if (n == 0) or (len(hits_list) < n):
-            best_hits_dict[qseqid] = hits_list
-        else:
-            best_hits_dict[qseqid] = hits_list[ :n]
-    return best_hits_dict
+    for qseqid, bitscore, hit in filter_blast_hits(blast_hits, species_codes):
+        if qseqid not in best_hits_dict:
+            best_hits_dict[qseqid] = TopHits(n)
+        best_hits_dict[qseqid].add(bitscore, hit)
+
+    for qseqid in best_hits_dict:
+        yield qseqid, best_hits_dict[qseqid].best()
 
 
-def print_best_hits(best_hits_dict):
+def get_best_hits_grouped(blast_hits, n, species_codes=None):
+    ## Same as get_best_hits, but for input grouped by query (as blast outputs it): keeps only hits of the current query
+
+    seen_queries = set()
+    for qseqid, query_hits in groupby(filter_blast_hits(blast_hits, species_codes), key=itemgetter(0)):
+        if qseqid in seen_queries:
+            sys.exit('Error! Blast hits are not grouped by query: {} shows up again'.format(qseqid))
+        seen_queries.add(qseqid)
+
+        top_hits = TopHits(n)
+        for _, bitscore, hit in query_hits:
+            top_hits.add(bitscore, hit)
+        yield qseqid, top_hits.best()
+
+
+def is_store(path):
+    ## Checks if path is a columnar hits store (blast_store.py); blast_store and numpy are imported only for a directory
+
+    if not os.path.isdir(path):
+        return False
+    from blast_store import is_blast_store
+    return is_blast_store(path)
+
+
+def get_best_hits_store(store_dir, n, species_codes=None):
+    ## Same as get_best_hits for a columnar hits store (blast_store.py): species filter and top-n are numpy operations
+
+    from blast_store import BlastStore
+    store = BlastStore(store_dir)
+    mask = store.mask_species(species_codes) if species_codes is not None else None
+    rows = store.top_n_per_query(n, mask)
+    query_codes = store.query_codes[rows]
+    for query_code, query_rows in groupby(zip(query_codes.tolist(), rows.tolist()), key=itemgetter(0)):
+        yield store.query_names[query_code].decode(), [store.get_line(row) for _, row in query_rows]
+
+
+def print_best_hits(best_hits):
     ## Outputs n best hits to stdout
 
-    for qseqid in best_hits_dict:
-        for hit in best_hits_dict[qseqid]:
-            print('{}\t{}'.format(qseqid, hit))
+    for qseqid, hits in track(best_hits):
+        for hit in hits:
+            print(hit)
     return
 
 
 def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument('-b', '--blasthits', type=str, help='blast hits output in format 6')
-    #parser.add_argument('-s', '--species', type=str, help='species file, latin names')
+    parser.add_argument('-b', '--blasthits', type=str, help='blast hits output in format 6 or its store (blast_store.py)')
+    parser.add_argument('-s', '--species', type=str, help='species file, allowed species codes; default: all species')
     parser.add_argument('-n', '--nbesthits', type=int, default=0, help='number of best hits to return; default: all (=0)')
+    parser.add_argument('-g', '--grouped', action='store_true',
+                        help='streaming mode: hits are grouped by query (as blast outputs them), keep only one query in memory')
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    profiler = setup_profiler(args.profile, args.progress, args.cprofile)
+    setup_stdout(args.output, args.output_threads)
 
 
     ## Read file with allowed species codes
-    #species_codes = read_species_file(args.species)
-
-    ## Filter blast hits only for allowed species
-    #blast_hits_dict = filter_blast_hits(args.blasthits, species_codes)
-    
-    ## Read blast hits file
-    blast_hits_dict = filter_blast_hits(args.blasthits)
-
-    ## Get number of best hits specified by user
-    best_hits_dict = get_best_hits(blast_hits_dict, args.nbesthits)
-
-    ## Output best hits for each query entry to stdout
-    print_best_hits(best_hits_dict)
+    species_codes = set(read_species_file(args.species)) if args.species else None
+
+    ## Read blast hits file (only allowed species) and get number of best hits specified by user
+    if is_store(args.blasthits):
+        best_hits = get_best_hits_store(args.blasthits, args.nbesthits, species_codes)
+    elif args.grouped:
+        best_hits = get_best_hits_grouped(args.blasthits, args.nbesthits, species_codes)
+    else:
+        best_hits = get_best_hits(args.blasthits, args.nbesthits, species_codes)
+
+    ## Output best hits for each query entry to stdout (hits are read and filtered while they are output: one phase;
+    ## records are queries)
+    with profiler.phase('get_and_print_best_hits'):
+        print_best_hits(best_hits)
 
 
 if __name__ == '__main__':
@@ -10,9 +10,12 @@ in blast file or coming from other species to species from the provided list
 
 
 import argparse
-from Bio import SeqIO
+from array import array
 from collections import defaultdict
 import sys
+from fasta_index import FastaIndex, is_fasta
+from filter_blast_hits import is_store
+from io_utils import add_output_arguments, open_input, setup_stdout
 
 __author__ = "Ekaterina Osipova, 2020."
 
@@ -21,8 +24,8 @@ def make_allowed_species_list(species_file):
     ## Reads species file and makes a list of allowed species codes: [CHICK, URILO, ..]
 
     species_codes = []
-    with open(species_file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(species_file) as inf:
+        for line in inf:
             species_codes.append(line.split('\t')[0])
     return species_codes
 
@@ -32,50 +35,180 @@ def read_blast_hits(blast_file, species_codes, idmin, qcov, rcov):
     ## qseqid, rseqid, pid, alilen, mism, gapop, qst, qend, rst, rend, eval, bitscore
 
     blast_dict = defaultdict(list)
-    with open(blast_file, 'r') as blastOut:
-        for line in blastOut.readlines():
-            qseqid = line.split('\t')[0]
-            pid = int(line.split('\t')[2])
-            ali_length = float(line.split('\t')[3])
-            qEnd = float(line.split('\t')[7])
-            rEnd = float(line.split('\t')[9])
-
-            ref_code = (line.split('\t')[1]).split('_')[-1]
+    with open_input(blast_file) as blastOut:
+        for line in blastOut:
+            elements = line.split('\t')
+            if len(elements) < 12:
+                continue
+            qseqid = elements[0]
+            pid = float(elements[2])
+            ali_length = float(elements[3])
+            qEnd = float(elements[7])
+            rEnd = float(elements[9])
+
+            ref_code = elements[1].split('_')[-1]
             if ref_code in species_codes:
                 if (pid >= idmin) and (ali_length >= qcov * qEnd) and (ali_length >= rcov * rEnd):
-                    entry_info = '\t'.join(line.split('\t')[1:])
+                    entry_info = '\t'.join(elements[1:])
                     blast_dict[qseqid].append(entry_info)
     return blast_dict
 
 
+def read_blast_store(store_dir, species_codes, idmin, qcov, rcov):
+    ## Same quality check as read_blast_hits for a columnar hits store (blast_store.py), done with numpy masks;
+    ## returns set of queries with at least one good hit
+
+    from blast_store import BlastStore
+    store = BlastStore(store_dir)
+    mask = store.mask_species(species_codes) & store.mask_identity(idmin) & store.mask_coverage(qcov, rcov)
+    return store.queries(mask)
+
+
+def read_seq_lengths(file):
+    ## Reads sequence lengths into a dictionary {seq_id: length} from a fasta file (through its .fai index)
+    ## or from a table: seq_id<TAB>length[<TAB>..] (e.g. samtools faidx .fai)
+
+    if is_fasta(file):
+        return FastaIndex(file).get_lengths()
+    seq_lengths = {}
+    with open_input(file) as inf:
+        for line in inf:
+            if line.strip():
+                elements = line.split('\t')
+                seq_lengths[elements[0]] = int(elements[1])
+    return seq_lengths
+
+
+def read_blast_chunks(blast_file, species_codes, idmin, chunk_size=1000000):
+    ## Reads blast outfmt6 hits grouped by query in chunks of ~chunk_size HSPs, never splitting a query;
+    ## keeps HSPs of allowed species and identity; yields (query_names, subject_names, query_codes, subject_codes,
+    ## qstart, qend, sstart, send) with names dictionary-encoded within a chunk
+
+    import numpy as np
+
+    def new_chunk():
+        return {}, {}, [array('l') for i in range(6)]
+
+    def make_chunk(query_dict, subject_dict, columns):
+        return (list(query_dict), list(subject_dict)) + tuple(np.frombuffer(column, dtype=np.int_) for column in columns)
+
+    query_dict, subject_dict, columns = new_chunk()
+    seen_queries = set()
+    last_qseqid = None
+    n_hsps = 0
+    with open_input(blast_file) as blastOut:
+        for line in blastOut:
+            elements = line.split('\t')
+            if len(elements) < 12:
+                continue
+            qseqid, rseqid = elements[0], elements[1]
+            if qseqid != last_qseqid:
+                if qseqid in seen_queries:
+                    sys.exit('Error! Blast hits are not grouped by query: {} shows up again'.format(qseqid))
+                seen_queries.add(qseqid)
+                last_qseqid = qseqid
+                if n_hsps >= chunk_size:
+                    yield make_chunk(query_dict, subject_dict, columns)
+                    query_dict, subject_dict, columns = new_chunk()
+                    n_hsps = 0
+
+            if (rseqid.split('_')[-1] in species_codes) and (float(elements[2]) >= idmin):
+                query_code = query_dict.setdefault(qseqid, len(query_dict))
+                subject_code = subject_dict.setdefault(rseqid, len(subject_dict))
+                for column, value in zip(columns, (query_code, subject_code, elements[6], elements[7],
+                                                   elements[8], elements[9])):
+                    column.append(int(value))
+                n_hsps += 1
+    if n_hsps:
+        yield make_chunk(query_dict, subject_dict, columns)
+
+
+def get_covered_queries(query_names, subject_names, pairs, query_lengths, subject_lengths, qcov, rcov):
+    ## Returns set of queries having a subject which covers at least qcov of the query and rcov of the subject
+    ## by all HSPs together; pairs: output of blast_store.pair_coverage
+
+    import numpy as np
+    pair_queries, pair_subjects, query_covered, subject_covered = pairs
+    query_lens = np.array([query_lengths.get(name, 0) for name in query_names], dtype=np.int64)[pair_queries]
+    subject_lens = np.array([subject_lengths.get(name, 0) for name in subject_names], dtype=np.int64)[pair_subjects]
+    n_unknown = int(np.count_nonzero(subject_lens == 0))
+    if n_unknown:
+        sys.stderr.write('Warning! {} hit pairs have targets of unknown length; skipped\n'.format(n_unknown))
+
+    good = (query_lens > 0) & (subject_lens > 0) & (query_covered >= qcov * query_lens) & \
+           (subject_covered >= rcov * subject_lens)
+    return set(query_names[code] for code in np.unique(pair_queries[good]))
+
+
+def read_blast_hits_tiled(blast_file, species_codes, idmin, qcov, rcov, query_lengths, subject_lengths):
+    ## Reads blast outfmt6 hits (grouped by query) chunk by chunk; coverage of a query-subject pair is the union of
+    ## all its HSPs divided by true query/subject lengths; returns set of queries passing quality check
+
+    from blast_store import pair_coverage
+    good_queries = set()
+    for query_names, subject_names, query_codes, subject_codes, qstart, qend, sstart, send in \
+            read_blast_chunks(blast_file, species_codes, idmin):
+        pairs = pair_coverage(query_codes, subject_codes, qstart, qend, sstart, send)
+        good_queries.update(get_covered_queries(query_names, subject_names, pairs, query_lengths, subject_lengths,
+                                                qcov, rcov))
+    return good_queries
+
+
+def read_blast_store_tiled(store_dir, species_codes, idmin, qcov, rcov, query_lengths, subject_lengths):
+    ## Same as read_blast_hits_tiled for a columnar hits store (blast_store.py)
+
+    from blast_store import BlastStore
+    store = BlastStore(store_dir)
+    pairs = store.pair_coverage(store.mask_species(species_codes) & store.mask_identity(idmin))
+    query_names = [name.decode() for name in store.query_names]
+    subject_names = [name.decode() for name in store.subject_names]
+    return get_covered_queries(query_names, subject_names, pairs, query_lengths, subject_lengths, qcov, rcov)
+
+
 def filter_fasta(fasta_file, blast_dict, lenmin):
-    ## Goes through fasta file and checks each entry for presence in the blast_dictionary (later: for quality!)
+    ## Goes through fasta index and checks each entry for presence in the blast_dictionary (or for its length);
+    ## good entries are copied to stdout as they are in the fasta
 
-    sequences = SeqIO.parse(open(fasta_file), 'fasta')
-    for entry in sequences:
-        header, seq = entry.id, str(entry.seq)
-        if (header in blast_dict) or (len(seq) >= lenmin):
-            print('>{}'.format(header))
-            print(seq)
+    fasta_index = FastaIndex(fasta_file)
+    sys.stdout.flush()
+    for row, (header, length, offset, line_bases, line_width) in enumerate(fasta_index.entries):
+        if (header in blast_dict) or ((lenmin is not None) and (length >= lenmin)):
+            fasta_index.write_row(row, sys.stdout.buffer)
+    fasta_index.close()
 
 
 def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument('-b', '--blast', type=str, help='blast output in outfmt 6 format')
+    parser.add_argument('-b', '--blast', type=str, help='blast output in outfmt 6 format or its store (blast_store.py)')
     parser.add_argument('-f', '--fasta', type=str, help='fasta file with predicted gene models')
     parser.add_argument('-s', '--species', type=str, help='species file, latin names')
     parser.add_argument('-l', '--lenmin', type=int, help='min required length of a predicted protein if not found in db')
     parser.add_argument('-id', '--idmin', type=int, default=50, help='min required % of identity between query and target')
     parser.add_argument('-qcov', '--qcov', type=float, default=0.75, help='min required query coverage in a hit')
     parser.add_argument('-rcov', '--rcov', type=float, default=0.5, help='min required target coverage in a hit')
+    parser.add_argument('-d', '--dblengths', type=str,
+                        help='target lengths: db fasta or table id<TAB>length (.fai); if given, coverage is computed '
+                             'from all HSPs of a query-target pair and true query/target lengths; '
+                             'blast hits have to be grouped by query (as blast outputs them)')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
     ## Read species file and make a list of allowed species codes: [CHICK, URILO, ..]
-    species_codes = make_allowed_species_list(args.species)
-
-    ## Read blast outfmt6 file into a dictionary
-    blast_dict = read_blast_hits(args.blast, species_codes, args.idmin, args.qcov, args.rcov)
+    species_codes = set(make_allowed_species_list(args.species))
+
+    ## Read blast outfmt6 file (or its store) into a dictionary of queries with good hits
+    if args.dblengths:
+        query_lengths = read_seq_lengths(args.fasta)
+        subject_lengths = read_seq_lengths(args.dblengths)
+        read_tiled = read_blast_store_tiled if is_store(args.blast) else read_blast_hits_tiled
+        blast_dict = read_tiled(args.blast, species_codes, args.idmin, args.qcov, args.rcov,
+                                query_lengths, subject_lengths)
+    elif is_store(args.blast):
+        blast_dict = read_blast_store(args.blast, species_codes, args.idmin, args.qcov, args.rcov)
+    else:
+        blast_dict = read_blast_hits(args.blast, species_codes, args.idmin, args.qcov, args.rcov)
 
     ## Check each fasta if it has a blast hit (and quality); output to stdout
     filter_fasta(args.fasta, blast_dict, args.lenmin)
@@ -8,6 +8,7 @@ ignores color and score fields.
 
 import argparse
 import sys
+from bed12 import read_bed12
 
 __author__ = "Ekaterina Osipova, 2019."
 
@@ -23,14 +24,12 @@ fileCount = 0
 
 for file in [args.file1, args.file2]:
     fileCount += 1
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
-            transcrName, score, color = line.split()[3], line.split()[4], line.split()[8]
-            transcrInfo = '\t'.join(line.split()[:3] + line.split()[5:8] + line.split()[9:])
-            if fileCount == 1:
-                transcDict1[transcrInfo] = (transcrName, score, color)
-            else:
-                transcDict2[transcrInfo] = (transcrName, score, color)
+    for transcr in read_bed12(file):
+        transcrInfo = transcr.structure()
+        if fileCount == 1:
+            transcDict1[transcrInfo] = transcr
+        else:
+            transcDict2[transcrInfo] = transcr
 
 #transcNotInDict1 = { k: transcDict2[k] for k in set(transcDict2) - set(transcDict1)}
 #transcNotInDict2 = { k: transcDict1[k] for k in set(transcDict1) - set(transcDict2)}
@@ -46,9 +45,5 @@ for dict in [transcDict1, transcDict2]:
         otherDict = transcDict1
     for transcrInfo in dict:
         if transcrInfo not in otherDict:
-            transcrNames = dict[transcrInfo]
-            newBedLine = '\t'.join(transcrInfo.split()[:3]) + '\t' + transcrNames[0] + '\t' + \
-                         transcrNames[1] + '\t' + '\t'.join(transcrInfo.split()[3:6]) + '\t' + \
-                         transcrNames[2] + '\t' + '\t'.join(transcrInfo.split()[6:])
-            print(newBedLine)
+            print(dict[transcrInfo].to_line())
 
@@ -11,52 +11,26 @@ getOverlapingTrascripts.py -f uniq.db.ref1.ncbi.bed uniq.db.ref2.ncbi.bed > uniq
 
 
 import argparse
-from collections import defaultdict
 import sys
+from bed12_dedup import count_structures
+from io_utils import add_output_arguments, setup_stdout
 
 __author__ = "Ekaterina Osipova, 2019."
 
 
 
 def read_all_annotations(bedList):
-    ## Reads all transcripts of all annotation files into 2D list
+    ## Reads all transcripts of all annotation files in one pass: keeps one entry per unique structure
+    ## (first seen name, score, color) and the number of files it's present in
 
-    # initiate a 2D list to store lists of elements from each file
-    # allTranscripts_allFiles = []
+    return count_structures(bedList)
 
-    # initiate a dictionary to store the part of a transcript that is allowed to vary
-    transcripts_dict = defaultdict(list)
 
-    for bed in bedList:
-        with open(bed, 'r') as inf:
-            transcripts_oneFile = []
-            for line in inf.readlines():
-                transcrName, score, color = line.split()[3], line.split()[4], line.split()[8]
-                transcrInfo = '\t'.join(line.split()[:3] + line.split()[5:8] + line.split()[9:])
+def print_overlapping_transcripts(transcripts_table, overlap):
+    ## Outputs transcripts present in at least overlap files with the first available variable part
 
-                # store essential info for each transcript of this file in the list
-                transcripts_oneFile.append(transcrInfo)
-
-                # at the same time keep corresponding variable part of a transcript in the dictionary
-                transcripts_dict[transcrInfo].append((transcrName, score, color))
-
-            # add essential (that suppose to be identical) transcript info to the allTranscrpts 2D list
-            # allTranscripts_allFiles.append(transcripts_oneFile)
-    return transcripts_dict
-    # return allTranscripts_allFiles, transcripts_dict
-
-
-def print_overlapping_transcripts(transcripts_dict, overlap):
-    ## Outputs elements of the overlap_transcripts getting first available variable part from the transcripts_dict
-
-    for transcrInfo in transcripts_dict:
-        transcrVars = transcripts_dict[transcrInfo]
-        if len(transcrVars) >= overlap:
-            # combine a new line
-            newBedLine = '\t'.join(transcrInfo.split()[:3]) + '\t' + transcrVars[0][0] + '\t' + \
-                         transcrVars[0][1] + '\t' + '\t'.join(transcrInfo.split()[3:6]) + '\t' + \
-                         transcrVars[0][2] + '\t' + '\t'.join(transcrInfo.split()[6:])
-            print(newBedLine)
+    for transcr_line in transcripts_table.lines(min_files=overlap):
+        print(transcr_line)
 
 
 def main():
@@ -65,11 +39,12 @@ def main():
     parser.add_argument('-f', '--filelist', nargs='*', type=str, help='list of bed12 files to extract identical\
                                                           overlapping transcripts from. Needs at least TWO files')
     parser.add_argument('-n', '--number', type=int, help='transcript is present in AT LEAST this number of files')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
-    ## Read all annotation files into 2D list
-    # allTranscripts_allFiles, transcripts_dict = read_all_annotations(args.filelist)
-    transcripts_dict = read_all_annotations(args.filelist)
+    ## Read all annotation files into a table of unique structures
+    transcripts_table = read_all_annotations(args.filelist)
 
     ## Get overlapping transcripts
     # overlap_transcripts = set(allTranscripts_allFiles[0]).intersection(*allTranscripts_allFiles)
@@ -77,7 +52,7 @@ def main():
     ## Output overlapping transcripts
     # print_overlapping_transcripts(overlap_transcripts, transcripts_dict)
     overlap = args.number
-    print_overlapping_transcripts(transcripts_dict, overlap)
+    print_overlapping_transcripts(transcripts_table, overlap)
 
 
 if __name__ == '__main__':
@@ -7,6 +7,10 @@
 
 import argparse
 import sys
+from bed12 import write_bed12
+from bed12_dedup import StructureTable
+from io_utils import add_output_arguments, setup_stdout
+from profiling import add_profile_arguments, setup_profiler, track
 
 __author__ = "Ekaterina Osipova, 2019."
 
@@ -14,61 +18,23 @@ __author__ = "Ekaterina Osipova, 2019."
 def get_uniq_transcripts(bed_file, a_score, a_color):
     ## Makes a dictionary of unique transcripts considering which fields are important
 
-    overlap_transcripts = {}
-    with open(bed_file, 'r') as inf:
-        for line in inf.readlines():
-            transc_name, score, color = line.split('\t')[3], line.split('\t')[4], line.split('\t')[8]
-
-            # get transcript info considering which fields are important
-            if a_color and a_score:
-                # both score and color are considered
-                transc_info = '\t'.join(line.split('\t')[:3] + line.split('\t')[4:])
-            elif a_color and not a_score:
-                # only color is considered
-                transc_info = '\t'.join(line.split('\t')[:3] + line.split('\t')[5:])
-            elif a_score and not a_color:
-                # only score is considered
-                transc_info = '\t'.join(line.split('\t')[:3] + line.split('\t')[4:8] + line.split('\t')[9:])
-            else:
-                # both color and score are ignored
-                transc_info = '\t'.join(line.split('\t')[:3] + line.split('\t')[5:8] + line.split('\t')[9:])
-
-
-            if (transc_info in overlap_transcripts):
-                sys.stderr.write('DUPLICATION: {}\t{}'.format(transc_name, '\t'.join(transc_info.split('\t'))+'\n'))
-            else:
-                overlap_transcripts[transc_info] = (transc_name, score, color)
+    # transcript structure fingerprints consider score/color only if requested
+    overlap_transcripts = StructureTable(score=a_score, color=a_color)
+    overlap_transcripts.add_file(bed_file, on_duplicate=report_duplication)
     return  overlap_transcripts
 
 
-def output_uniq_transcripts(overlap_transcripts, a_color, a_score):
-    ## Outputs unique elements of the overlap_transcripts dictionary
-
-    for transc_info in overlap_transcripts:
-        transc_var_parts = overlap_transcripts[transc_info]
-
-        # assemble a new annotation line considering fields excluded before
-        if a_color and a_score:
-            # both score and color are considered
-            newBedLine = '\t'.join(transc_info.split('\t')[:3]) + '\t' + transc_var_parts[0] + '\t' + \
-                         transc_var_parts[1] + '\t' + '\t'.join(transc_info.split('\t')[4:7]) + '\t' + \
-                         transc_var_parts[2] + '\t' + '\t'.join(transc_info.split('\t')[8:])
-        elif a_color and not a_score:
-            # only color is considered
-            newBedLine = '\t'.join(transc_info.split('\t')[:3]) + '\t' + transc_var_parts[0] + '\t' + \
-                         transc_var_parts[1] + '\t' + '\t'.join(transc_info.split('\t')[3:6]) + '\t' + \
-                         transc_var_parts[2] + '\t' + '\t'.join(transc_info.split('\t')[7:])
-        elif a_score and not a_color:
-            # only score is considered
-            newBedLine = '\t'.join(transc_info.split('\t')[:3]) + '\t' + transc_var_parts[0] + '\t' + \
-                         transc_var_parts[1] + '\t' + '\t'.join(transc_info.split('\t')[4:7]) + '\t' + \
-                         transc_var_parts[2] + '\t' + '\t'.join(transc_info.split('\t')[7:])
-        else:
-            # both color and score are ignored
-            newBedLine = '\t'.join(transc_info.split('\t')[:3]) + '\t' + transc_var_parts[0] + '\t' + \
-                         transc_var_parts[1] + '\t' + '\t'.join(transc_info.split('\t')[3:6]) + '\t' + \
-                         transc_var_parts[2] + '\t' + '\t'.join(transc_info.split('\t')[6:])
-        print(newBedLine.rstrip('\n'))
+def report_duplication(transc):
+    ## Reports a transcript with already seen structure to stderr
+
+    sys.stderr.write('DUPLICATION: {}\t{}\n'.format(transc.name, transc.to_line()))
+
+
+def output_uniq_transcripts(overlap_transcripts):
+    ## Outputs unique elements of the overlap_transcripts table; keeps name, score and color of the first one
+
+    for fingerprint, transc in track(overlap_transcripts.records()):
+        write_bed12(transc)
 
 
 def main():
@@ -79,13 +45,20 @@ def main():
                         help='if specified, RGB column must also be identical in duplicated transcripts')
     parser.add_argument('-s', '--score', action='store_true',
                         help='if specified, score column must also be identical in duplicated transcripts')
+    add_output_arguments(parser)
+    add_profile_arguments(parser)
     args = parser.parse_args()
+    profiler = setup_profiler(args.profile, args.progress, args.cprofile)
+    setup_stdout(args.output, args.output_threads)
 
     ## Make a dictionary of unique transcripts
-    overlap_transcripts = get_uniq_transcripts(args.filebed, args.score, args.color)
-    
+    with profiler.phase('get_uniq_transcripts'):
+        overlap_transcripts = get_uniq_transcripts(args.filebed, args.score, args.color)
+        profiler.set_size('overlap_transcripts', len(overlap_transcripts))
+
     ## Print unique transcripts
-    output_uniq_transcripts(overlap_transcripts, args.score, args.color)
+    with profiler.phase('output_uniq_transcripts'):
+        output_uniq_transcripts(overlap_transcripts)
 
 
 if __name__ == "__main__":
@@ -5,8 +5,8 @@
 
 import argparse
 from collections import defaultdict
-import numpy as np
 import sys
+from io_utils import add_output_arguments, open_input, setup_stdout
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -16,58 +16,85 @@ def read_into_dict(file):
     ## Read isoformes into dict
 
     iso_dict = defaultdict(list)
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(file) as inf:
+        for line in inf:
            gene = line.rstrip().split()[0]
            trans = line.rstrip().split()[1]
            iso_dict[gene].append(trans)
     return iso_dict
 
 
-def read_anno_values(anno, field, col):
-    ## Reads annotation file into a dictionary; consideres IDs to be in field position
+def read_anno_values(anno, field, cols):
+    ## Reads annotation file into a dictionary; consideres IDs to be in field position: {ID: [value_col1, value_col2, ..]}
 
     anno_dict = {}
-    with open(anno, 'r') as inf:
-        for line in inf.readlines():
-            id = line.split()[field - 1]
-            value = line.split()[col - 1]
-            anno_dict[id] = value
+    with open_input(anno) as inf:
+        for line in inf:
+            line_elements = line.split()
+            if line_elements:
+                anno_dict[line_elements[field - 1]] = [line_elements[col - 1] for col in cols]
     return anno_dict
 
 
 def assign_values_to_genes(iso_dict, anno_dict):
-    ## Assigns all values from each isoform to a gene
-
-    value_gene_dict = {}
+    ## Collects values of all isoforms of each gene into columnar arrays:
+    ## genes - gene names (genes without values are skipped), gene_codes - gene index for each isoform value row,
+    ## values - float array: isoform rows x value columns
+
+    import numpy as np
+    genes = []
+    gene_codes = []
+    iso_values = []
     for gene in iso_dict:
-        iso_ids = iso_dict[gene]
-        iso_values = []
-        for i in iso_ids:
+        gene_code = len(genes)
+        for i in iso_dict[gene]:
             if i in anno_dict:
+                gene_codes.append(gene_code)
                 iso_values.append(anno_dict[i])
-        if iso_values:
-            value_gene_dict[gene] = iso_values
-    return value_gene_dict
-
-
-def output_gene_stats(value_gene_dict, stats):
-    ## Calculates requested stats; prints
-
-    for gene in value_gene_dict:
-        all_values = [float(i) for i in list(value_gene_dict[gene])]
-        if stats == 'all':
-            results = ','.join([str(i) for i in all_values])
-        elif stats == 'mean':
-            results = mean(all_values)
-        elif stats == 'std':
-            results = np.var(all_values)
-        elif stats == 'max':
-            results = max(all_values)
-        else:
-            print('{} is not an appropriate value for stats!'.format(stats))
-            sys.exit(1)
-        print('{}\t{}'.format(gene, results))
+        if gene_codes and (gene_codes[-1] == gene_code):
+            genes.append(gene)
+    values = np.array(iso_values, dtype=float)
+    return genes, np.array(gene_codes, dtype=np.int64), values
+
+
+def calculate_gene_stats(gene_codes, values, n_genes, stats):
+    ## Calculates requested stats for all genes at once with grouped reductions;
+    ## returns list of columns: for each value column, for each stat -> n_genes results
+
+    import numpy as np
+    if n_genes == 0:
+        return []
+
+    # isoform rows are already grouped by gene; find where each gene starts
+    counts = np.bincount(gene_codes, minlength=n_genes)
+    gene_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    results = []
+    for col in range(values.shape[1]):
+        col_values = values[:, col]
+        sums = np.add.reduceat(col_values, gene_starts)
+        for stat in stats:
+            if stat == 'all':
+                results.append([','.join([str(i) for i in gene_values])
+                                for gene_values in np.split(col_values, gene_starts[1:])])
+            elif stat == 'mean':
+                results.append(sums / counts)
+            elif stat == 'std':
+                means = np.repeat(sums / counts, counts)
+                results.append(np.sqrt(np.add.reduceat((col_values - means) ** 2, gene_starts) / counts))
+            elif stat == 'max':
+                results.append(np.maximum.reduceat(col_values, gene_starts))
+            else:
+                print('{} is not an appropriate value for stats!'.format(stat))
+                sys.exit(1)
+    return results
+
+
+def output_gene_stats(genes, results):
+    ## Prints gene and all calculated stats
+
+    for i in range(len(genes)):
+        print('\t'.join([genes[i]] + [str(result[i]) for result in results]))
 
 
 def main():
@@ -75,22 +102,32 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-a', '--anno', type=str, help='annotation file')
     parser.add_argument('-i', '--iso', type=str, help='isoformes file: gene \t transcript')
-    parser.add_argument('-c', '--col', type=int, help='column with values of interest')
-    parser.add_argument('-s', '--stats', type=str, default='max', help='all/mean/std/max; default=max(or longest)')
+    parser.add_argument('-c', '--col', type=str,
+                        help='column(s) with values of interest; comma-separated for several, e.g: 2,5')
+    parser.add_argument('-s', '--stats', type=str, default='max',
+                        help='all/mean/std/max; comma-separated for several, e.g: max,mean; default=max(or longest). '
+                             'Output: gene, then each stat for the first column, each stat for the second column, ..')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
+
+    cols = [int(c) for c in args.col.split(',')]
+    stats = args.stats.split(',')
 
     ## Make a dictionary of transcripts
     iso_dict = read_into_dict(args.iso)
 
-    ## Read annotation file into a dict: ID : value
+    ## Read annotation file into a dict: ID : values
     field = 1
-    anno_dict = read_anno_values(args.anno, field, args.col)
+    anno_dict = read_anno_values(args.anno, field, cols)
 
-    value_gene_dict = assign_values_to_genes(iso_dict, anno_dict)
+    ## Collect values of isoforms into arrays grouped by gene
+    genes, gene_codes, values = assign_values_to_genes(iso_dict, anno_dict)
 
-    ## Output calculated stistics per gene
-    output_gene_stats(value_gene_dict, args.stats)
+    ## Calculate and output statistics per gene
+    results = calculate_gene_stats(gene_codes, values, len(genes), stats)
+    output_gene_stats(genes, results)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+#
+
+"""
+This script filters, labels and renames entries of an annotation (bed12, genePred or any tab-separated table)
+by the ID in one field, in a single pass. Rules are applied in the order given, each to the ID left by the previous one;
+only the ID field is rewritten, the rest of the line stays as it is. Lines without tabs are split on any whitespace.
+
+e.g usage:
+id_stream.py -a anno.bed --exclude bad_ids.txt --label nmd_ids.txt _potentialNMD --prefix gene_names.csv
+id_stream.py -a anno.gp -F genepred --include ids.txt --rename new_names.csv
+"""
+
+import argparse
+import re
+import sys
+from io_utils import add_output_arguments, open_input, setup_stdout
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+## ID field (1-based) of known formats
+FORMAT_FIELDS = {'bed12': 4, 'genepred': 1}
+WHITESPACE = re.compile(r'(\s+)')
+
+
+def read_id_set(file):
+    ## Reads one ID per line (first column) into a set
+
+    with open_input(file) as inf:
+        return set(line.split()[0] for line in inf if line.strip())
+
+
+def read_id_dict(file, sep=','):
+    ## Reads correspondence table into a dictionary: {id: value}; csv (id,value) by default
+
+    id_dict = {}
+    with open_input(file) as inf:
+        for line in inf:
+            elements = line.rstrip('\n').split(sep)
+            if len(elements) > 1:
+                id_dict[elements[0]] = elements[1].rstrip()
+    return id_dict
+
+
+class IdTransformer(object):
+    ## Chain of ID rules applied to the ID field of every line: include/exclude keep or drop lines,
+    ## label/rename/prefix/suffix change the ID; lookups are sets and dicts
+
+    def __init__(self, field=4, strip_version=False, sep='_'):
+        self.field = field
+        self.strip_version = strip_version
+        self.sep = sep
+        self.rules = []
+
+    def get_key(self, id):
+        ## ID used for lookups: without .version if strip_version
+
+        return id.split('.')[0] if self.strip_version else id
+
+    def include(self, ids):
+        ## Keeps only lines with these IDs
+
+        self.rules.append(('include', set(ids)))
+        return self
+
+    def exclude(self, ids):
+        ## Drops lines with these IDs
+
+        self.rules.append(('exclude', set(ids)))
+        return self
+
+    def label(self, ids, label):
+        ## Adds label to these IDs: ID -> ID + label
+
+        self.rules.append(('label', dict.fromkeys(ids, label)))
+        return self
+
+    def rename(self, name_dict):
+        ## Replaces IDs: ID -> new_name
+
+        self.rules.append(('rename', name_dict))
+        return self
+
+    def prefix(self, name_dict):
+        ## Adds prefix to IDs: ID -> name + sep + ID
+
+        self.rules.append(('prefix', name_dict))
+        return self
+
+    def suffix(self, name_dict):
+        ## Adds suffix to IDs: ID -> ID + sep + name
+
+        self.rules.append(('suffix', name_dict))
+        return self
+
+    def transform_id(self, id):
+        ## Applies all rules to an ID; returns new ID or None if it is filtered out
+
+        for kind, table in self.rules:
+            key = self.get_key(id)
+            if kind == 'include':
+                if key not in table:
+                    return None
+            elif kind == 'exclude':
+                if key in table:
+                    return None
+            elif key in table:
+                if kind == 'label':
+                    id = id + table[key]
+                elif kind == 'rename':
+                    id = table[key]
+                elif kind == 'prefix':
+                    id = table[key] + self.sep + id
+                else:
+                    id = id + self.sep + table[key]
+        return id
+
+    def transform_line(self, line):
+        ## Returns line with the new ID in its field or None if it is filtered out; comments are kept as they are
+
+        line = line.rstrip('\r\n')
+        if line.startswith('#'):
+            return line
+        if '\t' in line:
+            elements, step = line.split('\t'), 1
+        else:
+            # space-delimited line: separators are kept as fields in between, so the line is rebuilt as it was
+            elements, step = WHITESPACE.split(line.strip()), 2
+        index = (self.field - 1) * step
+        if index >= len(elements):
+            sys.exit('Error! There is no field {} in the annotation line: {}'.format(self.field, line))
+        new_id = self.transform_id(elements[index])
+        if new_id is None:
+            return None
+        if new_id != elements[index]:
+            elements[index] = new_id
+            return '\t'.join(elements) if step == 1 else ''.join(elements)
+        return line
+
+    def transform_file(self, file):
+        ## Yields transformed lines of an annotation file (empty lines are skipped)
+
+        with open_input(file) as inf:
+            for new_line in self.transform_lines(inf):
+                yield new_line
+
+    def transform_lines(self, lines):
+        ## Yields transformed lines of an iterable of annotation lines (empty lines are skipped)
+
+        for line in lines:
+            if line.strip():
+                new_line = self.transform_line(line)
+                if new_line is not None:
+                    yield new_line
+
+
+class RuleAction(argparse.Action):
+    ## Collects rules from the command line into one list in the order they were given
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        rules = getattr(namespace, 'rules', None) or []
+        rules.append((self.dest, values))
+        namespace.rules = rules
+
+
+def add_rules(transformer, rules):
+    ## Adds rules from the command line [(kind, args), ..] to transformer
+
+    for kind, values in rules:
+        if kind in ('include', 'exclude'):
+            getattr(transformer, kind)(read_id_set(values))
+        elif kind == 'label':
+            transformer.label(read_id_set(values[0]), values[1])
+        else:
+            getattr(transformer, kind)(read_id_dict(values))
+    return transformer
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-a', '--anno', type=str, help='annotation file')
+    parser.add_argument('-F', '--format', type=str, choices=sorted(FORMAT_FIELDS), default='bed12',
+                        help='annotation format, defines ID field; default: bed12')
+    parser.add_argument('-f', '--field', type=int, help='ID field (1-based) of any tab- or space-separated file; overrides -F')
+    parser.add_argument('-v', '--strip_version', action='store_true', help='match IDs without .version')
+    parser.add_argument('--include', action=RuleAction, metavar='LIST', help='keep only IDs from the list')
+    parser.add_argument('--exclude', action=RuleAction, metavar='LIST', help='drop IDs from the list')
+    parser.add_argument('--label', action=RuleAction, nargs=2, metavar=('LIST', 'LABEL'),
+                        help='add label to IDs from the list, e.g: nmd.txt _potentialNMD')
+    parser.add_argument('--rename', action=RuleAction, metavar='CSV', help='replace IDs: csv oldName,newName')
+    parser.add_argument('--prefix', action=RuleAction, metavar='CSV', help='add prefix to IDs: csv ID,prefix')
+    parser.add_argument('--suffix', action=RuleAction, metavar='CSV', help='add suffix to IDs: csv ID,suffix')
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
+
+    ## Make chain of rules in the order they were given
+    field = args.field if args.field else FORMAT_FIELDS[args.format]
+    transformer = add_rules(IdTransformer(field, args.strip_version), getattr(args, 'rules', None) or [])
+
+    ## Transform annotation in one pass; stdout
+    for line in transformer.transform_file(args.anno):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
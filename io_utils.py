@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+#
+
+"""
+Shared input/output for the scripts: '-' is stdin/stdout, gzip/bgzip inputs are read directly
+(recognized by the magic number, not the extension), output goes through a large buffer
+and can be gzip-compressed in several threads.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import atexit
+import gzip
+import io
+import os
+import sys
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+BUFFER_SIZE = 1 << 20
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class GzipInput(gzip.GzipFile):
+    ## Decompressing reader of an already open binary file; unlike GzipFile, closing it closes that file too
+
+    def __init__(self, inf):
+        super(GzipInput, self).__init__(fileobj=inf, mode='rb')
+        self.input_file = inf
+
+    def close(self):
+        try:
+            super(GzipInput, self).close()
+        finally:
+            self.input_file.close()
+
+
+def open_input(file, mode='r'):
+    ## Opens file for reading line by line: '-' is stdin, gzip/bgzip files are decompressed on the fly;
+    ## mode 'r' gives text lines, 'rb' gives bytes.
+    ## The file is opened once and its magic number is peeked at in the buffer, so pipes (<(..)) are not drained
+
+    binary = 'b' in mode
+    if file == '-':
+        inf = open(sys.stdin.fileno(), 'rb', buffering=BUFFER_SIZE, closefd=False)
+    else:
+        inf = open(file, 'rb', buffering=BUFFER_SIZE)
+    if inf.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        inf = GzipInput(inf)
+    return inf if binary else io.TextIOWrapper(inf)
+
+
+class ThreadedGzipWriter(io.RawIOBase):
+    ## Binary writer that compresses blocks of data in a pool of threads (zlib releases the GIL);
+    ## every block is a gzip member, members are written in order, so the output is one valid gzip file
+
+    def __init__(self, outf, threads=2, level=6, block_size=BUFFER_SIZE):
+        self.outf = outf
+        self.level = level
+        self.block_size = block_size
+        self.block = bytearray()
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+        self.jobs = deque()
+        self.max_jobs = 2 * threads
+
+    def writable(self):
+        return True
+
+    def submit_block(self):
+        ## Sends current block to compression; writes compressed blocks that are done, keeps at most max_jobs waiting
+
+        try:
+            job = self.pool.submit(gzip.compress, bytes(self.block), self.level)
+        except RuntimeError:
+            # interpreter is shutting down (output is closed at exit): compress the last block here
+            job = Future()
+            job.set_result(gzip.compress(bytes(self.block), self.level))
+        self.jobs.append(job)
+        self.block = bytearray()
+        while self.jobs and (self.jobs[0].done() or (len(self.jobs) > self.max_jobs)):
+            self.outf.write(self.jobs.popleft().result())
+
+    def write(self, data):
+        self.block += data
+        if len(self.block) >= self.block_size:
+            self.submit_block()
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            if self.block:
+                self.submit_block()
+            while self.jobs:
+                self.outf.write(self.jobs.popleft().result())
+            self.pool.shutdown()
+            self.outf.close()
+        super(ThreadedGzipWriter, self).close()
+
+
+def open_output(file=None, threads=1, mode='w'):
+    ## Opens buffered output: stdout if file is None or '-'; file ending with .gz is gzip-compressed
+    ## (in threads threads if threads > 1); bed written to .bgz is sorted, bgzipped and tabix-indexed (bed12_tabix.py);
+    ## mode 'w' gives text, 'wb' gives bytes
+
+    if (file is None) or (file == '-'):
+        raw = open(sys.stdout.fileno(), 'wb', buffering=0, closefd=False)
+    elif file.endswith('.bgz'):
+        # coordinate-sorted, bgzipped bed with tabix index
+        from bed12_tabix import TabixBedWriter
+        raw = TabixBedWriter(file)
+    elif file.endswith('.gz'):
+        if threads > 1:
+            raw = ThreadedGzipWriter(open(file, 'wb'), threads)
+        else:
+            raw = gzip.open(file, 'wb')
+    else:
+        raw = open(file, 'wb', buffering=0)
+    writer = io.BufferedWriter(raw, buffer_size=BUFFER_SIZE)
+    return writer if 'b' in mode else io.TextIOWrapper(writer, encoding='utf-8', newline='\n')
+
+
+def add_output_arguments(parser):
+    ## Adds --output and --output_threads options to a script's argument parser
+
+    parser.add_argument('--output', type=str, default='-',
+                        help='output file; .gz is compressed, .bgz (bed only) is sorted, bgzipped and tabix-indexed; '
+                             'default: stdout (-)')
+    parser.add_argument('--output_threads', type=int, default=1,
+                        help='threads to compress .gz output; default: 1')
+
+
+def setup_stdout(file=None, threads=1):
+    ## Replaces sys.stdout with buffered (and optionally compressed) output, so print() goes there;
+    ## it is flushed and closed when the script ends
+
+    sys.stdout.flush()
+    sys.stdout = open_output(file, threads)
+    atexit.register(close_stdout, sys.stdout)
+    return sys.stdout
+
+
+def reset_stdout(stdout):
+    ## Closes output set by setup_stdout and puts back stdout; for several commands run in one process
+
+    if sys.stdout is not stdout:
+        close_stdout(sys.stdout)
+        atexit.unregister(close_stdout)
+        sys.stdout = stdout
+
+
+def close_stdout(outf):
+    ## Flushes and closes output set by setup_stdout; a closed pipe (e.g: | head) is not an error
+
+    try:
+        outf.close()
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.__stdout__.fileno())
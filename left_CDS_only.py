@@ -6,6 +6,9 @@ Use of for pre-processing of your bed-12 file.
 import argparse
 import sys
 from collections import Counter
+from bed12 import Bed12Record
+from io_utils import open_input, open_output
+from profiling import add_profile_arguments, setup_profiler
 
 __author__ = "Bogdan Kirilenko, 2020."
 __version__ = "1.0"
@@ -23,10 +26,13 @@ def parse_args():
     """Read args, check."""
     app = argparse.ArgumentParser()
     app.add_argument("input", help="Bed-12 formatted annotation track.")
-    app.add_argument("output", default="stdout", help="Output destination, stdout as default")
+    app.add_argument("output", default="stdout", help="Output destination, stdout as default; .bgz: sorted, bgzipped, tabix-indexed")
     app.add_argument("--out_of_frame", "--ouf", action="store_true", dest="out_of_frame",
                      help="Do not skip out-of-frame genes.")
     app.add_argument("--save_rejected", "--sr", default=None)
+    app.add_argument("--columnar", action="store_true",
+                     help="Clip all transcripts to CDS at once on columnar arrays (bed12_blocks.py, needs numpy).")
+    add_profile_arguments(app)
     # print help if there are no args
     if len(sys.argv) < 2:
         app.print_help()
@@ -42,7 +48,7 @@ def prepare_bed_file(bed_file, output, utred_out=False, ouf=False, save_rejected
     rejected = []
     names = Counter()  # we need to make sure that all names are unique
 
-    f = open(bed_file, "r")
+    f = open_input(bed_file)
     for line in f:
         line_data = line[:-1].split("\t")
 
@@ -50,19 +56,20 @@ def prepare_bed_file(bed_file, output, utred_out=False, ouf=False, save_rejected
             f.close()
             die(f"Error! Bed 12 file is required! Got a file with {len(line_data)} fields instead")
 
-        chrom = line_data[0]
-        chromStart = int(line_data[1])
-        chromEnd = int(line_data[2])
-        name = line_data[3]  # gene_name usually
-        bed_score = int(line_data[4])  # never used
-        strand = line_data[5]  # otherwise:
+        bed = Bed12Record.from_fields(line_data)
+        chrom = bed.chrom
+        chromStart = bed.start
+        chromEnd = bed.end
+        name = bed.name  # gene_name usually
+        bed_score = int(bed.score)  # never used
+        strand = bed.strand  # otherwise:
         # strand = True if line_data[5] == '+' else False
-        thickStart = int(line_data[6])
-        thickEnd = int(line_data[7])
-        itemRgb = line_data[8]  # never used
-        blockCount = int(line_data[9])
-        blockSizes = [int(x) for x in line_data[10].split(',') if x != '']
-        blockStarts = [int(x) for x in line_data[11].split(',') if x != '']
+        thickStart = bed.cds_start
+        thickEnd = bed.cds_end
+        itemRgb = bed.rgb  # never used
+        blockCount = bed.block_count
+        blockSizes = bed.block_sizes
+        blockStarts = bed.block_starts
         blockEnds = [blockStarts[i] + blockSizes[i] for i in range(blockCount)]
         blockAbsStarts = [blockStarts[i] + chromStart for i in range(blockCount)]
         blockAbsEnds = [blockEnds[i] + chromStart for i in range(blockCount)]
@@ -120,8 +127,65 @@ def prepare_bed_file(bed_file, output, utred_out=False, ouf=False, save_rejected
         utr_line = "\t".join(utr_track)
         utred_lines.append(utr_line)
     f.close()
+    write_outputs(new_lines, rejected, utred_lines, output, utred_out, save_rejected)
+
+
+def prepare_bed_file_columnar(bed_file, output, utred_out=False, ouf=False, save_rejected=None):
+    """Same as prepare_bed_file; CDS blocks of all transcripts are clipped at once (bed12_blocks.py)."""
+    from bed12_blocks import block_lengths, read_block_table
+    table = read_block_table(bed_file)
+    if (table.cds_starts > table.cds_ends).any():
+        die("Error! File is corrupted, thickEnd MUST be >= thickStart")
+
+    offsets, starts, sizes = table.cds()
+    counts = (offsets[1:] - offsets[:-1]).tolist()
+    cds_lengths = block_lengths(offsets, sizes).tolist()
+    # blocks relative to thickStart, which is the new chromStart
+    rel_starts = (starts - table.cds_starts.repeat(offsets[1:] - offsets[:-1])).tolist()
+    sizes = sizes.tolist()
+    offsets = offsets.tolist()
+    cds_starts = table.cds_starts.tolist()
+    cds_ends = table.cds_ends.tolist()
+    lines = table.get_lines() if utred_out else None
 
-    f = open(output, "w") if output != "stdout" else sys.stdout
+    new_lines = []
+    utred_lines = []
+    rejected = []
+    names = Counter()  # we need to make sure that all names are unique
+    for i, (chrom, name, score, strand, rgb) in enumerate(zip(table.column("chrom"), table.names, table.scores,
+                                                              table.column("strand"), table.rgbs)):
+        names[name] += 1
+        if names[name] > 1:
+            name_upd = f"{name}_{names[name]}"
+            rejected.append((name, f"Non uniq, renamed to {name_upd}"))
+        else:
+            name_upd = name
+
+        if counts[i] == 0:
+            rejected.append((name, "No CDS"))
+            continue  # remove non-coding genes
+        if cds_lengths[i] % 3 != 0 and not ouf:
+            rejected.append((name, "Out-of-frame gene"))
+            continue  # out-of-frame gene
+
+        first, last = offsets[i], offsets[i + 1]
+        new_track = [chrom, cds_starts[i], cds_ends[i], name_upd, int(score), strand, cds_starts[i], cds_ends[i], rgb,
+                     counts[i], ",".join([str(x) for x in sizes[first: last]]) + ",",
+                     ",".join([str(x) for x in rel_starts[first: last]]) + ","]
+        new_lines.append("\t".join([str(x) for x in new_track]))
+
+        if utred_out:
+            utr_track = lines[i].split("\t")
+            utr_track[6] = utr_track[1]
+            utr_track[7] = utr_track[2]
+            utred_lines.append("\t".join(utr_track))
+    write_outputs(new_lines, rejected, utred_lines, output, utred_out, save_rejected)
+
+
+def write_outputs(new_lines, rejected, utred_lines, output, utred_out=False, save_rejected=None):
+    """Write CDS-only tracks, rejected genes and UTRed tracks."""
+    # .bgz output is sorted, bgzipped and tabix-indexed
+    f = open_output(output) if output.endswith(".bgz") else open(output, "w") if output != "stdout" else sys.stdout
     f.write("\n".join(new_lines) + "\n")
     f.close() if output != "stdout" else None
 
@@ -140,8 +204,11 @@ def prepare_bed_file(bed_file, output, utred_out=False, ouf=False, save_rejected
 def main():
     """Entry point."""
     args = parse_args()
+    profiler = setup_profiler(args.profile, args.progress, args.cprofile)
     # maybe save rejected also here
-    prepare_bed_file(args.input, args.output, ouf=args.out_of_frame, save_rejected=args.save_rejected)
+    prepare = prepare_bed_file_columnar if args.columnar else prepare_bed_file
+    with profiler.phase("prepare_bed_file"):
+        prepare(args.input, args.output, ouf=args.out_of_frame, save_rejected=args.save_rejected)
     sys.exit(0)
 
 
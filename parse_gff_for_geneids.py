@@ -1,58 +1,122 @@
 #!/usr/bin/env python3
 
 '''
-This script takes an annotation gff3 file
+This script takes an annotation gff3 file (plain or gzipped)
 and outputs table: transcript\t geneID\t geneName
+(columns are attributes of the feature type, configurable: -t, -k, -f);
+optionally writes isoform map: gene\t transcript1,transcript2,..
 '''
 
 import argparse
+from collections import OrderedDict
+from io_utils import add_output_arguments, open_input, setup_stdout
+from profiling import add_profile_arguments, setup_profiler
 
 
 __author__ = "Ekaterina Osipova, 2022."
 
 
-def extract_ids_from_exon_lines(file):
+def parse_attributes(attributes):
+	## Parses column 9 into a dictionary: {'ID': 'rna-XM_1', 'Dbxref': 'GeneID:123,Genbank:XM_1', ..}
 
-	transc_dict = {}
-	with open(file, 'r')as inf:
-		for line in inf.readlines():
-			line_elements = line.split('\t')
+	attr_dict = {}
+	for el in attributes.rstrip().split(';'):
+		key, sep, value = el.strip().partition('=')
+		if sep:
+			attr_dict[key] = value
+	return attr_dict
 
-			## check if it a gff annotation line
-			if len(line_elements) == 9:
-				if line_elements[2] == 'mRNA':
-					exon_info = line_elements[8]
-					exon_elements = exon_info.replace(',', ';').split(';')
-					for el in exon_elements:
-						if el.startswith('Parent='):
-							transc = el.replace('Parent=', '')
-						elif el.startswith('Dbxref=GeneID:'):
-							ncbigene = el.replace('Dbxref=GeneID:', '')
-						elif el.startswith('gene='):
-							genename = el.replace('gene=', '')
-					transc_dict[transc] = (ncbigene, genename)
-	return transc_dict
+
+def get_attribute(attr_dict, field):
+	## Gets value of an attribute; field 'Dbxref:GeneID' takes the GeneID item of the Dbxref list; NA if missing
+
+	key, sep, db = field.partition(':')
+	value = attr_dict.get(key)
+	if value is None:
+		return 'NA'
+	if sep:
+		for item in value.split(','):
+			if item.startswith(db + ':'):
+				return item[len(db) + 1:]
+		return 'NA'
+	return value
+
+
+def scan_gff(file, feature_types):
+	## Streams gff lines; yields attribute dictionaries of the features of feature_types only;
+	## other lines are rejected by a byte search for the type in column 3 before anything is split or decoded
+
+	type_patterns = [b'\t' + t.encode() + b'\t' for t in feature_types]
+	type_set = set(t.encode() for t in feature_types)
+	with open_input(file, 'rb') as inf:
+		for line in inf:
+			if not any(pattern in line for pattern in type_patterns):
+				continue
+			line_elements = line.split(b'\t', 8)
+
+			## check if it a gff annotation line of the requested type
+			if (len(line_elements) == 9) and (line_elements[2] in type_set):
+				yield parse_attributes(line_elements[8].decode())
+
+
+def extract_ids_from_exon_lines(file, feature_types=('mRNA',), key='Parent', fields=('Dbxref:GeneID', 'gene'),
+								isoform_key=None):
+	## Makes transcript table {key: (field1, field2, ..)} and, if isoform_key is given,
+	## isoform map {isoform_key value: [ID1, ID2, ..]} in one pass
+
+	transc_dict = OrderedDict()
+	isoform_dict = OrderedDict()
+	for attr_dict in scan_gff(file, feature_types):
+		transc = get_attribute(attr_dict, key)
+		transc_dict[transc] = tuple(get_attribute(attr_dict, field) for field in fields)
+		if isoform_key:
+			isoform_dict.setdefault(get_attribute(attr_dict, isoform_key), []).append(get_attribute(attr_dict, 'ID'))
+	return transc_dict, isoform_dict
 
 
 def output_transcripts(transc_dict):
 
 	for transc in transc_dict:
-		ncbigene = transc_dict[transc][0]
-		genename = transc_dict[transc][1]
-		print('{}\t{}\t{}'.format(transc, ncbigene, genename))
+		print('\t'.join((transc,) + transc_dict[transc]))
+
+
+def write_isoforms(isoform_dict, file):
+	## Writes isoform map: gene\t isoform1,isoform2,..
+
+	with open(file, 'w') as outf:
+		for gene in isoform_dict:
+			outf.write('{}\t{}\n'.format(gene, ','.join(isoform_dict[gene])))
 
 
 def main():
 	## Parse arguments
 	parser = argparse.ArgumentParser()
-	parser.add_argument('-a', '--annogff', type=str, help='annotation file in gff format')
+	parser.add_argument('-a', '--annogff', type=str, help='annotation file in gff format (can be gzipped)')
+	parser.add_argument('-t', '--types', type=str, default='mRNA', help='comma-separated feature types; default: mRNA')
+	parser.add_argument('-k', '--key', type=str, default='Parent', help='attribute for the first column; default: Parent')
+	parser.add_argument('-f', '--fields', type=str, default='Dbxref:GeneID,gene',
+						help='comma-separated attributes for the next columns; DB:ID takes ID from the DB list; '
+							 'default: Dbxref:GeneID,gene')
+	parser.add_argument('-i', '--isoforms', type=str,
+						help='also write isoform map to this file: Parent\\t ID1,ID2,..')
+	add_output_arguments(parser)
+	add_profile_arguments(parser)
 	args = parser.parse_args()
+	profiler = setup_profiler(args.profile, args.progress, args.cprofile)
+	setup_stdout(args.output, args.output_threads)
 
-	## Parse gff file into a transcript dictionary
-	transc_dict = extract_ids_from_exon_lines(args.annogff)
+	## Parse gff file into a transcript dictionary (and isoform map)
+	with profiler.phase('extract_ids_from_exon_lines'):
+		transc_dict, isoform_dict = extract_ids_from_exon_lines(args.annogff, args.types.split(','), args.key,
+																args.fields.split(','), 'Parent' if args.isoforms else None)
+		profiler.set_size('transc_dict', len(transc_dict))
 
 	## Output the requested table
-	output_transcripts(transc_dict)
+	with profiler.phase('output_transcripts'):
+		output_transcripts(transc_dict)
+		profiler.add_records(len(transc_dict))
+		if args.isoforms:
+			write_isoforms(isoform_dict, args.isoforms)
 
 
 if __name__ == '__main__':
@@ -42,9 +42,14 @@ then
 fi
 
 
+## sorted, bgzipped and tabix-indexed copy for region queries: bed12_tabix.py -i $OUTBED.bgz -r chr:start-end
+echo -e "Indexing $OUTBED......."
+bed12_tabix.py -b $OUTBED -o $OUTBED.bgz
+
+
 ## clean up
 echo -e "Cleaning up now....."
 rm -r $EVMDIR
 rm $JOINEVM
 
-echo -e "All Done! Check results in $OUTBED"
+echo -e "All Done! Check results in $OUTBED (indexed: $OUTBED.bgz)"
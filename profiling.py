@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+#
+
+"""
+Opt-in instrumentation for the scripts: wall and CPU time, records processed, sizes of dictionaries/indexes
+and peak memory (RSS) per phase of a run (e.g: reading, indexing, matching, output), written as a json report.
+Switched on by --profile [REPORT] (add_profile_arguments) or the ANNO_PROFILE=REPORT environment variable
+(REPORT '-' or 1 is stderr); ANNO_PROGRESS=1 / --progress shows a live progress line on stderr;
+ANNO_CPROFILE=FILE / --cprofile FILE dumps cProfile stats of the slowest phase (read with python -m pstats FILE).
+When it is off, phases and tracked iterables cost nothing.
+Instrumented scripts: anno_select_longest.py, cds_add_utrs_from_stringtie.py, filter_anno_by_ref_anno.py,
+filter_blast_hits.py, getUniqTranscripts.py, left_CDS_only.py, parse_gff_for_geneids.py.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+PROFILE_ENV = 'ANNO_PROFILE'
+PROGRESS_ENV = 'ANNO_PROGRESS'
+CPROFILE_ENV = 'ANNO_CPROFILE'
+PROGRESS_INTERVAL = 1.0
+
+
+def get_peak_rss(who=None):
+    ## Peak resident memory in MB of this process (or of its finished child processes); None where not available
+
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+    # ru_maxrss is in kilobytes on linux, in bytes on macOS
+    return round(usage.ru_maxrss / (1 << 20) if sys.platform == 'darwin' else usage.ru_maxrss / 1024, 1)
+
+
+class Phase(object):
+    ## One measured phase of a run
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.records = 0
+        self.sizes = {}
+        self.peak_rss = None
+        self.stats = None
+
+    def to_dict(self):
+        return {'name': self.name, 'wall_s': round(self.wall, 4), 'cpu_s': round(self.cpu, 4),
+                'records': self.records,
+                'records_per_s': round(self.records / self.wall, 1) if self.wall and self.records else None,
+                'sizes': self.sizes, 'peak_rss_mb': self.peak_rss}
+
+
+class PhaseContext(object):
+    ## Context manager measuring one phase; cProfile runs only in top-level phases (profilers can not be nested)
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.phase = Phase(name)
+        self.stats = None
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler.phases.append(self.phase)
+        profiler.stack.append(self.phase)
+        if profiler.cprofile_file and (len(profiler.stack) == 1):
+            self.stats = cProfile.Profile()
+            self.stats.enable()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self.phase
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        phase = self.phase
+        phase.wall = time.perf_counter() - self.wall_start
+        phase.cpu = time.process_time() - self.cpu_start
+        if self.stats is not None:
+            self.stats.disable()
+            phase.stats = self.stats
+        phase.peak_rss = get_peak_rss()
+        self.profiler.stack.pop()
+        self.profiler.end_progress(phase)
+        return False
+
+
+class NullContext(object):
+    ## Phase of a switched off profiler: does nothing
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_CONTEXT = NullContext()
+
+
+class Profiler(object):
+    ## Collects phases of a run; report() gives them as a dictionary, write_report() as json
+
+    def __init__(self, enabled=False, report_file=None, progress=False, cprofile_file=None):
+        # command line of the profiled script, taken when the profiler is made (several commands can run in one process)
+        self.script = os.path.basename(sys.argv[0])
+        self.argv = sys.argv[1:]
+        self.enabled = enabled
+        self.report_file = report_file
+        self.progress = progress
+        self.cprofile_file = cprofile_file
+        self.phases = []
+        self.stack = []
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.last_progress = 0.0
+
+    def phase(self, name):
+        ## Context manager of a phase: with profiler.phase('read_anno_bed'): ..
+
+        return PhaseContext(self, name) if self.enabled else NULL_CONTEXT
+
+    def set_size(self, name, size):
+        ## Records size of a dictionary/index built in the current phase
+
+        if self.enabled and self.stack:
+            self.stack[-1].sizes[name] = size
+
+    def add_records(self, n):
+        ## Counts n records processed in the current phase
+
+        if self.enabled and self.stack:
+            self.stack[-1].records += n
+            if self.progress:
+                self.show_progress()
+
+    def track(self, iterable):
+        ## Counts records of iterable in the current phase as they are taken; returns iterable as is if profiler is off
+
+        if not self.enabled:
+            return iterable
+        return self.iter_tracked(iterable)
+
+    def iter_tracked(self, iterable):
+        for item in iterable:
+            if self.stack:
+                self.stack[-1].records += 1
+                if self.progress and not (self.stack[-1].records & 0x3ff):
+                    self.show_progress()
+            yield item
+
+    def show_progress(self):
+        ## Rewrites progress line on stderr, at most once per PROGRESS_INTERVAL seconds
+
+        now = time.perf_counter()
+        if now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        phase = self.stack[-1]
+        sys.stderr.write('\r[{}] {} records, {:.0f} s, peak RSS {} MB\033[K'.format(
+            phase.name, phase.records, now - self.wall_start, get_peak_rss()))
+        sys.stderr.flush()
+
+    def end_progress(self, phase):
+        ## Finishes progress line of a phase
+
+        if self.progress:
+            sys.stderr.write('\r[{}] {} records in {:.2f} s\033[K\n'.format(phase.name, phase.records, phase.wall))
+            sys.stderr.flush()
+            self.last_progress = 0.0
+
+    def report(self):
+        ## Report of the run: {'script', 'argv', 'total': {..}, 'phases': [{..}, ..]}
+
+        report = {'script': self.script, 'argv': self.argv,
+                  'total': {'wall_s': round(time.perf_counter() - self.wall_start, 4),
+                            'cpu_s': round(time.process_time() - self.cpu_start, 4),
+                            'peak_rss_mb': get_peak_rss(),
+                            'children_peak_rss_mb': get_peak_rss(resource.RUSAGE_CHILDREN) if resource else None},
+                  'phases': [phase.to_dict() for phase in self.phases]}
+        profiled = [phase for phase in self.phases if phase.stats is not None]
+        if profiled:
+            report['cprofile'] = {'phase': max(profiled, key=lambda phase: phase.wall).name,
+                                  'file': self.cprofile_file}
+        return report
+
+    def write_report(self):
+        ## Writes json report (to stderr if report_file is '-') and cProfile stats of the slowest phase
+
+        if not self.enabled:
+            return
+        report = self.report()
+        if 'cprofile' in report:
+            slowest = [phase for phase in self.phases if phase.name == report['cprofile']['phase']][0]
+            slowest.stats.dump_stats(self.cprofile_file)
+        if self.report_file is None:
+            return
+        if self.report_file == '-':
+            sys.stderr.write(json.dumps(report, indent=1) + '\n')
+        else:
+            with open(self.report_file, 'w') as outf:
+                json.dump(report, outf, indent=1)
+                outf.write('\n')
+
+
+## profiler of the running script; switched off until setup_profiler()
+profiler = Profiler()
+
+
+def get_profiler():
+    return profiler
+
+
+def track(iterable):
+    ## Counts records of iterable in the current phase of the script's profiler (see Profiler.track)
+
+    return profiler.track(iterable)
+
+
+def add_profile_arguments(parser):
+    ## Adds --profile, --progress and --cprofile options to a script's argument parser
+
+    parser.add_argument('--profile', type=str, nargs='?', const='-',
+                        help='write json report of time/memory per phase to this file; no file: stderr '
+                             '(or set {}=FILE)'.format(PROFILE_ENV))
+    parser.add_argument('--progress', action='store_true',
+                        help='show progress line on stderr (or set {}=1)'.format(PROGRESS_ENV))
+    parser.add_argument('--cprofile', type=str,
+                        help='dump cProfile stats of the slowest phase to this file (or set {}=FILE)'.format(CPROFILE_ENV))
+
+
+def setup_profiler(profile=None, progress=False, cprofile_file=None):
+    ## Switches on the script's profiler if requested by arguments or environment; the report is written at exit
+
+    global profiler
+    profile = profile or os.environ.get(PROFILE_ENV)
+    progress = progress or (os.environ.get(PROGRESS_ENV, '0') not in ('', '0'))
+    cprofile_file = cprofile_file or os.environ.get(CPROFILE_ENV)
+    if not (profile or progress or cprofile_file):
+        return profiler
+    report_file = None if not profile else ('-' if profile in ('1', '-') else profile)
+    profiler = Profiler(enabled=True, report_file=report_file, progress=progress, cprofile_file=cprofile_file)
+    atexit.register(profiler.write_report)
+    return profiler
+
+
+def reset_profiler():
+    ## Writes report of the script's profiler now and switches it off; for several commands run in one process
+
+    global profiler
+    if profiler.enabled:
+        atexit.unregister(profiler.write_report)
+        profiler.write_report()
+    profiler = Profiler()
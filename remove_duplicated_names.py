@@ -8,6 +8,8 @@
 import argparse
 from collections import defaultdict
 from operator import itemgetter
+from bed12 import read_bed12, write_bed12
+from io_utils import add_output_arguments, setup_stdout
 
 
 __author__ = "Ekaterina Osipova, 2021."
@@ -17,12 +19,21 @@ def read_annotation(file):
     ## Reads bed12 annotation file into a dict
 
     anno_dict = defaultdict(list)
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
-            trans_name = line.split()[3]
-            exons = line.split()[10].rstrip(',').split(',')
-            exons_cov = sum([int(i) for i in exons])
-            anno_dict[trans_name].append((exons_cov, line.rstrip()))
+    for transc_info in read_bed12(file):
+        exons_cov = transc_info.spliced_length()
+        anno_dict[transc_info.name].append((exons_cov, transc_info))
+    return anno_dict
+
+
+def read_annotation_columnar(file):
+    ## Same as read_annotation, exon lengths of all transcripts are computed at once (bed12_blocks.py);
+    ## transcripts are kept as bed12 lines
+
+    from bed12_blocks import read_block_table
+    table = read_block_table(file)
+    anno_dict = defaultdict(list)
+    for name, exons_cov, line in zip(table.names, table.spliced_lengths().tolist(), table.get_lines()):
+        anno_dict[name].append((exons_cov, line))
     return anno_dict
 
 
@@ -32,21 +43,28 @@ def output_uniq_transcripts(anno_dict):
     for trans in anno_dict:
         if len(anno_dict[trans]) == 1:
             trans_info = anno_dict[trans][0][1]
-            print(trans_info)
+            write_bed12(trans_info)
         else:
             trans_list = anno_dict[trans]
             longest_trans = max(trans_list, key=itemgetter(0))[1]
-            print(longest_trans)
+            write_bed12(longest_trans)
 
 
 def main():
     ## Parse arguments
     parser = argparse.ArgumentParser()
     parser.add_argument('-f', '--filebed', type=str, help='bed12 file')
+    parser.add_argument('--columnar', action='store_true',
+                        help='compute exon lengths on columnar arrays (bed12_blocks.py, needs numpy)')
+    add_output_arguments(parser)
     args = parser.parse_args()
+    setup_stdout(args.output, args.output_threads)
 
     ## Make a dictionary of transcripts
-    anno_dict = read_annotation(args.filebed)
+    if args.columnar:
+        anno_dict = read_annotation_columnar(args.filebed)
+    else:
+        anno_dict = read_annotation(args.filebed)
 
     ## Print unique transcripts
     output_uniq_transcripts(anno_dict)
@@ -6,6 +6,7 @@ and outputs table: ABC1\trna-XMxxxx
 '''
 
 import argparse
+from io_utils import open_input
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -16,8 +17,8 @@ parser = argparse.ArgumentParser()
 parser.add_argument('-i', '--isoforms', type=str, help='isoforms file: ABC1\tABC1_rna-XMxxxx')
 args = parser.parse_args()
 
-with open(args.isoforms, 'r') as inf:
-	for line in inf.readlines():
+with open_input(args.isoforms) as inf:
+	for line in inf:
 		g = line.split()[0]
 		t = line.split()[1]
 		new_t = t.replace(g + '_', '')
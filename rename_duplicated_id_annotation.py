@@ -3,6 +3,7 @@
 
 import argparse
 from collections import defaultdict
+from io_utils import open_input
 
 
 __author__ = "Ekaterina Osipova, 2022."
@@ -12,8 +13,8 @@ def read_anno_to_dict(file, column):
 	## Reads annotation file into a dict; checks IDs for uniqueness
 
 	anno_dict = defaultdict(list)
-	with open(file , 'r') as inf:
-		for line in inf.readlines():
+	with open_input(file) as inf:
+		for line in inf:
 			info = line.rstrip()
 			id_curr = info.split()[column - 1]
 			anno_dict[id_curr].append(info)
@@ -2,8 +2,8 @@
 #
 
 import argparse
-import pyfastx
-import collections
+import sys
+from io_utils import add_output_arguments, open_input, setup_stdout
 
 
 __author__ = "Ekaterina Osipova, 2020."
@@ -13,28 +13,49 @@ def read_rename_dict(file):
     ## Reads correspondence table into dictionary
 
     rename_table = {}
-    with open(file, 'r') as inf:
-        for line in inf.readlines():
+    with open_input(file) as inf:
+        for line in inf:
             rename_table[line.split(',')[0]] = line.rstrip().split(',')[1]
     return rename_table
 
 
-def read_fasta(fasta_file):
-    ## Reads fasta into a dictionary
+def iter_fasta(fasta_file):
+    ## Reads fasta record by record: yields (name, seq); only one sequence is kept in memory
 
-    fasta_dict = {}
-    for name, seq in pyfastx.Fasta(fasta_file, uppercase=False,  build_index=False):
-        fasta_dict[name] = seq
-    return collections.OrderedDict(sorted(fasta_dict.items()))
+    import pyfastx
+    for name, seq in pyfastx.Fasta(fasta_file, uppercase=False, build_index=False):
+        yield name, seq
 
 
-def rename_headers_from_dict(fasta_dict, rename_table):
-    ## Replaces headers of fasta with names from rename_table
+def iter_fasta_sorted(fasta_file):
+    ## Reads fasta records in sorted name order: yields (name, seq) by random access through the pyfastx index
 
-    for name in fasta_dict:
-        seq = fasta_dict[name]
-        print('>{}'.format(rename_table[name]))
+    import pyfastx
+    fasta = pyfastx.Fasta(fasta_file, uppercase=False)
+    for name in sorted(fasta.keys()):
+        yield name, fasta[name].seq
+
+
+def rename_headers_from_dict(fasta_records, rename_table, missing='keep'):
+    ## Replaces headers of fasta with names from rename_table; names missing from rename_table are
+    ## kept as they are (missing='keep'), dropped with their sequence (missing='drop') or stop the script (missing='error')
+
+    n_missing = 0
+    for name, seq in fasta_records:
+        if name in rename_table:
+            new_name = rename_table[name]
+        else:
+            n_missing += 1
+            if missing == 'error':
+                sys.exit('Error! {} is not found in the renaming dictionary'.format(name))
+            elif missing == 'drop':
+                continue
+            new_name = name
+        print('>{}'.format(new_name))
         print(seq)
+    if n_missing:
+        sys.stderr.write('Warning! {} names were not found in the renaming dictionary; {}\n'.format(
+            n_missing, 'dropped' if missing == 'drop' else 'kept as they are'))
 
 
 def main():
@@ -42,16 +63,23 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('-f', '--fasta', type=str, help='fasta file')
     parser.add_argument('-d', '--renamedict', type=str, help='table of name correspondence, usually renaming_dictionary.csv')
+    parser.add_argument('-s', '--sorted', action='store_true',
+                        help='output sequences sorted by (old) name; uses pyfastx index instead of streaming')
+    parser.add_argument('-m', '--missing', type=str, choices=['keep', 'drop', 'error'], default='keep',
+                        help='what to do with names not in the dictionary: keep them, drop the sequences or stop; '
+                             'default: keep')
+    add_output_arguments(parser)
     args = parser.parse_args()
-
-    ## Read fasta file into a dictionary
-    fasta_dict = read_fasta(args.fasta)
+    setup_stdout(args.output, args.output_threads)
 
     ## Read renaming dictionary
     rename_table = read_rename_dict(args.renamedict)
 
+    ## Read fasta file record by record (or in sorted order)
+    fasta_records = iter_fasta_sorted(args.fasta) if args.sorted else iter_fasta(args.fasta)
+
     ## Output fasta with headers renamed
-    rename_headers_from_dict(fasta_dict, rename_table)
+    rename_headers_from_dict(fasta_records, rename_table, args.missing)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+#
+
+"""
+Persistent index of uniprot/swissprot fasta headers: accession -> gene name (GN=).
+Built once into an sqlite file next to the db (DB.gn.sqlite) and rebuilt automatically
+when the db file changes (size or modification time), so scripts never scan the whole db again.
+If the index can not be written there (shared, read-only db), it is built in memory for the run.
+
+e.g usage: uniprot_index.py -u uniprot_sprot.fasta
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from urllib.parse import quote
+from io_utils import open_input
+
+__author__ = "Ekaterina Osipova, 2026."
+
+
+NO_GENE = 'NO_UNIREF_GENE'
+
+
+def parse_uniprot_header(line):
+    ## Parses uniprot fasta header: >sp|Q9H2S6|TNMD_HUMAN Tenomodulin OS=Homo sapiens OX=9606 GN=TNMD PE=1 SV=1;
+    ## returns (accession, gene_name or NO_GENE)
+
+    elements = line.rstrip().split()
+    accession = elements[0].lstrip('>')
+    if '|' in accession:
+        accession = accession.split('|')[1]
+    gene_names = [i[3:] for i in elements[1:] if i.startswith('GN=')]
+    return accession, gene_names[0] if gene_names else NO_GENE
+
+
+def iter_uniprot_headers(uniprot):
+    ## Yields (accession, gene_name) for every entry of uniprot fasta
+
+    with open_input(uniprot) as inf:
+        for line in inf:
+            if line.startswith('>'):
+                yield parse_uniprot_header(line)
+
+
+def get_db_stamp(uniprot):
+    ## Returns (size, modification time) of db file; index is valid only for this exact stamp
+
+    stat = os.stat(uniprot)
+    return str(stat.st_size), str(stat.st_mtime_ns)
+
+
+def fill_uniprot_index(connection, uniprot):
+    ## Creates tables of the index in an open sqlite connection and fills them from uniprot fasta
+
+    connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+    connection.execute('CREATE TABLE genes (accession TEXT PRIMARY KEY, gene TEXT) WITHOUT ROWID')
+    connection.executemany('INSERT OR REPLACE INTO genes VALUES (?, ?)', iter_uniprot_headers(uniprot))
+    size, mtime = get_db_stamp(uniprot)
+    connection.executemany('INSERT INTO meta VALUES (?, ?)', [('size', size), ('mtime', mtime)])
+    connection.commit()
+    return connection.execute('SELECT COUNT(*) FROM genes').fetchone()[0]
+
+
+def build_uniprot_index(uniprot, index_file):
+    ## Writes sqlite index {accession: gene_name} of uniprot fasta; returns number of entries
+
+    tmp_file = index_file + '.tmp{}'.format(os.getpid())
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    connection = sqlite3.connect(tmp_file)
+    try:
+        n_entries = fill_uniprot_index(connection, uniprot)
+    finally:
+        connection.close()
+    # replace the old index only when the new one is complete
+    os.replace(tmp_file, index_file)
+    return n_entries
+
+
+def get_read_only_uri(index_file):
+    ## sqlite URI opening index file read-only; the path is quoted, so '?', '#' or '%' in it are kept
+
+    return 'file:{}?mode=ro'.format(quote(index_file))
+
+
+def is_index_fresh(uniprot, index_file):
+    ## Checks if index exists and was built from the current version of db file
+
+    if not os.path.isfile(index_file):
+        return False
+    try:
+        connection = sqlite3.connect(get_read_only_uri(index_file), uri=True)
+        meta = dict(connection.execute('SELECT key, value FROM meta'))
+        connection.close()
+    except sqlite3.Error:
+        return False
+    return (meta.get('size'), meta.get('mtime')) == get_db_stamp(uniprot)
+
+
+class UniprotIndex(object):
+    ## Gene names of uniprot accessions looked up in the sqlite index; builds/rebuilds the index if needed
+
+    def __init__(self, uniprot, index_file=None):
+        ## If the index can not be written (e.g. shared read-only db directory), it is built in memory for this run
+
+        self.index_file = index_file if index_file else uniprot + '.gn.sqlite'
+        if is_index_fresh(uniprot, self.index_file):
+            self.connection = sqlite3.connect(get_read_only_uri(self.index_file), uri=True)
+        else:
+            sys.stderr.write('Indexing {} into {}\n'.format(uniprot, self.index_file))
+            try:
+                build_uniprot_index(uniprot, self.index_file)
+                self.connection = sqlite3.connect(get_read_only_uri(self.index_file), uri=True)
+            except (sqlite3.Error, OSError) as error:
+                sys.stderr.write('Warning! Can not write index {} ({}); indexing {} in memory\n'.format(
+                    self.index_file, error, uniprot))
+                self.index_file = None
+                self.connection = sqlite3.connect(':memory:')
+                fill_uniprot_index(self.connection, uniprot)
+        self.cache = {}
+
+    def get_gene(self, accession):
+        ## Returns gene name of accession; NO_GENE if entry has no gene name, None if accession is not in the db
+
+        if accession not in self.cache:
+            row = self.connection.execute('SELECT gene FROM genes WHERE accession = ?', (accession,)).fetchone()
+            self.cache[accession] = row[0] if row else None
+        return self.cache[accession]
+
+    def close(self):
+        self.connection.close()
+
+
+def main():
+    ## Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-u', '--uniprotdb', type=str, help='file with uniprot/swissprot database (fasta)')
+    parser.add_argument('-o', '--out', type=str, help='index file to write; default: UNIPROTDB.gn.sqlite')
+    args = parser.parse_args()
+
+    index_file = args.out if args.out else args.uniprotdb + '.gn.sqlite'
+    n_entries = build_uniprot_index(args.uniprotdb, index_file)
+    sys.stderr.write('Indexed {} entries in {}\n'.format(n_entries, index_file))
+
+
+if __name__ == '__main__':
+    main()